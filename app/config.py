@@ -7,5 +7,124 @@ class Settings:
     DB_CONNECTION_STRING = os.getenv("DB_CONNECTION_STRING")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     COLLECTION_NAME = os.getenv("COLLECTION_NAME", "chatbot_data")
+    # QDRANT_URL দিলে local ./qdrant_storage এর বদলে Qdrant server ব্যবহার হবে
+    QDRANT_URL = os.getenv("QDRANT_URL")
+    QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+    # qdrant: Qdrant client; mmap: নিজস্ব memory-mapped store (একাধিক uvicorn worker চালানো যায়)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+    MMAP_STORE_PATH = os.getenv("MMAP_STORE_PATH", "./vector_store")
+    MMAP_MAX_SEGMENTS = int(os.getenv("MMAP_MAX_SEGMENTS", "16"))
 
-settings = Settings()
\ No newline at end of file
+    # Vector storage mode: full (float32 RAM), scalar (int8 RAM + original vector disk এ, rescoring সহ), on_disk
+    VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "full").lower()
+    QUANTIZATION_RESCORE = os.getenv("QUANTIZATION_RESCORE", "true").lower() == "true"
+    QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", "2.0"))
+
+    # MSSQL connection pool settings
+    MSSQL_POOL_SIZE = int(os.getenv("MSSQL_POOL_SIZE", "5"))
+    MSSQL_POOL_MAX_IDLE_SECONDS = int(os.getenv("MSSQL_POOL_MAX_IDLE_SECONDS", "300"))
+    MSSQL_POOL_HEALTH_CHECK_SECONDS = int(os.getenv("MSSQL_POOL_HEALTH_CHECK_SECONDS", "30"))
+    MSSQL_POOL_TIMEOUT = int(os.getenv("MSSQL_POOL_TIMEOUT", "30"))
+    SCHEMA_CACHE_TTL_SECONDS = int(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "300"))
+
+    # Embedding batch settings
+    # openai: OpenAI API; hashing: network ছাড়া local CPU embedding (test এর জন্যও)
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    HASHING_EMBEDDING_DIMENSION = int(os.getenv("HASHING_EMBEDDING_DIMENSION", "512"))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000"))
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+
+    # OpenAI rate limit: process এর সব chat আর ingestion call একই token bucket share করে।
+    # Org এর limit অনুযায়ী দিবেন; background (ingestion) bucket এর RATE_LIMIT_INTERACTIVE_RESERVE অংশ ছোঁবে না
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    EMBEDDING_RATE_LIMIT_RPM = int(os.getenv("EMBEDDING_RATE_LIMIT_RPM", "3000"))
+    EMBEDDING_RATE_LIMIT_TPM = int(os.getenv("EMBEDDING_RATE_LIMIT_TPM", "1000000"))
+    CHAT_RATE_LIMIT_RPM = int(os.getenv("CHAT_RATE_LIMIT_RPM", "3500"))
+    CHAT_RATE_LIMIT_TPM = int(os.getenv("CHAT_RATE_LIMIT_TPM", "200000"))
+    # Completion এর token আগে জানা যায় না, তাই limiter এ এতটা ধরে নিবো
+    CHAT_RATE_LIMIT_COMPLETION_TOKENS = int(os.getenv("CHAT_RATE_LIMIT_COMPLETION_TOKENS", "500"))
+    RATE_LIMIT_INTERACTIVE_RESERVE = float(os.getenv("RATE_LIMIT_INTERACTIVE_RESERVE", "0.2"))
+    # Background lane এ একটা batch এর জন্য 429 এ সর্বোচ্চ এতক্ষণ অপেক্ষা করবে, তারপর training job fail হবে
+    EMBEDDING_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("EMBEDDING_RATE_LIMIT_MAX_WAIT_SECONDS", "600"))
+    CHAT_MAX_RETRIES = int(os.getenv("CHAT_MAX_RETRIES", "3"))
+
+    # Streaming ingestion settings
+    INGEST_FETCH_SIZE = int(os.getenv("INGEST_FETCH_SIZE", "1000"))
+    INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "500"))
+    # এর চেয়ে বড় chunk process pool এ format হবে (INGEST_FETCH_SIZE বাড়ালে কাজে লাগে); worker 0 হলে pool বন্ধ
+    INGEST_FORMAT_WORKERS = int(os.getenv("INGEST_FORMAT_WORKERS", str(min(max((os.cpu_count() or 1) - 1, 0), 4))))
+    INGEST_FORMAT_POOL_MIN_ROWS = int(os.getenv("INGEST_FORMAT_POOL_MIN_ROWS", "2000"))
+    # true হলে point এ শুধু value list থাকবে; data dict আর text_content search এর সময় local metadata.db এর
+    # source registry থেকে বানানো হবে। তাই শুধু তখনই চালু করবেন যখন সব reader একই metadata.db পায়
+    # (remote QDRANT_URL বা অন্য host থেকে পড়লে না)
+    PAYLOAD_COMPACT = os.getenv("PAYLOAD_COMPACT", "false").lower() == "true"
+
+    # Incremental sync settings
+    METADATA_DB_PATH = os.getenv("METADATA_DB_PATH", "./metadata.db")
+    INCREMENTAL_DATE_COLUMNS = [
+        col.strip().lower().replace("_", "")
+        for col in os.getenv(
+            "INCREMENTAL_DATE_COLUMNS",
+            "ModifiedDate,ModifiedAt,ModifiedOn,UpdatedDate,UpdatedAt,UpdatedOn,LastModified,LastUpdated"
+        ).split(",")
+        if col.strip()
+    ]
+    # Modified-date column এ incremental sync watermark এর এতক্ষণ আগে থেকে পড়বে, যাতে দেরিতে commit হওয়া
+    # (লম্বা transaction, clock skew) row বাদ না পড়ে; আবার পড়া row fingerprint মিলে গেলে embed হয় না
+    SYNC_WATERMARK_LAG_SECONDS = float(os.getenv("SYNC_WATERMARK_LAG_SECONDS", "300"))
+
+    # Background training job settings
+    TRAINING_MAX_CONCURRENT_JOBS = int(os.getenv("TRAINING_MAX_CONCURRENT_JOBS", "2"))
+    TRAINING_JOB_HISTORY = int(os.getenv("TRAINING_JOB_HISTORY", "100"))
+
+    # Embedding cache settings
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db")
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))
+
+    # Hybrid (keyword + vector) search settings
+    KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", "./keyword_index.db")
+    # এর বেশি document এ থাকা term score হবে না; তবে KEYWORD_ALWAYS_SCORE_DF পর্যন্ত df এর term সবসময় হবে
+    KEYWORD_MAX_DF_RATIO = float(os.getenv("KEYWORD_MAX_DF_RATIO", "0.05"))
+    KEYWORD_ALWAYS_SCORE_DF = int(os.getenv("KEYWORD_ALWAYS_SCORE_DF", "100"))
+    KEYWORD_ONLY_MAX_TERMS = int(os.getenv("KEYWORD_ONLY_MAX_TERMS", "3"))
+    KEYWORD_CONFIDENT_RATIO = float(os.getenv("KEYWORD_CONFIDENT_RATIO", "1.5"))
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "5"))
+
+    # Prompt context settings: বড় candidate set থেকে MMR দিয়ে বাছা row, token budget এর মধ্যে
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+    CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "20"))
+    CONTEXT_MAX_ROWS = int(os.getenv("CONTEXT_MAX_ROWS", os.getenv("SEARCH_LIMIT", "5")))
+    CONTEXT_MAX_ROW_TOKENS = int(os.getenv("CONTEXT_MAX_ROW_TOKENS", "300"))
+    CONTEXT_MAX_VALUE_CHARS = int(os.getenv("CONTEXT_MAX_VALUE_CHARS", "200"))
+    # 1 হলে শুধু relevance, 0 এর দিকে গেলে diversity বেশি
+    CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.9"))
+
+    # Batch chat settings: এক request এ সর্বোচ্চ কয়টা প্রশ্ন, আর একসাথে কয়টা chat completion চলবে
+    CHAT_BATCH_MAX_QUESTIONS = int(os.getenv("CHAT_BATCH_MAX_QUESTIONS", "100"))
+    CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+
+    # Answer cache settings
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.97"))
+
+    # Metrics/trace settings: /metrics Prometheus format এ; request এ X-Trace header দিলে stage breakdown ফেরত আসবে
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    TRACE_HEADER = os.getenv("TRACE_HEADER", "X-Trace")
+
+    # Startup settings: service গুলো lazy; warm-up background এ চলে, শেষ হলে /health/ready 200 দিবে
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    # দিলে warm-up এ এই query দিয়ে একবার পুরো retrieval চলবে (embedding client connection ও গরম হবে)
+    WARMUP_QUERY = os.getenv("WARMUP_QUERY", "")
+    WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+    # এতবার fail করলে (যেমন ভুল config) আর চেষ্টা করবে না, /health/ready failed দেখাবে; 0 হলে সীমা নেই
+    WARMUP_MAX_ATTEMPTS = int(os.getenv("WARMUP_MAX_ATTEMPTS", "10"))
+
+settings = Settings()
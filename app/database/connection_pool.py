@@ -0,0 +1,153 @@
+import threading
+import time
+
+
+class PooledConnection:
+    """Pool থেকে নেয়া connection; close() করলে আসলে বন্ধ না হয়ে pool এ ফেরত যাবে"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe, bounded DB-API connection pool।
+    factory যেকোনো DB-API connect function হতে পারে (pyodbc, বা test এর জন্য sqlite3)।"""
+
+    def __init__(self, factory, max_size=5, max_idle_seconds=300, health_check_seconds=30,
+                 acquire_timeout=30, health_check_query="SELECT 1"):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_seconds = health_check_seconds
+        self.acquire_timeout = acquire_timeout
+        self.health_check_query = health_check_query
+
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            conn = None
+            idle_for = 0.0
+            create = False
+
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                while self._idle:
+                    candidate, last_used = self._idle.pop()
+                    idle_for = time.monotonic() - last_used
+                    # অনেকক্ষণ idle থাকা connection recycle করবো
+                    if idle_for > self.max_idle_seconds:
+                        self._size -= 1
+                        self._close_quietly(candidate)
+                        continue
+                    conn = candidate
+                    break
+
+                if conn is None:
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("Timed out waiting for a database connection")
+                        self._cond.wait(remaining)
+                        continue
+
+            if create:
+                try:
+                    conn = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                return PooledConnection(self, conn)
+
+            # কিছুক্ষণ idle থাকলে ব্যবহার করার আগে একবার check করে নিব
+            if idle_for > self.health_check_seconds and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            return PooledConnection(self, conn)
+
+    def release(self, conn):
+        # খোলা transaction যেন পরের ব্যবহারকারীর কাছে না যায়
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._size -= 1
+                self._close_quietly(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle)
+            }
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from app.config import settings
+
+
+class MetadataStore:
+    """Training এর local metadata (যেমন incremental sync watermark, source registry) SQLite এ রাখবে"""
+    _conn = None
+    _lock = threading.Lock()
+    # source_id -> source; search এর সময় প্রতি result এ SQLite এ যেতে হবে না
+    _sources = {}
+
+    @classmethod
+    def get_connection(cls):
+        if cls._conn is None:
+            cls._conn = sqlite3.connect(settings.METADATA_DB_PATH, check_same_thread=False)
+            cls._conn.execute(
+                """CREATE TABLE IF NOT EXISTS sync_state (
+                    source_key TEXT PRIMARY KEY,
+                    column_name TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    watermark TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            cls._conn.execute(
+                """CREATE TABLE IF NOT EXISTS collection_state (
+                    collection_name TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            cls._conn.execute(
+                """CREATE TABLE IF NOT EXISTS collection_embedding (
+                    collection_name TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            cls._conn.execute(
+                """CREATE TABLE IF NOT EXISTS sources (
+                    source_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_key TEXT NOT NULL,
+                    definition_hash TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    columns TEXT NOT NULL,
+                    sql_query TEXT,
+                    ingested_at REAL NOT NULL,
+                    UNIQUE (source_key, definition_hash)
+                )"""
+            )
+            cls._conn.commit()
+        return cls._conn
+
+    def __init__(self):
+        self.conn = self.get_connection()
+
+    def get_sync_state(self, source_key):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT column_name, kind, watermark FROM sync_state WHERE source_key = ?",
+                (source_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"column": row[0], "kind": row[1], "watermark": row[2]}
+
+    def save_sync_state(self, source_key, column, kind, watermark):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (source_key, column_name, kind, watermark, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (source_key, column, kind, watermark, time.time())
+            )
+            self.conn.commit()
+
+    def clear_sync_state(self, source_key):
+        with self._lock:
+            self.conn.execute("DELETE FROM sync_state WHERE source_key = ?", (source_key,))
+            self.conn.commit()
+
+    def get_generation(self, collection_name):
+        """Collection এ data যতবার change হয়েছে তার counter; cache invalidation এর জন্য"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT generation FROM collection_state WHERE collection_name = ?",
+                (collection_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self, collection_name):
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO collection_state (collection_name, generation, updated_at) VALUES (?, 1, ?)
+                ON CONFLICT(collection_name) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at""",
+                (collection_name, time.time())
+            )
+            self.conn.commit()
+
+    def get_collection_embedding(self, collection_name):
+        """Collection কোন embedding provider আর dimension দিয়ে বানানো"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT provider, dimension FROM collection_embedding WHERE collection_name = ?",
+                (collection_name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"provider": row[0], "dimension": row[1]}
+
+    def save_collection_embedding(self, collection_name, provider, dimension):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO collection_embedding (collection_name, provider, dimension, updated_at) VALUES (?, ?, ?, ?)",
+                (collection_name, provider, dimension, time.time())
+            )
+            self.conn.commit()
+
+    def clear_collection_embedding(self, collection_name):
+        with self._lock:
+            self.conn.execute("DELETE FROM collection_embedding WHERE collection_name = ?", (collection_name,))
+            self.conn.commit()
+
+    def register_source(self, source_key, name, columns, sql_query=None):
+        """Source এর columns/query একবার registry তে রাখবে আর source_id return করবে।
+        Columns বা query বদলালে নতুন source_id হবে, যাতে পুরানো point গুলো ঠিকমতো পড়া যায়।"""
+        columns = list(columns)
+        definition_hash = hashlib.sha256(
+            json.dumps([columns, sql_query], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO sources (source_key, definition_hash, name, columns, sql_query, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_key, definition_hash) DO UPDATE SET ingested_at = excluded.ingested_at""",
+                (source_key, definition_hash, name, json.dumps(columns, ensure_ascii=False), sql_query, time.time())
+            )
+            self.conn.commit()
+            row = self.conn.execute(
+                "SELECT source_id FROM sources WHERE source_key = ? AND definition_hash = ?",
+                (source_key, definition_hash)
+            ).fetchone()
+        return row[0]
+
+    def get_source(self, source_id):
+        if source_id is None:
+            return None
+        source = self._sources.get(source_id)
+        if source is None:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT source_key, name, columns, sql_query, ingested_at FROM sources WHERE source_id = ?",
+                    (source_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            source = {
+                "source_id": source_id,
+                "source_key": row[0],
+                "name": row[1],
+                "columns": json.loads(row[2]),
+                "sql_query": row[3],
+                "ingested_at": row[4]
+            }
+            self._sources[source_id] = source
+        return source
+
+    def list_sources(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT source_id FROM sources ORDER BY source_id").fetchall()
+        return [self.get_source(row[0]) for row in rows]
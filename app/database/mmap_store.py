@@ -0,0 +1,479 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ID_DTYPE = "S36"
+MANIFEST = "manifest.json"
+# Batch search এ একবারে (segment rows x queries) score matrix এর সর্বোচ্চ আকার
+BATCH_SCORE_BYTES = 64 * 1024 * 1024
+# Size-tiered compaction: একই tier এর এতগুলো segment জমলে একটায় merge হবে
+MERGE_FACTOR = 4
+# এর চেয়ে ছোট segment সব tier 0 তে; ছোট batch আর tombstone segment আলাদা tier বানাবে না
+MERGE_FLOOR_ROWS = 1000
+
+
+class StoredPoint:
+    """Qdrant এর Record/ScoredPoint এর মতো: id, payload, vector, score"""
+
+    def __init__(self, id, payload=None, vector=None, score=None):
+        self.id = id
+        self.payload = payload
+        self.vector = vector
+        self.score = score
+
+
+class _FileLock:
+    """একাধিক process (uvicorn worker) যেন একসাথে manifest না লিখে"""
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        self.handle = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        self.handle.close()
+
+
+class _Segment:
+    """Disk এর একটা immutable segment। সব array read-only mmap, তাই সব worker একই page cache share করে।
+    Segment এর row id আর deleted id গুলো এর আগের (পুরানো) segment এর একই id কে বাতিল করে।"""
+
+    def __init__(self, directory, meta):
+        self.name = meta["name"]
+        self.count = meta["count"]
+        self.sources = meta["sources"]
+        base = os.path.join(directory, self.name)
+
+        if self.count:
+            self.vectors = np.load(base + ".vectors.npy", mmap_mode="r")
+            self.ids = np.load(base + ".ids.npy", mmap_mode="r")
+            self.sorted_ids = np.load(base + ".sorted_ids.npy", mmap_mode="r")
+            self.order = np.load(base + ".order.npy", mmap_mode="r")
+            self.source_codes = np.load(base + ".sources.npy", mmap_mode="r")
+            self.offsets = np.load(base + ".offsets.npy", mmap_mode="r")
+            self.payload_bytes = np.memmap(base + ".payloads.jsonl", dtype=np.uint8, mode="r")
+        else:
+            self.ids = np.empty(0, dtype=ID_DTYPE)
+        self.deleted = (
+            np.load(base + ".deleted.npy", mmap_mode="r") if meta["deleted"] else np.empty(0, dtype=ID_DTYPE)
+        )
+
+    def find(self, ids):
+        """দেয়া id গুলোর মধ্যে যেগুলো এই segment এ আছে তাদের row number"""
+        if not self.count or not len(ids):
+            return np.empty(0, dtype=np.int64)
+        positions = np.searchsorted(self.sorted_ids, ids)
+        positions = np.minimum(positions, self.count - 1)
+        found = self.sorted_ids[positions] == ids
+        return np.asarray(self.order[positions[found]], dtype=np.int64)
+
+    def point_id(self, row):
+        return self.ids[row].decode("ascii")
+
+    def payload(self, row):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self.payload_bytes[start:end].tobytes().decode("utf-8"))
+
+    def source_mask(self, source):
+        codes = [code for code, (_, value) in enumerate(self.sources) if value == source]
+        if not codes:
+            return None
+        return np.isin(self.source_codes, codes)
+
+
+class _Snapshot:
+    """একটা manifest version এর segment আর প্রতি segment এর alive mask; search চলাকালীন বদলায় না"""
+
+    def __init__(self, version, dim, segments, alive):
+        self.version = version
+        self.dim = dim
+        self.segments = segments
+        self.alive = alive
+
+
+class MmapVectorStore:
+    """Memory-mapped float32 matrix + payload sidecar এর segment ভিত্তিক vector store।
+    Writer প্রতিবার নতুন segment লিখে manifest atomically replace করে; reader (যেকোনো process)
+    manifest বদলালে নতুন segment গুলো mmap করে নেয়। Search হলো normalize করা vector এর উপর numpy dot product।"""
+
+    def __init__(self, directory, max_segments=16):
+        self.directory = directory
+        self.max_segments = max_segments
+        self.manifest_path = os.path.join(directory, MANIFEST)
+        self._snapshot = None
+        self._manifest_stat = None
+        self._lock = threading.Lock()
+
+    # ---------- manifest ----------
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def _read_manifest(self):
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        manifest["version"] += 1
+        tmp_path = f"{self.manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # Reader রা হয় পুরানো না হয় নতুন manifest দেখবে, অর্ধেক লেখা কখনো না
+        os.replace(tmp_path, self.manifest_path)
+
+    def create(self, dim):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._file_lock():
+            if not self.exists():
+                self._write_manifest({"version": 0, "dim": dim, "segments": []})
+
+    def drop(self):
+        with self._lock:
+            self._snapshot = None
+            self._manifest_stat = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _file_lock(self):
+        return _FileLock(os.path.join(self.directory, ".write.lock"))
+
+    # ---------- reader ----------
+
+    def snapshot(self):
+        """Manifest বদলালে নতুন snapshot load করবে; না বদলালে শুধু একটা stat call"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            raise ValueError(f"Vector store {self.directory} not found")
+
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            if self._snapshot is None or key != self._manifest_stat:
+                for attempt in range(3):
+                    manifest = self._read_manifest()
+                    if self._snapshot is not None and manifest["version"] == self._snapshot.version:
+                        break
+                    try:
+                        self._snapshot = self._load(manifest, self._snapshot)
+                        break
+                    except FileNotFoundError:
+                        # পড়ার মাঝেই writer merge করে পুরানো segment মুছে ফেলেছে, নতুন manifest আবার পড়বো
+                        if attempt == 2:
+                            raise
+                self._manifest_stat = key
+            return self._snapshot
+
+    def _load(self, manifest, previous=None):
+        names = [meta["name"] for meta in manifest["segments"]]
+        segments, alive = [], []
+        # শুধু নতুন segment যোগ হলে আগের mmap আর mask রেখে দিব
+        if previous is not None and [seg.name for seg in previous.segments] == names[:len(previous.segments)]:
+            segments, alive = list(previous.segments), list(previous.alive)
+
+        for meta in manifest["segments"][len(segments):]:
+            segment = _Segment(self.directory, meta)
+            kills = np.concatenate([np.asarray(segment.ids), np.asarray(segment.deleted)])
+            for i, older in enumerate(segments):
+                rows = older.find(kills)
+                if len(rows) and alive[i][rows].any():
+                    # পুরানো snapshot যারা ব্যবহার করছে তাদের mask বদলাবো না
+                    alive[i] = alive[i].copy()
+                    alive[i][rows] = False
+            segments.append(segment)
+            alive.append(np.ones(segment.count, dtype=bool))
+
+        return _Snapshot(manifest["version"], manifest["dim"], segments, alive)
+
+    def count(self):
+        return int(sum(mask.sum() for mask in self.snapshot().alive))
+
+    def preload(self):
+        """Snapshot load করে segment গুলোর vector আর source page একবার পড়বে, যাতে প্রথম search
+        disk read এ আটকে না যায়। Alive point count return করবে"""
+        snapshot = self.snapshot()
+        for segment in snapshot.segments:
+            if segment.count:
+                segment.vectors.sum()
+                segment.source_codes.sum()
+        return int(sum(mask.sum() for mask in snapshot.alive))
+
+    def dim(self):
+        return self.snapshot().dim
+
+    def search(self, vector, limit=5, source=None):
+        return self.search_batch([vector], limit=limit, sources=[source])[0]
+
+    def search_batch(self, vectors, limit=5, sources=None):
+        """অনেক query একসাথে: প্রতিটা segment একবার পড়ে সব query এর score এক matrix multiply তে।
+        sources দিলে query প্রতি একটা source (বা None)। Query এর order এ result list return করবে"""
+        if not len(vectors):
+            return []
+        snapshot = self.snapshot()
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        sources = list(sources) if sources is not None else [None] * len(queries)
+
+        candidates = [[] for _ in range(len(queries))]
+        for segment, alive in zip(snapshot.segments, snapshot.alive):
+            if not segment.count:
+                continue
+            masks = {}
+            for source in set(sources):
+                mask = alive
+                if source:
+                    source_mask = segment.source_mask(source)
+                    mask = None if source_mask is None else mask & source_mask
+                masks[source] = mask if mask is not None and mask.any() else None
+            if not any(mask is not None for mask in masks.values()):
+                continue
+
+            k = min(limit, segment.count)
+            # বড় segment এ score matrix যেন BATCH_SCORE_BYTES ছাড়িয়ে না যায়
+            step = max(1, BATCH_SCORE_BYTES // (segment.count * 4))
+            for start in range(0, len(queries), step):
+                # mmap করা matrix এর উপর সরাসরি BLAS, copy ছাড়াই
+                block = segment.vectors @ queries[start:start + step].T
+                for column in range(block.shape[1]):
+                    i = start + column
+                    mask = masks[sources[i]]
+                    if mask is None:
+                        continue
+                    scores = np.where(mask, block[:, column], -np.inf)
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    candidates[i].extend(
+                        (float(scores[row]), segment, int(row)) for row in top if np.isfinite(scores[row])
+                    )
+
+        results = []
+        for query_candidates in candidates:
+            query_candidates.sort(key=lambda item: -item[0])
+            results.append([
+                StoredPoint(segment.point_id(row), segment.payload(row), score=score)
+                for score, segment, row in query_candidates[:limit]
+            ])
+        return results
+
+    def retrieve(self, point_ids, with_vectors=False):
+        snapshot = self.snapshot()
+        wanted = np.asarray([str(point_id) for point_id in point_ids], dtype=ID_DTYPE)
+        found = {}
+        for segment, alive in zip(snapshot.segments, snapshot.alive):
+            for row in segment.find(wanted):
+                if alive[row]:
+                    found[segment.point_id(row)] = StoredPoint(
+                        segment.point_id(row),
+                        segment.payload(row),
+                        vector=segment.vectors[row].tolist() if with_vectors else None
+                    )
+        return [found[str(point_id)] for point_id in point_ids if str(point_id) in found]
+
+    def scroll(self, limit=1000, offset=None, source_field=None, source_value=None, with_vectors=False):
+        """(points, next_offset) return করবে, Qdrant scroll এর মতো; offset হলো "segment:row" """
+        snapshot = self.snapshot()
+        start_segment, start_row = None, 0
+        if offset:
+            start_segment, start_row = offset.rsplit(":", 1)
+            start_row = int(start_row)
+
+        points = []
+        started = start_segment is None
+        for segment, alive in zip(snapshot.segments, snapshot.alive):
+            if not started:
+                if segment.name != start_segment:
+                    continue
+                started = True
+                rows_from = start_row
+            else:
+                rows_from = 0
+            if not segment.count:
+                continue
+
+            mask = alive
+            if source_field:
+                codes = [
+                    code for code, (field, value) in enumerate(segment.sources)
+                    if field == source_field and value == source_value
+                ]
+                if not codes:
+                    continue
+                mask = mask & np.isin(segment.source_codes, codes)
+
+            for row in np.flatnonzero(mask[rows_from:]) + rows_from:
+                if len(points) == limit:
+                    return points, f"{segment.name}:{row}"
+                points.append(StoredPoint(
+                    segment.point_id(row),
+                    segment.payload(row),
+                    vector=segment.vectors[row].tolist() if with_vectors else None
+                ))
+        if not started:
+            raise ValueError("Scroll offset refers to a segment that was compacted, restart the scroll")
+        return points, None
+
+    # ---------- writer ----------
+
+    def upsert(self, points):
+        # একই batch এ একই id থাকলে শেষেরটা থাকবে
+        latest = {}
+        for point in points:
+            latest[str(point.id)] = point
+        if not latest:
+            return
+
+        with self._write() as manifest:
+            dim = manifest["dim"]
+            rows = []
+            for point_id, point in latest.items():
+                vector = np.asarray(point.vector, dtype=np.float32)
+                if vector.shape != (dim,):
+                    raise ValueError(f"Vector dimension {vector.shape[-1]} does not match store dimension {dim}")
+                rows.append((point_id, vector / (np.linalg.norm(vector) or 1.0), point.payload or {}))
+            manifest["segments"].append(self._write_segment(len(rows), dim, rows, []))
+
+    def delete(self, point_ids):
+        point_ids = [str(point_id) for point_id in point_ids]
+        if not point_ids:
+            return
+        with self._write() as manifest:
+            manifest["segments"].append(self._write_segment(0, manifest["dim"], [], point_ids))
+
+    @contextmanager
+    def _write(self):
+        """File lock নিয়ে সর্বশেষ manifest দিবে; block শেষে দরকার হলে compact করে নতুন manifest publish করবে"""
+        with self._file_lock():
+            manifest = self._read_manifest()
+            yield manifest
+            compacted = self._compact(manifest)
+            self._write_manifest(manifest)
+            if compacted:
+                self._remove_unreferenced(manifest)
+
+    def _write_segment(self, count, dim, rows, deleted):
+        """rows: (point_id, normalized vector, payload) এর iterable; vector streaming এ disk এ লিখবে"""
+        name = uuid.uuid4().hex
+        base = os.path.join(self.directory, name)
+        sources, source_codes = [], {}
+
+        if count:
+            vectors = np.lib.format.open_memmap(base + ".vectors.npy", mode="w+", dtype=np.float32, shape=(count, dim))
+            ids = np.empty(count, dtype=ID_DTYPE)
+            codes = np.empty(count, dtype=np.int32)
+            offsets = np.empty(count + 1, dtype=np.int64)
+            offsets[0] = 0
+
+            with open(base + ".payloads.jsonl", "wb") as payload_file:
+                for row, (point_id, vector, payload) in enumerate(rows):
+                    vectors[row] = vector
+                    ids[row] = point_id
+                    field = "table_name" if "table_name" in payload else "source_name"
+                    source = (field, payload.get(field))
+                    if source not in source_codes:
+                        source_codes[source] = len(sources)
+                        sources.append(list(source))
+                    codes[row] = source_codes[source]
+
+                    encoded = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                    payload_file.write(encoded + b"\n")
+                    offsets[row + 1] = offsets[row] + len(encoded) + 1
+
+            vectors.flush()
+            del vectors
+            order = np.argsort(ids, kind="stable")
+            np.save(base + ".ids.npy", ids)
+            np.save(base + ".sorted_ids.npy", ids[order])
+            np.save(base + ".order.npy", order)
+            np.save(base + ".sources.npy", codes)
+            np.save(base + ".offsets.npy", offsets)
+
+        if len(deleted):
+            np.save(base + ".deleted.npy", np.sort(np.asarray(deleted, dtype=ID_DTYPE)))
+
+        return {
+            "name": name, "count": count, "sources": sources, "deleted": bool(len(deleted)),
+            "deleted_count": len(deleted)
+        }
+
+    @staticmethod
+    def _tier(meta):
+        """MERGE_FLOOR_ROWS থেকে প্রতি MERGE_FACTOR গুণে এক tier"""
+        size = max(meta["count"] + meta.get("deleted_count", 0), MERGE_FLOOR_ROWS)
+        tier = 0
+        while size >= MERGE_FLOOR_ROWS * MERGE_FACTOR ** (tier + 1):
+            tier += 1
+        return tier
+
+    def _merge_range(self, manifest):
+        """কোন segment গুলো merge হবে: শেষের MERGE_FACTOR টা একই tier এ হলে সেগুলো (tier গুলো জ্যামিতিক হারে বাড়ে,
+        তাই একটা row মোট log(rows) বারের মত rewrite হয়)। তারপরও max_segments ছাড়ালে সবচেয়ে ছোট পাশাপাশি দুইটা"""
+        segments = manifest["segments"]
+        if len(segments) >= MERGE_FACTOR and len({self._tier(meta) for meta in segments[-MERGE_FACTOR:]}) == 1:
+            return len(segments) - MERGE_FACTOR, len(segments)
+        if len(segments) > self.max_segments:
+            sizes = [meta["count"] + meta.get("deleted_count", 0) for meta in segments]
+            i = min(range(len(sizes) - 1), key=lambda index: sizes[index] + sizes[index + 1])
+            return i, i + 2
+        return None
+
+    def _compact(self, manifest):
+        """Size-tiered compaction। শুধু পাশাপাশি segment merge হয়, যাতে নতুন id পুরানো id কে বাতিল করার order ঠিক থাকে"""
+        compacted = False
+        while True:
+            merge = self._merge_range(manifest)
+            if merge is None:
+                return compacted
+            compacted = True
+            start, end = merge
+            snapshot = self._load(manifest)
+            group = list(zip(snapshot.segments[start:end], snapshot.alive[start:end]))
+
+            # Deleted id গুলো আরও পুরানো segment এর জন্য লাগবে; প্রথম segment থেকে merge হলে লাগবে না
+            deleted = []
+            if start > 0:
+                deleted = np.unique(np.concatenate([np.asarray(segment.deleted) for segment, _ in group]))
+
+            # নতুন segment এর একই id আগের গুলোর mask এ বাদ পড়েছে, তাই live row গুলোর id unique
+            live = [(segment, np.flatnonzero(alive)) for segment, alive in group]
+            count = sum(len(rows) for _, rows in live)
+            rows = (
+                (segment.point_id(row), segment.vectors[row], segment.payload(row))
+                for segment, segment_rows in live for row in segment_rows
+            )
+            merged = self._write_segment(count, snapshot.dim, rows, deleted)
+            manifest["segments"][start:end] = [merged] if count or len(deleted) else []
+
+    def _remove_unreferenced(self, manifest):
+        """Manifest এ নেই এমন segment file মুছবে। Windows এ অন্য worker mmap করে রাখলে মুছবে না, পরে আবার চেষ্টা হবে"""
+        referenced = {meta["name"] for meta in manifest["segments"]}
+        for filename in os.listdir(self.directory):
+            if filename.startswith(".") or filename.startswith(MANIFEST):
+                continue
+            if filename.split(".", 1)[0] not in referenced:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
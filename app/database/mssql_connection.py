@@ -1,14 +1,75 @@
+import threading
+import time
 import pyodbc
+from app import metrics
 from app.config import settings
+from app.database.connection_pool import ConnectionPool
 
 class MSSQLConnection:
-    def __init__(self):
+    _pool = None
+    _pool_lock = threading.Lock()
+    _shared_metadata_cache = {}
+    _shared_metadata_lock = threading.Lock()
+    
+    @classmethod
+    def get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = cls.create_pool(lambda: pyodbc.connect(settings.DB_CONNECTION_STRING))
+        return cls._pool
+    
+    @staticmethod
+    def create_pool(factory):
+        return ConnectionPool(
+            factory,
+            max_size=settings.MSSQL_POOL_SIZE,
+            max_idle_seconds=settings.MSSQL_POOL_MAX_IDLE_SECONDS,
+            health_check_seconds=settings.MSSQL_POOL_HEALTH_CHECK_SECONDS,
+            acquire_timeout=settings.MSSQL_POOL_TIMEOUT
+        )
+    
+    def __init__(self, connection_factory=None):
+        """connection_factory দিলে (যেমন test এ sqlite3) সেটার নিজস্ব pool ব্যবহার হবে"""
         self.connection_string = settings.DB_CONNECTION_STRING
+        if connection_factory:
+            self.pool = self.create_pool(connection_factory)
+            self._metadata_cache = {}
+            self._metadata_lock = threading.Lock()
+        else:
+            # Shared pool এর সাথে metadata cache ও সব instance এ এক
+            self.pool = self.get_pool()
+            self._metadata_cache = self._shared_metadata_cache
+            self._metadata_lock = self._shared_metadata_lock
     
     def get_connection(self):
-        return pyodbc.connect(self.connection_string)
+        """Pool থেকে connection দিবে; close() করলে pool এ ফেরত যাবে"""
+        with metrics.timed("mssql", "acquire"):
+            return self.pool.acquire()
+    
+    def _cached_metadata(self, key, loader):
+        """Table/column metadata TTL পর্যন্ত cache এ রাখবে"""
+        now = time.monotonic()
+        with self._metadata_lock:
+            cached = self._metadata_cache.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        
+        value = loader()
+        with self._metadata_lock:
+            self._metadata_cache[key] = (now + settings.SCHEMA_CACHE_TTL_SECONDS, value)
+        return value
+    
+    def refresh_metadata(self):
+        with self._metadata_lock:
+            self._metadata_cache.clear()
     
     def get_tables(self):
+        return list(self._cached_metadata(("tables",), self._load_tables))
+    
+    def get_columns(self, table_name):
+        return list(self._cached_metadata(("columns", table_name.lower()), lambda: self._load_columns(table_name)))
+    
+    def _load_tables(self):
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
@@ -18,7 +79,7 @@ class MSSQLConnection:
         finally:
             conn.close()
     
-    def get_columns(self, table_name):
+    def _load_columns(self, table_name):
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
@@ -32,22 +93,144 @@ class MSSQLConnection:
         finally:
             conn.close()
     
-    def get_table_data(self, table_name):
+    def table_exists(self, table_name):
+        # Cache এ পেলে DB তে যাবো না; না পেলে নতুন table হতে পারে, তাই সরাসরি check করবো
+        if table_name.lower() in (table.lower() for table in self.get_tables()):
+            return True
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            # Table name validation করা (SQL injection থেকে বাঁচতে)
             cursor.execute(
                 "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = ? AND TABLE_TYPE = 'BASE TABLE'",
                 (table_name,)
             )
-            if not cursor.fetchone():
-                raise ValueError(f"Table {table_name} does not exist")
-            
-            cursor.execute(f"SELECT * FROM [{table_name}]")
+            return cursor.fetchone() is not None
+        finally:
+            conn.close()
+    
+    def get_primary_key_columns(self, table_name):
+        return list(self._cached_metadata(
+            ("primary_key", table_name.lower()),
+            lambda: self._load_primary_key_columns(table_name)
+        ))
+    
+    def _load_primary_key_columns(self, table_name):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """SELECT kcu.COLUMN_NAME
+                FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+                JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+                    ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME AND tc.TABLE_NAME = kcu.TABLE_NAME
+                WHERE tc.TABLE_NAME = ? AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+                ORDER BY kcu.ORDINAL_POSITION""",
+                (table_name,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    
+    def get_change_tracking_column(self, table_name):
+        """rowversion অথবা modified-date column থাকলে (column, kind) return করবে, না থাকলে None"""
+        columns = self.get_columns(table_name)
+        
+        for col, data_type in columns:
+            if data_type.lower() in ("timestamp", "rowversion"):
+                return col, "rowversion"
+        
+        for col, data_type in columns:
+            normalized = col.lower().replace("_", "")
+            if normalized in settings.INCREMENTAL_DATE_COLUMNS and "date" in data_type.lower():
+                return col, "datetime"
+        
+        return None
+    
+    def estimate_row_count(self, table_name):
+        """Progress/ETA এর জন্য table এর আনুমানিক row count (COUNT(*) না চালিয়ে metadata থেকে)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT SUM(p.rows) FROM sys.partitions p WHERE p.object_id = OBJECT_ID(?) AND p.index_id IN (0, 1)",
+                (table_name,)
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] is not None else None
+        finally:
+            conn.close()
+    
+    def get_max_value(self, table_name, column):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            with metrics.timed("mssql", "execute"):
+                cursor.execute(f"SELECT MAX([{column}]) FROM [{table_name}]")
+                return cursor.fetchone()[0]
+        finally:
+            conn.close()
+    
+    def get_min_active_rowversion(self):
+        """এর নিচের সব rowversion commit হয়ে গেছে। MAX() নিলে চলমান transaction এর row পরে ছোট value নিয়ে
+        commit হয়ে watermark এর নিচে পড়ে যেতে পারে, তাই rowversion tracking এ এটাই upper bound"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            with metrics.timed("mssql", "execute"):
+                cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()")
+                return cursor.fetchone()[0]
+        finally:
+            conn.close()
+    
+    def iter_query(self, sql_query, params=(), fetch_size=None):
+        """Query result পুরোটা memory তে না এনে fetchmany দিয়ে (columns, column_types, rows) chunk yield করবে"""
+        fetch_size = fetch_size or settings.INGEST_FETCH_SIZE
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            with metrics.timed("mssql", "execute"):
+                cursor.execute(sql_query, params)
             columns = [desc[0] for desc in cursor.description]
             column_types = [desc[1] for desc in cursor.description]
-            rows = cursor.fetchall()
-            return columns, column_types, rows
+            
+            while True:
+                # yield এর বাইরে মাপবো, নাহলে consumer এর কাজের সময়ও fetch এ যোগ হবে
+                with metrics.timed("mssql", "fetch"):
+                    rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                metrics.count("mssql", "fetch", "rows", len(rows))
+                yield columns, column_types, rows
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+    
+    def iter_table_data(self, table_name, fetch_size=None, changed_column=None, changed_range=None,
+                        include_null_changes=False, changed_kind="datetime"):
+        """পুরো table stream করবে; changed_range দিলে শুধু (low, high] এর মধ্যে change হওয়া row আনবে।
+        rowversion এ range [low, high), কারণ high হলো MIN_ACTIVE_ROWVERSION (যেটা এখনো commit হয়নি)"""
+        # Table name validation করা (SQL injection থেকে বাঁচতে)
+        if not self.table_exists(table_name):
+            raise ValueError(f"Table {table_name} does not exist")
+        
+        if changed_column and changed_range:
+            low, high = changed_range
+            if changed_kind == "rowversion":
+                condition = f"([{changed_column}] >= ? AND [{changed_column}] < ?)"
+            else:
+                condition = f"([{changed_column}] > ? AND [{changed_column}] <= ?)"
+            # Modified date null থাকলে সেই row কখন change হয়েছে বোঝা যায় না, তাই প্রতিবার পড়বো
+            if include_null_changes:
+                condition += f" OR [{changed_column}] IS NULL"
+            return self.iter_query(
+                f"SELECT * FROM [{table_name}] WHERE {condition}",
+                (low, high),
+                fetch_size=fetch_size
+            )
+        
+        return self.iter_query(f"SELECT * FROM [{table_name}]", fetch_size=fetch_size)
+    
+    def iter_table_keys(self, table_name, key_columns, fetch_size=None):
+        """Delete হওয়া row খোঁজার জন্য শুধু primary key column গুলো stream করবে"""
+        key_list = ", ".join(f"[{col}]" for col in key_columns)
+        return self.iter_query(f"SELECT {key_list} FROM [{table_name}]", fetch_size=fetch_size)
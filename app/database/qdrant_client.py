@@ -1,60 +1,369 @@
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import (
+    Distance, VectorParams, VectorParamsDiff, PointStruct, Filter, FieldCondition, MatchValue, PointIdsList,
+    PayloadSchemaType, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams,
+    QuantizationSearchParams, Disabled, QueryRequest
+)
+from app import metrics
 from app.config import settings
+from app.database.metadata_store import MetadataStore
+from app.database.mmap_store import MmapVectorStore
 import os
+import threading
+import warnings
+
+
+class EmbeddingMismatchError(Exception):
+    """Collection এক embedding provider/dimension দিয়ে বানানো, কিন্তু এখন অন্যটা দিয়ে query/ingest হচ্ছে"""
+    pass
+
 
 class QdrantService:
+    """Vector store service। VECTOR_BACKEND=qdrant হলে Qdrant (local path বা server),
+    mmap হলে MmapVectorStore, যেটা একাধিক uvicorn worker একসাথে পড়তে পারে"""
     _client = None
+    _stores = {}
+    # Local mode client একসাথে একাধিক writer thread সামলাতে পারে না (parallel training job)
+    _write_lock = threading.Lock()
+    # কোন collection আছে তা মনে রাখবো, যাতে প্রতি query তে collection list না আনতে হয়
+    _known_collections = set()
+    
+    # Source filter এর জন্য এই payload field গুলোতে index থাকবে
+    SOURCE_FIELDS = ("table_name", "source_name")
+    STORAGE_MODES = ("full", "scalar", "on_disk")
     
     @classmethod
     def get_client(cls):
         if cls._client is None:
-            # Create qdrant storage directory if not exists
-            storage_path = "./qdrant_storage"
-            os.makedirs(storage_path, exist_ok=True)
-            cls._client = QdrantClient(path=storage_path)
+            if settings.QDRANT_URL:
+                cls._client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+            else:
+                # Create qdrant storage directory if not exists
+                storage_path = "./qdrant_storage"
+                os.makedirs(storage_path, exist_ok=True)
+                cls._client = QdrantClient(path=storage_path)
         return cls._client
     
+    @classmethod
+    def get_store(cls, collection_name):
+        if collection_name not in cls._stores:
+            cls._stores[collection_name] = MmapVectorStore(
+                os.path.join(settings.MMAP_STORE_PATH, collection_name),
+                max_segments=settings.MMAP_MAX_SEGMENTS
+            )
+        return cls._stores[collection_name]
+    
     def __init__(self, table_name=None):
-        self.client = self.get_client()
         self.collection_name = settings.COLLECTION_NAME
+        self.metadata = MetadataStore()
+        self.backend = settings.VECTOR_BACKEND
+        # mmap backend এ Qdrant local storage খুলবো না, কারণ সেটা পুরো folder এ exclusive lock নেয়
+        self.client = self.get_client() if self.backend == "qdrant" else None
     
-    def create_collection(self, vector_size=1536):
+    @property
+    def store(self):
+        if self.backend != "mmap":
+            return None
+        return self.get_store(self.collection_name)
+    
+    def collection_exists(self):
+        if self.store is not None:
+            return self.store.exists()
+        if self.collection_name in self._known_collections:
+            return True
+        
+        if self.client.collection_exists(self.collection_name):
+            # আগের version এ তৈরি collection এ payload index নাও থাকতে পারে
+            self.create_payload_indexes()
+            self._known_collections.add(self.collection_name)
+            return True
+        return False
+    
+    def forget_collection(self):
+        """Collection বাইরে থেকে delete হলে cached existence বাদ দিবে"""
+        self._known_collections.discard(self.collection_name)
+    
+    def create_payload_indexes(self):
+        with warnings.catch_warnings():
+            # Local mode এ payload index এর কোনো effect নেই, শুধু warning দেয়
+            warnings.simplefilter("ignore")
+            for field in self.SOURCE_FIELDS:
+                try:
+                    self.client.create_payload_index(
+                        collection_name=self.collection_name,
+                        field_name=field,
+                        field_schema=PayloadSchemaType.KEYWORD
+                    )
+                except Exception as e:
+                    print(f"Payload index error ({field}): {e}")
+    
+    def storage_mode(self, mode=None):
+        mode = (mode or settings.VECTOR_STORAGE_MODE).lower()
+        if mode not in self.STORAGE_MODES:
+            raise ValueError(f"Unknown vector storage mode: {mode}")
+        return mode
+    
+    def quantization_config(self, mode=None):
+        """scalar mode এ int8 copy RAM এ থাকবে (প্রায় 4x কম memory), original float32 disk এ"""
+        if self.storage_mode(mode) != "scalar":
+            return None
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    
+    def search_params(self, mode=None):
+        """scalar mode এ বেশি candidate int8 দিয়ে খুঁজে original vector দিয়ে rescore করবে"""
+        # Local mode সবসময় exact search করে, search_params দিলে শুধু warning দেয়
+        if self.storage_mode(mode) != "scalar" or not settings.QDRANT_URL:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=settings.QUANTIZATION_RESCORE,
+                oversampling=settings.QUANTIZATION_OVERSAMPLING
+            )
+        )
+    
+    def create_collection(self, vector_size, mode=None):
         try:
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
-            
-            if self.collection_name not in collection_names:
+            if self.store is not None:
+                self.store.create(vector_size)
+                return
+            if not self.collection_exists():
+                mode = self.storage_mode(mode)
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+                    vectors_config=VectorParams(
+                        size=vector_size,
+                        distance=Distance.COSINE,
+                        on_disk=mode != "full"
+                    ),
+                    quantization_config=self.quantization_config(mode)
                 )
+                self.create_payload_indexes()
+                self._known_collections.add(self.collection_name)
         except Exception as e:
             print(f"Collection create error: {e}")
     
-    def upsert_points(self, points):
-        try:
-            self.client.upsert(
+    def apply_storage_mode(self, mode=None):
+        """আগে তৈরি collection কে নতুন storage mode এ নিবে (server এ background এ re-optimize হবে)"""
+        mode = self.storage_mode(mode)
+        if self.store is not None:
+            raise ValueError("Vector storage modes only apply to the qdrant backend")
+        if not self.collection_exists():
+            raise ValueError(f"Collection {self.collection_name} not found")
+        with self._write_lock:
+            self.client.update_collection(
                 collection_name=self.collection_name,
-                points=points
+                vectors_config={"": VectorParamsDiff(on_disk=mode != "full")},
+                quantization_config=self.quantization_config(mode) or Disabled.DISABLED
             )
+    
+    def delete_collection(self):
+        with self._write_lock:
+            if self.store is not None:
+                self.store.drop()
+            else:
+                self.client.delete_collection(self.collection_name)
+        self.metadata.clear_collection_embedding(self.collection_name)
+        self.forget_collection()
+    
+    def check_embedding(self, provider, dimension):
+        """Collection এর record করা provider/dimension এর সাথে না মিললে EmbeddingMismatchError।
+        Record না থাকলে (নতুন বা আগের version এর collection) vector size মিলিয়ে এখনকার provider record করবে।"""
+        recorded = self.metadata.get_collection_embedding(self.collection_name)
+        if recorded is None:
+            if not self.collection_exists():
+                return
+            vector_size = self.collection_info()["vector_size"]
+            if vector_size != dimension:
+                raise EmbeddingMismatchError(
+                    f"Collection {self.collection_name} has {vector_size}-dim vectors, "
+                    f"but embedding provider {provider} produces {dimension}"
+                )
+            self.metadata.save_collection_embedding(self.collection_name, provider, dimension)
+            return
+        
+        if recorded["provider"] != provider or recorded["dimension"] != dimension:
+            raise EmbeddingMismatchError(
+                f"Collection {self.collection_name} was built with {recorded['provider']} "
+                f"({recorded['dimension']} dims), but the current embedding provider is {provider} ({dimension} dims). "
+                f"Use a different COLLECTION_NAME or delete the collection and retrain."
+            )
+    
+    def count(self):
+        if self.store is not None:
+            return self.store.count()
+        return self.client.count(self.collection_name).count
+    
+    def warm_up(self):
+        """Collection খুলে vector গুলো memory তে আনবে; collection না থাকলে 0। Point count return করবে"""
+        if not self.collection_exists():
+            return 0
+        with metrics.timed(self.backend, "warm_up"):
+            if self.store is not None:
+                return self.store.preload()
+            # Local mode client তৈরির সময়েই সব load করে; server এ শুধু collection টা ছুঁয়ে দেখবো
+            return self.count()
+    
+    def collection_info(self):
+        if self.store is not None:
+            return {"backend": "mmap", "points_count": self.store.count(), "vector_size": self.store.dim(), "distance": "Cosine"}
+        info = self.client.get_collection(self.collection_name)
+        return {
+            "backend": "qdrant",
+            "points_count": self.count(),
+            "vector_size": info.config.params.vectors.size,
+            "distance": info.config.params.vectors.distance
+        }
+    
+    def source_filter(self, source):
+        """table_name অথবা source_name যেকোনোটা মিললেই হবে"""
+        if not source:
+            return None
+        return Filter(should=[
+            FieldCondition(key=field, match=MatchValue(value=source)) for field in self.SOURCE_FIELDS
+        ])
+    
+    def upsert_points(self, points):
+        try:
+            with self._write_lock, metrics.timed(self.backend, "upsert"):
+                if self.store is not None:
+                    self.store.upsert(points)
+                else:
+                    self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=points,
+                        wait=True
+                    )
+            metrics.count(self.backend, "upsert", "points", len(points))
+            return True
         except Exception as e:
             print(f"Upsert error: {e}")
+            return False
     
-    def search(self, query_vector, limit=5):
+    def scroll(self, limit=1000, offset=None, source_field=None, source_value=None, with_payload=True, with_vectors=False):
+        """(points, next_offset); source_field দিলে শুধু সেই source এর point"""
+        with metrics.timed(self.backend, "scroll"):
+            if self.store is not None:
+                return self.store.scroll(limit, offset, source_field, source_value, with_vectors=with_vectors)
+            return self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=(
+                    Filter(must=[FieldCondition(key=source_field, match=MatchValue(value=source_value))])
+                    if source_field else None
+                ),
+                limit=limit,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors
+            )
+    
+    def get_fingerprints(self, field, value):
+        """একটা source এর সব point এর {id: fingerprint} return করবে (vector ছাড়া)"""
+        fingerprints = {}
         try:
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
+            if not self.collection_exists():
+                return fingerprints
             
-            if self.collection_name not in collection_names:
-                raise ValueError(f"Collection {self.collection_name} not found")
-                
-            return self.client.search(
+            offset = None
+            while True:
+                points, offset = self.scroll(
+                    limit=1000,
+                    offset=offset,
+                    source_field=field,
+                    source_value=value,
+                    with_payload=["fingerprint"]
+                )
+                for point in points:
+                    fingerprints[str(point.id)] = (point.payload or {}).get("fingerprint")
+                if offset is None:
+                    break
+        except Exception as e:
+            print(f"Fingerprint scroll error: {e}")
+            raise
+        return fingerprints
+    
+    def delete_points(self, point_ids):
+        point_ids = list(point_ids)
+        metrics.count(self.backend, "delete", "points", len(point_ids))
+        if self.store is not None:
+            with self._write_lock, metrics.timed(self.backend, "delete"):
+                self.store.delete(point_ids)
+            return
+        for start in range(0, len(point_ids), 1000):
+            with self._write_lock, metrics.timed(self.backend, "delete"):
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=PointIdsList(points=point_ids[start:start + 1000]),
+                    wait=True
+                )
+    
+    def retrieve(self, point_ids):
+        """ID দিয়ে point এর payload আনবে, দেয়া ID এর order বজায় রেখে"""
+        with metrics.timed(self.backend, "retrieve"):
+            if self.store is not None:
+                return self.store.retrieve(point_ids)
+            records = self.client.retrieve(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit,
-                with_payload=True
+                ids=list(point_ids),
+                with_payload=True,
+                with_vectors=False
             )
+        by_id = {str(record.id): record for record in records}
+        return [by_id[str(point_id)] for point_id in point_ids if str(point_id) in by_id]
+    
+    def search(self, query_vector, limit=5, source=None, search_params=None):
+        """source দিলে payload index দিয়ে filter করা search হবে (search এর পরে filter নয়)।
+        search_params না দিলে storage mode অনুযায়ী হবে"""
+        try:
+            if not self.collection_exists():
+                raise ValueError(f"Collection {self.collection_name} not found")
+            
+            with metrics.timed(self.backend, "search"):
+                if self.store is not None:
+                    return self.store.search(query_vector, limit=limit, source=source)
+                return self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_vector,
+                    query_filter=self.source_filter(source),
+                    search_params=search_params or self.search_params(),
+                    limit=limit,
+                    with_payload=True
+                ).points
         except Exception as e:
             print(f"Search error: {e}")
+            self.forget_collection()
+            raise ValueError(f"Collection {self.collection_name} not found")
+    
+    def search_batch(self, query_vectors, limit=5, sources=None, search_params=None):
+        """অনেক query এক request এ (Qdrant query_batch_points, mmap এ এক matrix multiply)।
+        sources দিলে query প্রতি একটা source filter; query এর order এ result list return করবে"""
+        sources = list(sources) if sources is not None else [None] * len(query_vectors)
+        try:
+            if not self.collection_exists():
+                raise ValueError(f"Collection {self.collection_name} not found")
+            if not query_vectors:
+                return []
+            
+            with metrics.timed(self.backend, "search_batch"):
+                if self.store is not None:
+                    return self.store.search_batch(query_vectors, limit=limit, sources=sources)
+                params = search_params or self.search_params()
+                responses = self.client.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=[
+                        QueryRequest(
+                            query=query_vector,
+                            filter=self.source_filter(source),
+                            params=params,
+                            limit=limit,
+                            with_payload=True
+                        )
+                        for query_vector, source in zip(query_vectors, sources)
+                    ]
+                )
+                return [response.points for response in responses]
+        except Exception as e:
+            print(f"Batch search error: {e}")
+            self.forget_collection()
             raise ValueError(f"Collection {self.collection_name} not found")
\ No newline at end of file
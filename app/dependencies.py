@@ -0,0 +1,45 @@
+"""Route গুলোর shared service। Import এর সময় না বানিয়ে প্রথম request (বা warm-up) এ একবার বানাবে,
+তাই startup এ Qdrant store বা OpenAI client খোলা লাগে না, আর কোনোটা misconfigured হলেও app উঠে যায়।
+Route এ Depends দিয়ে আসে, তাই test এ app.dependency_overrides দিয়ে বদলানো যায়।"""
+import threading
+from app.database.mssql_connection import MSSQLConnection
+from app.database.qdrant_client import QdrantService
+from app.services.data_processor import DataProcessor
+from app.services.search_service import SearchService
+
+
+class ServiceRegistry:
+    _instances = {}
+    _locks = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name, factory):
+        instance = cls._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            lock = cls._locks.setdefault(name, threading.Lock())
+        # Service প্রতি আলাদা lock, যাতে একটা ধীর service বানানোর সময় অন্যগুলো আটকে না থাকে।
+        # Factory fail করলে কিছু রাখবো না, পরের call আবার চেষ্টা করবে
+        with lock:
+            if name not in cls._instances:
+                cls._instances[name] = factory()
+            return cls._instances[name]
+
+
+def get_search_service():
+    return ServiceRegistry.get("search_service", SearchService)
+
+
+def get_data_processor():
+    return ServiceRegistry.get("data_processor", DataProcessor)
+
+
+def get_mssql():
+    return ServiceRegistry.get("mssql", MSSQLConnection)
+
+
+def get_qdrant():
+    return ServiceRegistry.get("qdrant", QdrantService)
@@ -0,0 +1,100 @@
+"""App এর startup/shutdown: uvicorn সাথে সাথে bind করবে, warm-up background এ চলবে।
+Liveness শুধু process বেঁচে আছে কিনা, readiness warm-up শেষ হয়েছে কিনা বলে।"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from app import metrics
+from app.config import settings
+from app.dependencies import get_data_processor, get_search_service
+
+
+class Readiness:
+    """Warm-up এর অবস্থা: starting -> warming -> ready; fail করলে retrying, তারপর আবার চেষ্টা।
+    WARMUP_MAX_ATTEMPTS বার fail করলে failed, সেখানেই থাকবে"""
+
+    def __init__(self):
+        self.status = "starting"
+        self.error = None
+        self.attempts = 0
+        self.details = {}
+        self.started = time.monotonic()
+        self.ready_after = None
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def mark_ready(self, details=None):
+        self.status = "ready"
+        self.error = None
+        self.details = details or {}
+        self.ready_after = time.monotonic() - self.started
+
+    def to_dict(self):
+        state = {"status": self.status, "attempts": self.attempts, **self.details}
+        if self.ready_after is not None:
+            state["ready_after_seconds"] = round(self.ready_after, 3)
+        if self.error:
+            state["error"] = self.error
+        return state
+
+
+readiness = Readiness()
+
+
+def warm_up():
+    """Chat আর training এর service বানিয়ে vector store, keyword index আর cache খুলে রাখবে।
+    WARMUP_QUERY দিলে একবার পুরো retrieval চালাবে। Readiness এ দেখানোর মত details return করবে"""
+    with metrics.timed("startup", "services"):
+        search_service = get_search_service()
+        get_data_processor()
+
+    with metrics.timed("startup", "vector_store"):
+        points = search_service.qdrant.warm_up()
+
+    # Collection না থাকলে query চালানোর কিছু নেই; তখনো ready, chat "ডেটা ট্রেইন করুন" বলবে
+    if settings.WARMUP_QUERY and points:
+        with metrics.timed("startup", "query"):
+            search_service.retrieve(settings.WARMUP_QUERY)
+
+    return {"points": points}
+
+
+async def run_warm_up():
+    """warm_up thread এ চালাবে; fail করলে (যেমন Qdrant server এখনো ওঠেনি) WARMUP_RETRY_SECONDS পর আবার।
+    WARMUP_MAX_ATTEMPTS বার fail করলে থামবে, কারণ ভুল config আপনা থেকে ঠিক হয় না"""
+    readiness.status = "warming"
+    while True:
+        readiness.attempts += 1
+        try:
+            details = await asyncio.to_thread(warm_up)
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+            readiness.error = str(e)
+            if settings.WARMUP_MAX_ATTEMPTS and readiness.attempts >= settings.WARMUP_MAX_ATTEMPTS:
+                readiness.status = "failed"
+                print(f"Warm-up failed after {readiness.attempts} attempts, giving up")
+                return
+            readiness.status = "retrying"
+            await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
+            readiness.status = "warming"
+            continue
+        readiness.mark_ready(details)
+        print(f"Warm-up finished in {readiness.ready_after:.2f}s")
+        return
+
+
+@asynccontextmanager
+async def lifespan(app):
+    readiness.started = time.monotonic()
+    task = None
+    if settings.WARMUP_ENABLED:
+        task = asyncio.create_task(run_warm_up())
+    else:
+        # Warm-up ছাড়া প্রথম request গুলোই service বানাবে
+        readiness.mark_ready()
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
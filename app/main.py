@@ -1,9 +1,15 @@
+import json
+import time
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from app import metrics
+from app.config import settings
+from app.lifecycle import lifespan, readiness
 from app.routes import chat, train
 
-app = FastAPI(title="Hybrid Search Chatbot")
+app = FastAPI(title="Hybrid Search Chatbot", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
@@ -11,6 +17,46 @@ templates = Jinja2Templates(directory="templates")
 app.include_router(chat.router, prefix="/api")
 app.include_router(train.router, prefix="/api")
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """প্রতিটা request এর latency record করবে; TRACE_HEADER দিলে stage breakdown response header এ দিবে"""
+    traced = request.headers.get(settings.TRACE_HEADER, "").lower() in ("1", "true", "yes")
+    trace, reset_token = metrics.start_trace() if traced else (None, None)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        if settings.METRICS_ENABLED and route is not None:
+            # Router prefix route.path এ থাকে না, তাই endpoint function এর নাম দিয়ে label করবো
+            metrics.http_seconds.observe(
+                request.method, route.name, str(status), value=time.perf_counter() - started
+            )
+        if reset_token is not None:
+            metrics.end_trace(reset_token)
+    
+    if trace is not None:
+        # Streaming response এর stage গুলো header পাঠানোর পরে চলে, সেগুলো done event এ থাকবে
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Trace-Stages"] = json.dumps(trace.to_dict(), separators=(",", ":"))
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    """Process চলছে কিনা; কোনো service ছোঁবে না"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness_probe():
+    """Warm-up শেষ না হওয়া পর্যন্ত 503, যাতে load balancer traffic না পাঠায়"""
+    return JSONResponse(readiness.to_dict(), status_code=200 if readiness.ready else 503)
+
 @app.get("/")
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
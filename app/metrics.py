@@ -0,0 +1,228 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from app.config import settings
+
+# Chat এর stage গুলো কয়েক ms থেকে কয়েক second, ingestion batch কয়েক মিনিট পর্যন্ত হতে পারে
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]; bucket count cumulative না, render এর সময় যোগ হবে
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Trace:
+    """একটা request এর stage গুলোর সময়; X-Trace header দিলে response এ ফেরত যায়"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, calls = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, calls + 1)
+
+    def to_dict(self):
+        with self._lock:
+            stages = {
+                name: {"ms": round(total * 1000, 2), "calls": calls}
+                for name, (total, calls) in self.stages.items()
+            }
+        return {"total_ms": round((time.perf_counter() - self.started) * 1000, 2), "stages": stages}
+
+    def server_timing(self):
+        """Browser devtools এ দেখা যায় এমন Server-Timing header value"""
+        with self._lock:
+            return ", ".join(
+                f"{name.replace('.', '-')};dur={total * 1000:.2f}" for name, (total, _) in self.stages.items()
+            )
+
+
+_current_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+stage_seconds = Histogram(
+    "chatbot_stage_duration_seconds", "Time spent in each pipeline stage", ("component", "stage")
+)
+stage_errors = Counter(
+    "chatbot_stage_errors_total", "Exceptions raised inside a pipeline stage", ("component", "stage")
+)
+tokens = Counter("chatbot_llm_tokens_total", "Tokens reported by the OpenAI API", ("model", "type"))
+items = Counter(
+    "chatbot_items_total", "Rows, texts and points handled by each stage", ("component", "stage", "kind")
+)
+chat_paths = Counter(
+    "chatbot_chat_path_total", "How chat queries were answered (cache, keyword, hybrid)", ("path",)
+)
+http_seconds = Histogram(
+    "chatbot_http_request_duration_seconds", "HTTP request latency by endpoint function",
+    ("method", "handler", "status")
+)
+throttled_seconds = Counter(
+    "chatbot_rate_limit_throttled_seconds_total",
+    "Time spent waiting on the OpenAI rate limiter or retry backoff", ("limiter", "lane", "reason")
+)
+
+REGISTRY = [stage_seconds, stage_errors, tokens, items, chat_paths, http_seconds, throttled_seconds]
+
+
+def start_trace():
+    """(trace, reset_token); শেষে end_trace(reset_token) দিতে হবে"""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(reset_token):
+    _current_trace.reset(reset_token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def observe(component, stage, seconds):
+    if settings.METRICS_ENABLED:
+        stage_seconds.observe(component, stage, value=seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(f"{component}.{stage}", seconds)
+
+
+@contextmanager
+def timed(component, stage):
+    """Block এর সময় histogram আর চলতি trace এ যোগ করবে; exception হলে error count বাড়াবে"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if settings.METRICS_ENABLED:
+            stage_errors.inc(component, stage)
+        raise
+    finally:
+        observe(component, stage, time.perf_counter() - started)
+
+
+def timed_iter(iterable, component, stage):
+    """Generator এর প্রতিটা next() এর সময় মাপবে (যেমন DB থেকে পরের chunk আসার অপেক্ষা)"""
+    iterator = iter(iterable)
+    while True:
+        with timed(component, stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def count(component, stage, kind, amount=1):
+    if settings.METRICS_ENABLED and amount:
+        items.inc(component, stage, kind, amount=amount)
+
+
+def record_path(path):
+    if settings.METRICS_ENABLED:
+        chat_paths.inc(path)
+
+
+def record_throttle(limiter, lane, reason, seconds):
+    """Rate limiter এ অপেক্ষা (reason="limiter") বা retry এর আগে ঘুম (reason="backoff")"""
+    if settings.METRICS_ENABLED and seconds > 0:
+        throttled_seconds.inc(limiter, lane, reason, amount=seconds)
+    trace = _current_trace.get()
+    if trace is not None and seconds > 0:
+        trace.add(f"ratelimit.{reason}", seconds)
+
+
+def record_usage(model, usage):
+    """OpenAI response এর usage (না থাকলে কিছু হবে না) token counter এ যোগ করবে"""
+    if usage is None or not settings.METRICS_ENABLED:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            tokens.inc(model, kind.replace("_tokens", ""), amount=value)
+
+
+def render():
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
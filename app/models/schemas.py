@@ -3,14 +3,38 @@ from typing import List, Optional
 
 class ChatMessage(BaseModel):
     message: str
+    # দিলে শুধু এই table_name/source_name এর data থেকে উত্তর দিবে
+    source: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[dict] = []
 
+class BatchChatRequest(BaseModel):
+    messages: List[ChatMessage]
+
+class BatchChatResult(BaseModel):
+    response: Optional[str] = None
+    sources: List[dict] = []
+    # শুধু এই প্রশ্নটা fail করলে; বাকি প্রশ্নের উত্তর তবুও আসবে
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult]
+
 class TrainRequest(BaseModel):
     table_name: str
+    full_refresh: bool = False
 
 class TrainResponse(BaseModel):
     message: str
-    processed_rows: int
\ No newline at end of file
+    processed_rows: int
+
+class TrainSqlRequest(BaseModel):
+    sql_query: str
+    source_name: str
+    full_refresh: bool = False
+
+class TrainJobResponse(BaseModel):
+    job_id: str
+    status: str
\ No newline at end of file
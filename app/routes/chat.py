@@ -1,11 +1,72 @@
-from fastapi import APIRouter
-from app.models.schemas import ChatMessage, ChatResponse
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.models.schemas import ChatMessage, ChatResponse, BatchChatRequest, BatchChatResponse, BatchChatResult
 from app.services.search_service import SearchService
+from app.services.answer_cache import AnswerCache
+from app.database.qdrant_client import EmbeddingMismatchError
+from app.dependencies import get_search_service
 
 router = APIRouter()
-search_service = SearchService()
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
-    response, sources = search_service.search_and_respond(message.message)
-    return ChatResponse(response=response, sources=sources)
\ No newline at end of file
+async def chat(message: ChatMessage, search_service: SearchService = Depends(get_search_service)):
+    try:
+        response, sources = await search_service.asearch_and_respond(message.message, message.source)
+    except EmbeddingMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ChatResponse(response=response, sources=sources)
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, search_service: SearchService = Depends(get_search_service)):
+    """অনেক প্রশ্ন একসাথে: embedding আর vector search batch এ, উত্তর প্রশ্নের order এ"""
+    if len(request.messages) > settings.CHAT_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.CHAT_BATCH_MAX_QUESTIONS} messages per batch"
+        )
+    
+    questions = [(message.message, message.source) for message in request.messages]
+    try:
+        answers = await search_service.abatch_search_and_respond(questions)
+    except EmbeddingMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    results = []
+    for answer in answers:
+        if isinstance(answer, Exception):
+            print(f"Batch chat error: {answer}")
+            results.append(BatchChatResult(error="Failed to generate response"))
+        else:
+            response, sources = answer
+            results.append(BatchChatResult(response=response, sources=sources))
+    return BatchChatResponse(results=results)
+
+@router.get("/chat/cache-stats")
+async def chat_cache_stats():
+    cache = AnswerCache.get_instance()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.post("/chat/stream")
+async def chat_stream(message: ChatMessage, search_service: SearchService = Depends(get_search_service)):
+    """Server-sent events: আগে sources, তারপর answer এর token গুলো আসার সাথে সাথে পাঠাবে"""
+    async def event_stream():
+        try:
+            async for event in search_service.astream_search_and_respond(message.message, message.source):
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except EmbeddingMismatchError as e:
+            error = {"type": "error", "message": str(e)}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            error = {"type": "error", "message": "Failed to generate response"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
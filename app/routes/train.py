@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import TrainRequest, TrainResponse
+from fastapi import APIRouter, Depends, HTTPException
+from app.models.schemas import TrainRequest, TrainResponse, TrainSqlRequest, TrainJobResponse
 from app.services.data_processor import DataProcessor
 from app.database.mssql_connection import MSSQLConnection
-from app.database.qdrant_client import QdrantService
+from app.database.qdrant_client import QdrantService, EmbeddingMismatchError
+from app.services.embeddings_service import EmbeddingsService
+from app.services.training_jobs import TrainingJobManager
+from app.dependencies import get_data_processor, get_mssql, get_qdrant
 
 router = APIRouter()
-data_processor = DataProcessor()
-mssql = MSSQLConnection()
-qdrant = QdrantService()
 
 @router.get("/tables")
-async def get_tables():
+def get_tables(mssql: MSSQLConnection = Depends(get_mssql)):
     try:
         tables = mssql.get_tables()
         return {"tables": tables}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@router.post("/tables/refresh")
+def refresh_tables(mssql: MSSQLConnection = Depends(get_mssql)):
+    """Cached table/column metadata বাদ দিয়ে DB থেকে আবার পড়বে"""
+    try:
+        mssql.refresh_metadata()
+        return {"tables": mssql.get_tables()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
 @router.get("/tables/{table_name}/columns")
-async def get_columns(table_name: str):
+def get_columns(table_name: str, mssql: MSSQLConnection = Depends(get_mssql)):
     try:
         columns = mssql.get_columns(table_name)
         # শুধু column names return করবে (data types frontend এ দরকার নেই)
@@ -28,9 +37,9 @@ async def get_columns(table_name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.post("/train", response_model=TrainResponse)
-async def train_data(request: TrainRequest):
+def train_data(request: TrainRequest, data_processor: DataProcessor = Depends(get_data_processor)):
     try:
-        processed_rows = data_processor.process_table_data(request.table_name)
+        processed_rows = data_processor.process_table_data(request.table_name, request.full_refresh)
         
         if processed_rows == 0:
             return TrainResponse(
@@ -42,16 +51,19 @@ async def train_data(request: TrainRequest):
             message=f"Successfully trained {processed_rows} rows from {request.table_name}",
             processed_rows=processed_rows
         )
+    except EmbeddingMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
 
 @router.post("/train-sql")
-async def train_sql_query(request: dict):
+def train_sql_query(request: dict, data_processor: DataProcessor = Depends(get_data_processor)):
     """SQL query দিয়ে data train করার endpoint"""
     sql_query = request.get("sql_query")
     source_name = request.get("source_name")
+    full_refresh = bool(request.get("full_refresh", False))
     
     if not sql_query:
         raise HTTPException(status_code=400, detail="SQL query is required")
@@ -60,7 +72,7 @@ async def train_sql_query(request: dict):
         raise HTTPException(status_code=400, detail="Source name is required")
     
     try:
-        points_count = data_processor.process_sql_query_data(sql_query, source_name)
+        points_count = data_processor.process_sql_query_data(sql_query, source_name, full_refresh)
         
         if points_count == 0:
             return {
@@ -72,50 +84,73 @@ async def train_sql_query(request: dict):
             "message": f"Successfully trained {points_count} data points from {source_name}",
             "count": points_count
         }
+    except EmbeddingMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
 
+@router.post("/train/jobs", response_model=TrainJobResponse)
+def submit_train_job(request: TrainRequest):
+    """Table training background এ চালাবে, সাথে সাথে job ID return করবে"""
+    job = TrainingJobManager.get_instance().submit_table(request.table_name, request.full_refresh)
+    return TrainJobResponse(job_id=job.id, status=job.status)
+
+@router.post("/train-sql/jobs", response_model=TrainJobResponse)
+def submit_train_sql_job(request: TrainSqlRequest):
+    if not request.sql_query.strip():
+        raise HTTPException(status_code=400, detail="SQL query is required")
+    
+    if not request.source_name.strip():
+        raise HTTPException(status_code=400, detail="Source name is required")
+    
+    job = TrainingJobManager.get_instance().submit_sql(request.sql_query, request.source_name, request.full_refresh)
+    return TrainJobResponse(job_id=job.id, status=job.status)
+
+@router.get("/train/jobs")
+async def list_train_jobs():
+    return {"jobs": [job.to_dict() for job in TrainingJobManager.get_instance().list()]}
+
+@router.get("/train/jobs/{job_id}")
+async def get_train_job(job_id: str):
+    job = TrainingJobManager.get_instance().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.post("/train/jobs/{job_id}/cancel")
+async def cancel_train_job(job_id: str):
+    job = TrainingJobManager.get_instance().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @router.get("/debug/collection-info")
-async def get_collection_info():
+async def get_collection_info(qdrant: QdrantService = Depends(get_qdrant)):
     try:
-        collections = qdrant.client.get_collections()
-        collection_names = [col.name for col in collections.collections]
-        
-        if qdrant.collection_name in collection_names:
-            info = qdrant.client.get_collection(qdrant.collection_name)
-            count = qdrant.client.count(qdrant.collection_name)
+        if qdrant.collection_exists():
             return {
                 "collection_exists": True,
                 "collection_name": qdrant.collection_name,
-                "points_count": count.count,
-                "vector_size": info.config.params.vectors.size,
-                "distance": info.config.params.vectors.distance
+                **qdrant.collection_info()
             }
         else:
             return {
                 "collection_exists": False,
-                "available_collections": collection_names
+                "backend": qdrant.backend
             }
     except Exception as e:
         return {"error": str(e)}
 
 @router.get("/debug/sample-data")
-async def get_sample_data():
+async def get_sample_data(qdrant: QdrantService = Depends(get_qdrant)):
     try:
-        collections = qdrant.client.get_collections()
-        collection_names = [col.name for col in collections.collections]
-        
-        if qdrant.collection_name not in collection_names:
+        if not qdrant.collection_exists():
             return {"error": "Collection not found"}
         
         # Get first 3 points to show metadata
-        results = qdrant.client.scroll(
-            collection_name=qdrant.collection_name,
-            limit=3,
-            with_payload=True
-        )
+        results = qdrant.scroll(limit=3)
         
         sample_data = []
         for point in results[0]:
@@ -129,4 +164,23 @@ async def get_sample_data():
             "sample_data": sample_data
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@router.get("/debug/embedding-cache")
+async def get_embedding_cache_stats():
+    cache = EmbeddingsService.get_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.get("/debug/sources")
+def get_sources(data_processor: DataProcessor = Depends(get_data_processor)):
+    """Source registry: প্রতিটা table/sql source এর columns, query আর শেষ ingest time"""
+    return {"sources": data_processor.metadata.list_sources()}
+
+@router.post("/debug/migrate-payloads")
+def migrate_payloads(data_processor: DataProcessor = Depends(get_data_processor)):
+    try:
+        return data_processor.migrate_payloads()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Migration error: {str(e)}")
@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.config import settings
+from app.database.metadata_store import MetadataStore
+
+IDENTIFIER_PATTERN = re.compile(r"[\w\u0980-\u09FF]+(?:[-/.][\w\u0980-\u09FF]+)*")
+
+
+def identifiers(query):
+    """Query এর সংখ্যা বা সংখ্যাওয়ালা ID token (order 1001, INV-2023/7, ১২৩)। Embedding এ এগুলোর পার্থক্য
+    প্রায় ধরা পড়ে না, তাই semantic hit এর জন্য এগুলো হুবহু মিলতে হবে"""
+    return frozenset(
+        token for token in IDENTIFIER_PATTERN.findall(str(query).lower())
+        if any(ch.isdigit() for ch in token)
+    )
+
+
+class AnswerCache:
+    """একই বা প্রায় একই প্রশ্নের উত্তর memory তে রাখবে (exact + cosine similarity), TTL আর LRU সহ।
+    Collection retrain হলে (generation বদলালে) পুরো cache খালি হয়ে যাবে।"""
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None and settings.ANSWER_CACHE_ENABLED:
+            cls._instance = AnswerCache(
+                settings.ANSWER_CACHE_MAX_ENTRIES,
+                settings.ANSWER_CACHE_TTL_SECONDS,
+                settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+            )
+        return cls._instance
+
+    def __init__(self, max_entries, ttl_seconds, similarity_threshold):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.metadata = MetadataStore()
+        self.generation = None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._matrix_keys = []
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        # প্রতিটা lookup get() দিয়ে শুরু হয়; miss = lookup - hit, তাই put এর আগে fail হলেও হিসাব ঠিক থাকে
+        self.lookups = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(query):
+        query = " ".join(str(query).lower().split())
+        return re.sub(r"[\s?!.,;:।]+$", "", query)
+
+    def _key(self, query, scope):
+        return (scope or "", self.normalize(query))
+
+    def _sync_generation(self):
+        generation = self.metadata.get_generation(settings.COLLECTION_NAME)
+        if generation != self.generation:
+            if self.generation is not None:
+                self.invalidations += 1
+            self._clear()
+            self.generation = generation
+
+    def _clear(self):
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+
+    def _is_fresh(self, entry, now):
+        return now - entry["created_at"] <= self.ttl_seconds
+
+    def get(self, query, scope=None):
+        """Normalize করা query হুবহু মিললে (response, sources) return করবে"""
+        with self._lock:
+            self._sync_generation()
+            self.lookups += 1
+            key = self._key(query, scope)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self._is_fresh(entry, time.time()):
+                del self._entries[key]
+                self._matrix = None
+                return None
+
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry["response"], entry["sources"]
+
+    def get_similar(self, embedding, scope=None, query=None):
+        """আগের query embedding গুলোর সাথে cosine similarity threshold পার হলে (response, sources) return করবে।
+        query দিলে দুই প্রশ্নের সংখ্যা/ID token ও মিলতে হবে ("order 1001" এর উত্তর "order 1002" পাবে না)"""
+        if embedding is None:
+            return None
+        query_identifiers = identifiers(query) if query is not None else None
+
+        with self._lock:
+            self._sync_generation()
+            if not self._entries:
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = [key for key, entry in self._entries.items() if entry["embedding"] is not None]
+                self._matrix = (
+                    np.stack([self._entries[key]["embedding"] for key in self._matrix_keys])
+                    if self._matrix_keys else None
+                )
+            if self._matrix is None:
+                return None
+
+            query_vector = np.asarray(embedding, dtype=np.float32)
+            query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+            similarities = self._matrix @ query_vector
+
+            now = time.time()
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.similarity_threshold:
+                    break
+                key = self._matrix_keys[index]
+                entry = self._entries.get(key)
+                if key[0] != (scope or "") or entry is None or not self._is_fresh(entry, now):
+                    continue
+                if query_identifiers is not None and entry["identifiers"] != query_identifiers:
+                    continue
+
+                self._entries.move_to_end(key)
+                self.semantic_hits += 1
+                return entry["response"], entry["sources"]
+        return None
+
+    def put(self, query, embedding, response, sources, scope=None):
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+
+        with self._lock:
+            self._sync_generation()
+            key = self._key(query, scope)
+            self._entries[key] = {
+                "response": response,
+                "sources": sources,
+                "embedding": vector,
+                "identifiers": identifiers(query),
+                "created_at": time.time()
+            }
+            self._entries.move_to_end(key)
+
+            # LRU: সবচেয়ে পুরানো ব্যবহার হওয়া entry বাদ যাবে
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = self.lookups
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": max(total - hits, 0),
+                "hit_rate": hits / total if total else 0.0,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,163 @@
+from app import metrics
+from app.config import settings
+from app.services.embeddings_service import estimate_tokens
+from app.services.keyword_index import tokenize
+from app.services.payloads import expand_payload
+
+# format_row null date এর জায়গায় এটা বসায় (SQL Server এর খালি date ও এটাই); query তে column টা না থাকলে
+# context এ কোনো কাজ নেই। Null number/bit এর "0" আসল 0 (quantity, amount) থেকে আলাদা করা যায় না, তাই সেটা রাখবো।
+# Real datetime value এ সময় অংশ থাকে ("1900-01-01 00:00:00"), তাই শুধু date column এর default মিলবে
+PLACEHOLDER_VALUES = {"N/A", "1900-01-01"}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class ContextRow:
+    def __init__(self, payload, score):
+        self.payload = expand_payload(payload)
+        self.score = score
+        self.fields = list(self.payload.get("data", {}).items())
+        # Column নাম একই source এর সব row এ এক, তাই similarity শুধু value দিয়ে
+        self.terms = set(tokenize(" ".join(str(value) for _, value in self.fields)))
+        self.duplicates = 0
+        self.relevance = 0.0
+
+    def source_info(self):
+        info = {"data": self.payload.get("data", {}), "score": self.score}
+        if "table_name" in self.payload:
+            info["source"] = self.payload["table_name"]
+        if "source_name" in self.payload:
+            info["source"] = self.payload["source_name"]
+        if self.duplicates:
+            info["duplicates"] = self.duplicates
+        return info
+
+
+class ContextBuilder:
+    """Search result থেকে token budget এর মধ্যে prompt context বানাবে:
+    প্রায় একই row গুলো একটা করবে, MMR দিয়ে relevant কিন্তু আলাদা row বাছবে,
+    আর placeholder/লম্বা value কেটে row ছোট করবে"""
+
+    def __init__(self, max_tokens=None, max_rows=None, max_row_tokens=None, max_value_chars=None,
+                 mmr_lambda=None, duplicate_threshold=None):
+        self.max_tokens = max_tokens or settings.CONTEXT_MAX_TOKENS
+        self.max_rows = max_rows or settings.CONTEXT_MAX_ROWS
+        self.max_row_tokens = max_row_tokens or settings.CONTEXT_MAX_ROW_TOKENS
+        self.max_value_chars = max_value_chars or settings.CONTEXT_MAX_VALUE_CHARS
+        self.mmr_lambda = settings.CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        self.duplicate_threshold = duplicate_threshold or settings.CONTEXT_DUPLICATE_THRESHOLD
+
+    def collapse_duplicates(self, rows):
+        """Rank order এ চলবে; আগের কোনো row এর সাথে প্রায় মিলে গেলে সেটার duplicate count বাড়বে"""
+        kept = []
+        for row in rows:
+            for original in kept:
+                if jaccard(row.terms, original.terms) >= self.duplicate_threshold:
+                    original.duplicates += 1
+                    break
+            else:
+                kept.append(row)
+        return kept
+
+    def set_relevance(self, rows):
+        """RRF/BM25 score এর scale আলাদা, তাই 0-1 এ min-max normalize করবো"""
+        scores = [row.score for row in rows]
+        low, high = min(scores), max(scores)
+        for row in rows:
+            row.relevance = 1.0 if high == low else (row.score - low) / (high - low)
+
+    def is_query_column(self, column, value, query_terms):
+        return bool(query_terms & set(tokenize(column))) or bool(query_terms & set(tokenize(value)))
+
+    def format_row(self, row, query_terms):
+        """Placeholder বাদ, লম্বা value কাটা; তারপরও row বড় হলে query এর সাথে সম্পর্কহীন
+        সবচেয়ে লম্বা column গুলো বাদ দিবে। Column এর order একই থাকবে।"""
+        parts = []
+        for column, value in row.fields:
+            value = str(value)
+            if not value or value == "N/A":
+                continue
+            # Query matching শুধু দরকার হলেই (placeholder বা বড় row), কারণ প্রতিটা value tokenize করা সস্তা না
+            if value in PLACEHOLDER_VALUES and not self.is_query_column(column, value, query_terms):
+                continue
+            if len(value) > self.max_value_chars:
+                value = value[:self.max_value_chars].rstrip() + "…"
+            parts.append((column, value, f"{column}: {value}"))
+
+        text = " | ".join(part for _, _, part in parts)
+        if estimate_tokens(text) > self.max_row_tokens:
+            droppable = sorted(
+                (i for i, (column, value, _) in enumerate(parts)
+                 if not self.is_query_column(column, value, query_terms)),
+                key=lambda i: len(parts[i][2]),
+                reverse=True
+            )
+            dropped = set()
+            for i in droppable:
+                if estimate_tokens(text) <= self.max_row_tokens:
+                    break
+                dropped.add(i)
+                text = " | ".join(part for j, (_, _, part) in enumerate(parts) if j not in dropped)
+        return text
+
+    def truncate(self, text, tokens):
+        """estimate_tokens এর উল্টো হিসাবে byte কেটে budget এ আনবে"""
+        data = text.encode("utf-8")[:max(tokens - 1, 1) * 3]
+        return data.decode("utf-8", errors="ignore").rstrip() + "…"
+
+    def select(self, rows, query_terms):
+        """MMR: relevance বেশি আর আগে বাছা row গুলোর সাথে মিল কম এমন row একটা একটা করে নিবে,
+        যতক্ষণ token budget আর row limit থাকে। [(row, text)] return করবে"""
+        remaining = list(rows)
+        selected = []
+        used_tokens = 0
+        # প্রতিটা candidate এর বাছা row গুলোর সাথে সর্বোচ্চ মিল; নতুন row বাছলে শুধু সেটার সাথে মিলিয়ে update হবে
+        redundancy = {id(row): 0.0 for row in rows}
+
+        while remaining and len(selected) < self.max_rows:
+            best = max(
+                remaining,
+                key=lambda row: self.mmr_lambda * row.relevance - (1 - self.mmr_lambda) * redundancy[id(row)]
+            )
+            remaining.remove(best)
+
+            text = self.format_row(best, query_terms)
+            if not text:
+                continue
+            tokens = estimate_tokens(text)
+            if used_tokens + tokens > self.max_tokens:
+                if selected:
+                    # ছোট কোনো row এখনো ধরতে পারে
+                    continue
+                # সবচেয়ে relevant row টা কেটে হলেও থাকবে
+                text = self.truncate(text, self.max_tokens)
+                tokens = estimate_tokens(text)
+            selected.append((best, text))
+            used_tokens += tokens
+            for row in remaining:
+                redundancy[id(row)] = max(redundancy[id(row)], jaccard(row.terms, best.terms))
+
+        return selected, used_tokens
+
+    def build(self, query, search_results):
+        """[(payload, score)] থেকে (context, sources) বানাবে"""
+        rows = [ContextRow(payload, score) for payload, score in search_results]
+        if not rows:
+            return "", []
+
+        unique_rows = self.collapse_duplicates(rows)
+        self.set_relevance(unique_rows)
+        selected, used_tokens = self.select(unique_rows, set(tokenize(query)))
+
+        metrics.count("context", "build", "candidates", len(rows))
+        metrics.count("context", "build", "duplicates", len(rows) - len(unique_rows))
+        metrics.count("context", "build", "rows", len(selected))
+        metrics.count("context", "build", "tokens", used_tokens)
+
+        context = "\n\n".join(text for _, text in selected)
+        return context, [row.source_info() for row, _ in selected]
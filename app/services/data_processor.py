@@ -1,172 +1,462 @@
 from app.database.mssql_connection import MSSQLConnection
 from app.database.qdrant_client import QdrantService
-from app.services.embeddings_service import EmbeddingsService
+from app.database.metadata_store import MetadataStore
+from app.services.embeddings_service import EmbeddingWaitAborted, EmbeddingsService
+from app.services.keyword_index import KeywordIndex
+from app.services.rate_limiter import BACKGROUND
+from app.services.payloads import build_payload, expand_payload, is_legacy_payload
+from app.services.row_formatter import RowFormatter, clean_value, default_value, format_chunk, fingerprint as row_fingerprint
+from app.config import settings
+from app import metrics
 from qdrant_client.models import PointStruct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+import json
+import multiprocessing
+import threading
 import uuid
 import pyodbc
 
 class DataProcessor:
+    _format_pool = None
+    _format_pool_lock = threading.Lock()
+    
     def __init__(self):
         self.mssql = MSSQLConnection()
         self.qdrant = QdrantService()
-        self.embeddings = EmbeddingsService()
+        # Ingestion এর OpenAI call chat এর পরে limiter পায়
+        self.embeddings = EmbeddingsService(lane=BACKGROUND)
+        self.metadata = MetadataStore()
+        self.keyword_index = KeywordIndex()
     
     def get_default_value(self, column_type):
         """Data type অনুসারে default value return করবে"""
-        column_type = str(column_type).lower()
-        
-        # Numeric types
-        if any(t in column_type for t in ['int', 'decimal', 'numeric', 'float', 'real', 'money']):
-            return "0"
-        
-        # Date/Time types
-        if any(t in column_type for t in ['date', 'time', 'datetime']):
-            return "1900-01-01"
-        
-        # Boolean types
-        if 'bit' in column_type:
-            return "0"
-        
-        # String types (varchar, nvarchar, text, char, etc.)
-        return "N/A"
+        return default_value(column_type)
     
     def clean_and_format_value(self, value, column_type):
         """Value clean করবে এবং null হলে default value দিবে"""
-        if value is None or str(value).strip() == '':
-            return self.get_default_value(column_type)
-        
-        # Value কে string এ convert করে clean করবে
-        cleaned_value = str(value).strip()
-        
-        # Multiple spaces কে single space এ convert করবে
-        cleaned_value = ' '.join(cleaned_value.split())
-        
-        return cleaned_value
+        return clean_value(value, default_value(column_type))
+    
+    def format_row(self, columns, column_types, row):
+        """একটা row কে clean করে (row_data, text_content) return করবে।
+        অনেক row হলে format_rows ব্যবহার করা ভালো, formatter একবারই বানাবে"""
+        return RowFormatter(columns, column_types).format(row)
+    
+    @classmethod
+    def get_format_pool(cls):
+        """বড় chunk format করার process pool; INGEST_FORMAT_WORKERS 0 হলে None"""
+        with cls._format_pool_lock:
+            if cls._format_pool is None and settings.INGEST_FORMAT_WORKERS > 0:
+                # Training job গুলো thread এ চলে, fork করলে lock ধরা অবস্থায় copy হতে পারে; তাই spawn
+                cls._format_pool = ProcessPoolExecutor(
+                    max_workers=settings.INGEST_FORMAT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return cls._format_pool
     
-    def process_table_data(self, table_name):
+    def format_rows(self, columns, column_types, rows):
+        """Chunk এর সব row কে [(cleaned_values, text_content, fingerprint)] এ নিবে; format_row এর সাথে হুবহু মিলবে।
+        row_data dict শুধু যে row embed হবে সেটার জন্য বানালেই হয়।
+        INGEST_FORMAT_POOL_MIN_ROWS এর বড় chunk process pool এ ভাগ করে format হবে।"""
+        pool = self.get_format_pool() if len(rows) >= settings.INGEST_FORMAT_POOL_MIN_ROWS else None
+        if pool is not None:
+            try:
+                # pyodbc.Row pickle হয় না, tuple করে পাঠাবো
+                rows = [tuple(row) for row in rows]
+                size = -(-len(rows) // settings.INGEST_FORMAT_WORKERS)
+                parts = [rows[i:i + size] for i in range(0, len(rows), size)]
+                results = []
+                for part in pool.map(format_chunk, repeat(columns), repeat(column_types), parts):
+                    results.extend(zip(*part))
+                return results
+            except Exception as e:
+                print(f"Format pool error, formatting in process: {e}")
+        return list(zip(*RowFormatter(columns, column_types).format_values(rows)))
+    
+    def make_point_id(self, source_key, row_key):
+        """Source আর row key থেকে সবসময় একই point ID বানাবে, যাতে retrain এ duplicate না হয়"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source_key}:{row_key}"))
+    
+    def make_fingerprint(self, row_data):
+        return row_fingerprint(row_data)
+    
+    def make_key(self, row, key_indexes):
+        return json.dumps([str(row[k]) for k in key_indexes], ensure_ascii=False)
+    
+    def build_points(self, entries, make_payload, job=None):
+        """(row_index, point_id, values, text_content, fingerprint) গুলো batch এ embed করে PointStruct বানাবে।
+        Keyword index এর জন্য {point_id: text_content} ও return করবে। skipped = সাময়িক error এ বাদ পড়া row
+        (পরের run এ আবার চেষ্টা হবে), rejected = যে row কখনো embed হবে না (খালি text, bad request)।
+        job দিলে rate limit এর অপেক্ষার মাঝেও cancel check হবে"""
+        rejected_texts = set()
         try:
-            columns, column_types, rows = self.mssql.get_table_data(table_name)
-        except ValueError as e:
-            raise ValueError(f"Invalid table: {str(e)}")
-        
-        self.qdrant.create_collection()
+            with metrics.timed("ingest", "embed"):
+                embeddings = self.embeddings.get_embeddings(
+                    [entry[3] for entry in entries],
+                    rejected=rejected_texts,
+                    should_stop=job.is_cancelled if job is not None else None
+                )
+        except EmbeddingWaitAborted:
+            # Cancel এর জন্য থামলে job cancelled হবে, failed না
+            if job is not None:
+                job.check_cancelled()
+            raise
         
         points = []
+        texts = {}
         skipped_rows = 0
+        rejected_rows = 0
         
-        for i, row in enumerate(rows):
-            row_data = {}
-            text_parts = []
+        for (i, point_id, values, text_content, fingerprint), embedding in zip(entries, embeddings):
+            if embedding is None:
+                if text_content in rejected_texts:
+                    print(f"Row {i} cannot be embedded: skipped")
+                    rejected_rows += 1
+                else:
+                    print(f"Row {i} embedding error: skipped")
+                    skipped_rows += 1
+                continue
             
-            for j, col in enumerate(columns):
-                # Value clean করে নিব
-                cleaned_value = self.clean_and_format_value(row[j], column_types[j])
-                row_data[col] = cleaned_value
+            payload = make_payload(i, values, text_content)
+            payload["fingerprint"] = fingerprint
+            points.append(PointStruct(id=point_id, vector=embedding, payload=payload))
+            texts[point_id] = text_content
+        
+        return points, texts, skipped_rows, rejected_rows
+    
+    def ingest_chunks(self, chunks, source_field, source_key, source_name, key_columns=None, existing=None, job=None,
+                      sql_query=None):
+        """Chunk গুলো একটা একটা করে clean, embed আর upsert করবে; memory তে শুধু একটা chunk থাকবে।
+        existing এ যে row এর fingerprint মিলে যাবে সেটা আবার embed হবে না।
+        Columns/sql_query source registry তে একবার থাকবে, point এ শুধু source_id।
+        Upsert হওয়া row গুলো keyword index এও যোগ হবে। job দিলে progress record হবে আর cancel check হবে।"""
+        existing = existing or {}
+        stats = {"upserted": 0, "unchanged": 0, "skipped": 0, "rejected": 0}
+        seen_ids = set()
+        occurrences = {}
+        row_index = 0
+        source_id = None
+        
+        try:
+            # DB থেকে পরের chunk আসার অপেক্ষাও একটা stage
+            for columns, column_types, rows in metrics.timed_iter(chunks, "ingest", "fetch"):
+                if job is not None:
+                    job.check_cancelled()
+                    job.record(rows_read=len(rows))
                 
-                # Text content এ শুধু meaningful data যুক্ত করবে
-                # if cleaned_value and cleaned_value != "N/A" and not self.is_numeric_type(column_types[j]):
-                if cleaned_value and cleaned_value != "N/A":
-                    text_parts.append(f"{col}: {cleaned_value}")
-            
-            # যদি কোনো meaningful data না থাকে তাহলে skip করবে
-            # if not text_parts:
-            #     skipped_rows += 1
-            #     continue
-            
-            text_content = " | ".join(text_parts)
-            
-            try:
-                embedding = self.embeddings.get_embedding(text_content)
+                if source_id is None:
+                    source_id = self.metadata.register_source(source_key, source_name, columns, sql_query)
+                
+                key_indexes = None
+                if key_columns:
+                    lowered = [col.lower() for col in columns]
+                    if all(key.lower() in lowered for key in key_columns):
+                        key_indexes = [lowered.index(key.lower()) for key in key_columns]
+                
+                with metrics.timed("ingest", "clean"):
+                    formatted = self.format_rows(columns, column_types, rows)
                 
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        "table_name": table_name,
-                        "columns": columns,
-                        "data": row_data,
-                        "text_content": text_content,
-                        "row_index": i
-                    }
+                for start in range(0, len(rows), settings.INGEST_UPSERT_BATCH_SIZE):
+                    if job is not None:
+                        job.check_cancelled()
+                    
+                    batch = rows[start:start + settings.INGEST_UPSERT_BATCH_SIZE]
+                    entries = []
+                    unchanged = {}
+                    
+                    for row, (values, text_content, fingerprint) in zip(
+                        batch, formatted[start:start + settings.INGEST_UPSERT_BATCH_SIZE]
+                    ):
+                        if key_indexes is not None:
+                            row_key = self.make_key(row, key_indexes)
+                        else:
+                            # Primary key না থাকলে row hash দিয়ে ID; একই row একাধিকবার থাকলে occurrence যোগ হবে
+                            occurrence = occurrences.get(fingerprint, 0)
+                            occurrences[fingerprint] = occurrence + 1
+                            row_key = f"hash:{fingerprint}:{occurrence}"
+                        
+                        point_id = self.make_point_id(source_key, row_key)
+                        seen_ids.add(point_id)
+                        
+                        if existing.get(point_id) == fingerprint:
+                            stats["unchanged"] += 1
+                            unchanged[point_id] = text_content
+                        else:
+                            entries.append((row_index, point_id, values, text_content, fingerprint))
+                        row_index += 1
+                    
+                    # Keyword index এর আগে train করা row গুলো index এ না থাকলে এখন যোগ করবো
+                    if unchanged:
+                        with metrics.timed("ingest", "keyword_index"):
+                            missing_ids = self.keyword_index.missing_documents(unchanged)
+                            self.keyword_index.add_documents(
+                                (point_id, unchanged[point_id], source_name) for point_id in missing_ids
+                            )
+                    
+                    if job is not None:
+                        job.record(rows_unchanged=len(batch) - len(entries))
+                    if not entries:
+                        continue
+                    
+                    points, texts, skipped, rejected = self.build_points(
+                        entries,
+                        lambda i, values, text_content: build_payload(
+                            source_field, source_name, source_id, i, dict(zip(columns, values)), text_content, values
+                        ),
+                        job=job
+                    )
+                    stats["skipped"] += skipped
+                    stats["rejected"] += rejected
+                    
+                    # প্রতিটা batch upsert হলেই search এ পাওয়া যাবে
+                    with metrics.timed("ingest", "upsert"):
+                        upsert_ok = bool(points) and self.qdrant.upsert_points(points)
+                    if upsert_ok:
+                        stats["upserted"] += len(points)
+                        with metrics.timed("ingest", "keyword_index"):
+                            self.keyword_index.add_documents(
+                                (point.id, texts[point.id], source_name) for point in points
+                            )
+                        upserted, failed = len(points), 0
+                    else:
+                        stats["skipped"] += len(points)
+                        upserted, failed = 0, len(points)
+                    
+                    if job is not None:
+                        job.record(
+                            rows_embedded=len(points),
+                            rows_upserted=upserted,
+                            rows_skipped=skipped + rejected + failed
+                        )
+        except Exception:
+            # আগের batch গুলো Qdrant এ থেকে যাবে
+            print(f"Ingestion stopped after {stats['upserted']} rows")
+            raise
+        finally:
+            for kind, value in stats.items():
+                metrics.count("ingest", "rows", kind, value)
+            # Data বদলালে পুরানো cached answer আর valid না
+            if stats["upserted"]:
+                self.metadata.bump_generation(settings.COLLECTION_NAME)
+        
+        return stats, seen_ids
+    
+    def encode_watermark(self, value, kind):
+        if kind == "rowversion":
+            return bytes(value).hex()
+        return value.isoformat()
+    
+    def decode_watermark(self, watermark, kind):
+        if kind == "rowversion":
+            return bytes.fromhex(watermark)
+        return datetime.fromisoformat(watermark)
+    
+    def process_table_data(self, table_name, full_refresh=False, job=None):
+        if not self.mssql.table_exists(table_name):
+            raise ValueError(f"Invalid table: Table {table_name} does not exist")
+        
+        source_key = f"table:{table_name}"
+        
+        self.qdrant.create_collection(self.embeddings.dimension)
+        self.qdrant.check_embedding(self.embeddings.model, self.embeddings.dimension)
+        existing = self.qdrant.get_fingerprints("table_name", table_name)
+        key_columns = self.mssql.get_primary_key_columns(table_name)
+        
+        # rowversion/modified-date column আর primary key থাকলে শুধু change হওয়া row পড়বো
+        tracking = self.mssql.get_change_tracking_column(table_name) if key_columns else None
+        high = None
+        changed_range = None
+        if tracking:
+            column, kind = tracking
+            if kind == "rowversion":
+                high = self.mssql.get_min_active_rowversion()
+            else:
+                high = self.mssql.get_max_value(table_name, column)
+            state = self.metadata.get_sync_state(source_key)
+            if (not full_refresh and existing and high is not None and state
+                    and state["column"] == column and state["kind"] == kind):
+                low = self.decode_watermark(state["watermark"], kind)
+                if kind == "datetime":
+                    # Watermark এর আগের timestamp নিয়ে পরে commit হওয়া row ধরতে window একটু পিছন থেকে
+                    low -= timedelta(seconds=settings.SYNC_WATERMARK_LAG_SECONDS)
+                changed_range = (low, high)
+        
+        if job is not None and not changed_range:
+            job.total_rows = self.mssql.estimate_row_count(table_name)
+        
+        stats, seen_ids = self.ingest_chunks(
+            self.mssql.iter_table_data(
+                table_name,
+                changed_column=tracking[0] if changed_range else None,
+                changed_range=changed_range,
+                include_null_changes=bool(changed_range) and tracking[1] == "datetime",
+                changed_kind=tracking[1] if changed_range else "datetime"
+            ),
+            "table_name", source_key, table_name, key_columns,
+            existing=None if full_refresh else existing,
+            job=job
+        )
+        
+        if changed_range:
+            # Delete হওয়া row খুঁজতে শুধু key গুলো পড়বো
+            live_ids = set()
+            for _, _, rows in self.mssql.iter_table_keys(table_name, key_columns):
+                for row in rows:
+                    live_ids.add(self.make_point_id(source_key, self.make_key(row, range(len(key_columns)))))
+            
+            # Watermark এর বাইরে থেকে আসা নতুন row থাকলে একবার পুরো table মিলিয়ে নিব
+            if live_ids - set(existing) - seen_ids:
+                print(f"{table_name}: rows outside the change window found, running a full pass")
+                existing = self.qdrant.get_fingerprints("table_name", table_name)
+                full_stats, seen_ids = self.ingest_chunks(
+                    self.mssql.iter_table_data(table_name), "table_name", source_key, table_name, key_columns, existing,
+                    job=job
                 )
-                points.append(point)
-            except Exception as e:
-                print(f"Row {i} embedding error: {e}")
-                skipped_rows += 1
-                continue
+                for key in stats:
+                    stats[key] += full_stats[key]
+                stale_ids = [point_id for point_id in existing if point_id not in seen_ids]
+            else:
+                stale_ids = [point_id for point_id in existing if point_id not in live_ids]
+            total_rows = len(live_ids) - stats["skipped"] - stats["rejected"]
+        else:
+            stale_ids = [point_id for point_id in existing if point_id not in seen_ids]
+            total_rows = stats["upserted"] + stats["unchanged"]
         
-        if points:
-            self.qdrant.upsert_points(points)
+        if stale_ids:
+            with metrics.timed("ingest", "delete"):
+                self.qdrant.delete_points(stale_ids)
+                self.keyword_index.delete_documents(stale_ids)
+            self.metadata.bump_generation(settings.COLLECTION_NAME)
+        if job is not None:
+            job.record(rows_deleted=len(stale_ids))
         
-        print(f"Total processed: {len(points)}, Skipped: {skipped_rows}")
-        return len(points)
+        # সাময়িক error এ row skip হলে (embedding/upsert fail) watermark আগাবো না, পরের run এ একই window আবার পড়বে;
+        # fail হওয়া row এর fingerprint নেই, তাই শুধু সেগুলোই আবার embed হবে। যে row কখনো embed হবে না
+        # (rejected) সেগুলো watermark আটকাবে না, নাহলে প্রতি run এ একই window বড় হতেই থাকবে
+        if tracking and high is not None:
+            if stats["skipped"]:
+                print(f"{table_name}: {stats['skipped']} rows skipped, keeping the previous watermark")
+            else:
+                self.metadata.save_sync_state(
+                    source_key, tracking[0], tracking[1], self.encode_watermark(high, tracking[1])
+                )
+        
+        print(
+            f"Total processed: {stats['upserted']}, Unchanged: {stats['unchanged']}, "
+            f"Deleted: {len(stale_ids)}, Skipped: {stats['skipped']}, Rejected: {stats['rejected']}"
+        )
+        return total_rows
     
-    def process_sql_query_data(self, sql_query, source_name):
+    def process_sql_query_data(self, sql_query, source_name, full_refresh=False, job=None):
         """SQL query execute করে data train করার method"""
-        conn = self.mssql.get_connection()
-        cursor = conn.cursor()
+        source_key = f"sql:{source_name}"
         
         try:
-            cursor.execute(sql_query)
-            columns = [desc[0] for desc in cursor.description]
-            column_types = [desc[1] for desc in cursor.description]
-            rows = cursor.fetchall()
-            
-            self.qdrant.create_collection()
+            self.qdrant.create_collection(self.embeddings.dimension)
+            self.qdrant.check_embedding(self.embeddings.model, self.embeddings.dimension)
+            existing = self.qdrant.get_fingerprints("source_name", source_name)
             
+            stats, seen_ids = self.ingest_chunks(
+                self.mssql.iter_query(sql_query),
+                "source_name",
+                source_key,
+                source_name,
+                existing=None if full_refresh else existing,
+                job=job,
+                sql_query=sql_query
+            )
+        except pyodbc.Error as e:
+            raise ValueError(f"SQL execution error: {str(e)}")
+        
+        stale_ids = [point_id for point_id in existing if point_id not in seen_ids]
+        if stale_ids:
+            with metrics.timed("ingest", "delete"):
+                self.qdrant.delete_points(stale_ids)
+                self.keyword_index.delete_documents(stale_ids)
+            self.metadata.bump_generation(settings.COLLECTION_NAME)
+        if job is not None:
+            job.record(rows_deleted=len(stale_ids))
+        
+        print(
+            f"Total processed: {stats['upserted']}, Unchanged: {stats['unchanged']}, "
+            f"Deleted: {len(stale_ids)}, Skipped: {stats['skipped']}, Rejected: {stats['rejected']}"
+        )
+        return stats["upserted"] + stats["unchanged"]
+
+    def needs_payload_migration(self, payload):
+        if is_legacy_payload(payload):
+            return True
+        # PAYLOAD_COMPACT setting বদলালে সেই format এ লিখবো
+        if settings.PAYLOAD_COMPACT and "values" not in payload:
+            # Duplicate column এর point compact করা যায় না (migrate_payloads দেখুন), প্রতিবার আবার লিখবো না
+            source = self.metadata.get_source(payload.get("source_id"))
+            columns = source["columns"] if source else []
+            return len(set(columns)) == len(columns)
+        return ("values" in payload) != settings.PAYLOAD_COMPACT
+    
+    def migrate_payloads(self, batch_size=256):
+        """পুরানো point গুলো (প্রতিটাতে columns/sql_query/data/text_content) নতুন compact format এ লিখবে।
+        Vector আর fingerprint একই থাকবে, তাই কিছু re-embed হবে না।"""
+        stats = {"scanned": 0, "migrated": 0}
+        if not self.qdrant.collection_exists():
+            return stats
+        
+        source_ids = {}
+        offset = None
+        while True:
+            records, offset = self.qdrant.scroll(limit=batch_size, offset=offset, with_vectors=True)
             points = []
-            skipped_rows = 0
-            
-            for i, row in enumerate(rows):
-                row_data = {}
-                text_parts = []
-                
-                for j, col in enumerate(columns):
-                    cleaned_value = self.clean_and_format_value(row[j], column_types[j])
-                    row_data[col] = cleaned_value
-                    
-                    # if cleaned_value and cleaned_value != "N/A" and not self.is_numeric_type(column_types[j]):
-                    if cleaned_value and cleaned_value != "N/A":
-                        text_parts.append(f"{col}: {cleaned_value}")
+            for record in records:
+                stats["scanned"] += 1
+                payload = record.payload or {}
+                if not self.needs_payload_migration(payload):
+                    continue
                 
-                # if not text_parts:
-                #     skipped_rows += 1
-                #     continue
+                source_field = "table_name" if "table_name" in payload else "source_name"
+                source_name = payload.get(source_field)
+                if source_name is None:
+                    print(f"Point {record.id} has no source, skipped")
+                    continue
                 
-                text_content = " | ".join(text_parts)
+                expanded = expand_payload(payload, self.metadata)
+                row_data = expanded["data"]
+                source_id = payload.get("source_id")
+                if is_legacy_payload(payload):
+                    columns = payload.get("columns") or list(row_data.keys())
+                    sql_query = payload.get("sql_query")
+                    prefix = "table" if source_field == "table_name" else "sql"
+                    definition = (source_name, json.dumps(columns), sql_query)
+                    if definition not in source_ids:
+                        source_ids[definition] = self.metadata.register_source(
+                            f"{prefix}:{source_name}", source_name, columns, sql_query
+                        )
+                    source_id = source_ids[definition]
                 
-                try:
-                    embedding = self.embeddings.get_embedding(text_content)
-                    
-                    point = PointStruct(
-                        id=str(uuid.uuid4()),
-                        vector=embedding,
-                        payload={
-                            "source_name": source_name,
-                            "columns": columns,
-                            "data": row_data,
-                            "text_content": text_content,
-                            "sql_query": sql_query,
-                            "row_index": i
-                        }
-                    )
-                    points.append(point)
-                except Exception as e:
-                    print(f"Row {i} embedding error: {e}")
-                    skipped_rows += 1
-                    continue
+                # Compact payload এ registry এর প্রতিটা column এর value লাগে; duplicate column থাকলে data dict থেকে
+                # আলাদা value গুলো আর ফেরত পাওয়া যায় না, তাই সেই point পুরো payload এই থাকবে
+                source = self.metadata.get_source(source_id)
+                columns = source["columns"] if source else []
+                values = None
+                if len(set(columns)) == len(columns) and all(col in row_data for col in columns):
+                    values = [row_data[col] for col in columns]
+                new_payload = build_payload(
+                    source_field, source_name, source_id, payload.get("row_index"), row_data, expanded["text_content"],
+                    values
+                )
+                new_payload["fingerprint"] = payload.get("fingerprint") or self.make_fingerprint(row_data)
+                points.append(PointStruct(id=record.id, vector=record.vector, payload=new_payload))
             
             if points:
-                self.qdrant.upsert_points(points)
-            
-            print(f"Total processed: {len(points)}, Skipped: {skipped_rows}")
-            return len(points)
-            
-        except pyodbc.Error as e:
-            raise ValueError(f"SQL execution error: {str(e)}")
-        finally:
-            conn.close()
-
+                if not self.qdrant.upsert_points(points):
+                    raise ValueError(f"Payload migration failed after {stats['migrated']} points")
+                stats["migrated"] += len(points)
+            if offset is None:
+                break
+        
+        print(f"Payload migration: scanned {stats['scanned']}, migrated {stats['migrated']}")
+        return stats
+    
     def is_numeric_type(self, column_type):    
         """Check if column type is numeric"""    
         column_type = str(column_type).lower()    
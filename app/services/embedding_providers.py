@@ -0,0 +1,107 @@
+import zlib
+import numpy as np
+from app import metrics
+from app.config import settings
+from app.services.keyword_index import tokenize
+
+
+class OpenAIEmbeddingProvider:
+    """OpenAI embedding API; network call, তাই result cache করা হবে আর rate limiter মানবে"""
+    cacheable = True
+    rate_limited = True
+
+    # Available OpenAI Models:
+    # text-embedding-ada-002     → 1536 dimensions (পুরানো)
+    # text-embedding-3-small     → 1536 dimensions (নতুন, দ্রুত)
+    # text-embedding-3-large     → 3072 dimensions (সবচেয়ে ভালো)
+    DIMENSIONS = {
+        "text-embedding-ada-002": 1536,
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072
+    }
+
+    def __init__(self, model, client, async_client):
+        self.model = model
+        # আগের cache entry গুলো model নাম দিয়েই রাখা, তাই name = model
+        self.name = model
+        self.dimension = self.DIMENSIONS.get(model, 1536)
+        self.client = client
+        self.async_client = async_client
+
+    def embed(self, texts):
+        with metrics.timed("openai", "embedding_request"):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=texts
+            )
+        metrics.record_usage(self.model, getattr(response, "usage", None))
+        # Response এর order index দিয়ে ঠিক করে নিব
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aembed(self, texts):
+        with metrics.timed("openai", "embedding_request"):
+            response = await self.async_client.embeddings.create(
+                model=self.model,
+                input=texts
+            )
+        metrics.record_usage(self.model, getattr(response, "usage", None))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class HashingEmbeddingProvider:
+    """Network ছাড়া CPU তে চলা embedding: word, word bigram আর character trigram এর feature hashing,
+    sublinear tf আর L2 normalize। Deterministic, তাই test এ OpenAI এর বদলে ব্যবহার করা যায়।"""
+    cacheable = False
+    rate_limited = False
+
+    def __init__(self, dimension=512):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def features(self, text):
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        # Trigram থাকায় বানান একটু ভুল হলেও কাছাকাছি vector হবে
+        for token in tokens:
+            if len(token) > 2:
+                padded = f"#{token}#"
+                features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        rows, columns, signs = [], [], []
+        hashed = {}
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                if feature not in hashed:
+                    value = zlib.crc32(feature.encode("utf-8"))
+                    hashed[feature] = (value % self.dimension, 1.0 if value & 0x80000000 else -1.0)
+                column, sign = hashed[feature]
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), signs)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+
+    async def aembed(self, texts):
+        # CPU তে কয়েক microsecond, thread এ পাঠানোর দরকার নেই
+        return self.embed(texts)
+
+
+def create_provider(client_factory=None, async_client_factory=None):
+    """EMBEDDING_PROVIDER setting অনুযায়ী provider বানাবে। OpenAI client শুধু openai provider এর জন্য
+    factory থেকে বানানো হবে, তাই hashing provider এ API key লাগে না"""
+    if settings.EMBEDDING_PROVIDER == "openai":
+        return OpenAIEmbeddingProvider(
+            settings.EMBEDDING_MODEL,
+            client_factory() if client_factory else None,
+            async_client_factory() if async_client_factory else None
+        )
+    if settings.EMBEDDING_PROVIDER == "hashing":
+        return HashingEmbeddingProvider(settings.HASHING_EMBEDDING_DIMENSION)
+    raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
@@ -1,39 +1,368 @@
+import asyncio
+import contextvars
 import openai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app import metrics
 from app.config import settings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_providers import create_provider
+from app.services.rate_limiter import (
+    BACKGROUND, INTERACTIVE, RateLimiter, backoff_delay, is_quota_error, is_rate_limit_error
+)
+
+# এগুলো ছাড়া অন্য error (bad request, auth) retry করে লাভ নেই
+RETRYABLE_CHAT_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class EmbeddingWaitAborted(Exception):
+    """Background lane এ rate limit এর অপেক্ষা থামানো হয়েছে (job cancel বা অপেক্ষার সময় শেষ)।
+    এটা হলে batch ভাগ করে আবার চেষ্টা হবে না, caller পর্যন্ত যাবে"""
+
+
+def estimate_tokens(text):
+    """Tokenizer ছাড়া আনুমানিক token count; UTF-8 byte / 3 সাধারণত একটু বেশি ধরে"""
+    return len(text.encode("utf-8")) // 3 + 1
+
 
 class EmbeddingsService:
-    def __init__(self):
+    _cache = None
+    _limiters = {}
+    _limiters_lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            cls._cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_ENTRIES)
+        return cls._cache
+
+    @classmethod
+    def get_limiter(cls, kind):
+        """"embeddings" বা "chat" limiter; process এর সব EmbeddingsService (chat আর ingestion) share করবে"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+        with cls._limiters_lock:
+            if kind not in cls._limiters:
+                if kind == "embeddings":
+                    limits = (settings.EMBEDDING_RATE_LIMIT_RPM, settings.EMBEDDING_RATE_LIMIT_TPM)
+                else:
+                    limits = (settings.CHAT_RATE_LIMIT_RPM, settings.CHAT_RATE_LIMIT_TPM)
+                cls._limiters[kind] = RateLimiter(kind, *limits, settings.RATE_LIMIT_INTERACTIVE_RESERVE)
+            return cls._limiters[kind]
+
+    def __init__(self, lane=INTERACTIVE):
+        """lane: chat এর জন্য INTERACTIVE, ingestion এর জন্য BACKGROUND; limiter এ interactive আগে পায়"""
         openai.api_key = settings.OPENAI_API_KEY
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-    
+        # OpenAI client (আর API key) শুধু openai provider বা প্রথম chat call এ লাগবে; hashing provider offline চলে
+        self._client = None
+        self._async_client = None
+        self.provider = create_provider(lambda: self.client, lambda: self.async_client)
+        # Cache আর collection record এ provider এর নাম থাকবে, যাতে আলাদা provider এর vector না মিশে
+        self.model = self.provider.name
+        self.dimension = self.provider.dimension
+        self.cache = self.get_cache() if self.provider.cacheable else None
+        self.lane = lane
+        self.embedding_limiter = self.get_limiter("embeddings") if self.provider.rate_limited else None
+        self.chat_limiter = self.get_limiter("chat")
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Retry আমরা নিজেরা করি (limiter আর retry-after মেনে), SDK এর নিজস্ব retry বন্ধ
+            self._client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._async_client
+
+    @async_client.setter
+    def async_client(self, async_client):
+        self._async_client = async_client
+
+    def retry_delay(self, limiter, error, attempt):
+        if limiter is not None:
+            return limiter.retry_delay(error, attempt, self.lane)
+        return backoff_delay(attempt, error)
+
     def get_embedding(self, text):
-        response = self.client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
+        if self.cache is not None:
+            cached = self.cache.get(self.model, text)
+            if cached is not None:
+                metrics.count("embeddings", "cache", "hit")
+                return cached
+            metrics.count("embeddings", "cache", "miss")
+
+        embedding = self._embed_with_retry([text], stage="embed")[0]
+
+        if self.cache is not None:
+            self.cache.put(self.model, text, embedding)
+        return embedding
+
+    async def aget_embedding(self, text):
+        """get_embedding এর async version; event loop block করবে না"""
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, self.model, text)
+            if cached is not None:
+                metrics.count("embeddings", "cache", "hit")
+                return cached
+            metrics.count("embeddings", "cache", "miss")
+
+        embedding = (await self._aembed_with_retry([text]))[0]
+
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, self.model, text, embedding)
+        return embedding
+
+    def get_embeddings(self, texts, rejected=None, should_stop=None):
+        """অনেকগুলো text batch করে embed করবে; যেগুলো fail করবে সেগুলোর জায়গায় None থাকবে।
+        rejected (set) দিলে যে text কখনো embed হবে না (খালি, বা API bad request বলেছে) সেগুলো এতে যোগ হবে,
+        যাতে caller সাময়িক error (rate limit, network) থেকে আলাদা করতে পারে।
+        should_stop (True/False দেওয়া callable) দিলে rate limit এর অপেক্ষার মাঝে check হবে"""
+        embeddings = [None] * len(texts)
+
+        # Cache এ না থাকা unique text গুলোই শুধু API তে যাবে
+        if self.cache is not None:
+            embeddings = self.cache.get_many(self.model, texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            if embeddings[i] is None:
+                pending.setdefault(text, []).append(i)
+        if self.cache is not None:
+            metrics.count("embeddings", "cache", "hit", len(texts) - sum(len(indexes) for indexes in pending.values()))
+            metrics.count("embeddings", "cache", "miss", len(pending))
+        if not pending:
+            return embeddings
+
+        missing_texts = list(pending)
+        missing_embeddings = [None] * len(missing_texts)
+        batches = self.make_batches(missing_texts)
+
+        with ThreadPoolExecutor(max_workers=settings.EMBEDDING_CONCURRENCY) as executor:
+            # Context copy করলে worker thread এর stage timing ও চলতি request trace এ যাবে
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run, self._embed_batch_with_retry, [missing_texts[i] for i in batch],
+                    rejected, should_stop
+                ): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                for i, embedding in zip(futures[future], future.result()):
+                    missing_embeddings[i] = embedding
+
+        if self.cache is not None:
+            self.cache.put_many(self.model, missing_texts, missing_embeddings)
+        if rejected is not None:
+            # খালি text make_batches API তে পাঠায় না
+            rejected.update(text for text in missing_texts if not text or not text.strip())
+
+        for text, embedding in zip(missing_texts, missing_embeddings):
+            for i in pending[text]:
+                embeddings[i] = embedding
+
+        return embeddings
+
+    def make_batches(self, texts):
+        """Item count আর per-request token limit মেনে text index গুলোকে batch এ ভাগ করবে"""
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            # Empty text OpenAI reject করে, তাই API তে পাঠাবো না
+            if not text or not text.strip():
+                continue
+
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= settings.EMBEDDING_BATCH_SIZE
+                or current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch_texts, stage="embed_batch"):
+        if self.embedding_limiter is not None:
+            self.embedding_limiter.acquire(sum(estimate_tokens(text) for text in batch_texts), self.lane)
+        with metrics.timed("embeddings", stage):
+            embeddings = self.provider.embed(batch_texts)
+        metrics.count("embeddings", stage, "texts", len(batch_texts))
+        return embeddings
+
+    def _embed_with_retry(self, texts, stage="embed_batch", should_stop=None):
+        """Limiter মেনে embed করবে; error হলে jittered backoff (server retry-after থাকলে সেটা) দিয়ে
+        EMBEDDING_MAX_RETRIES পর্যন্ত চেষ্টা, তারপর raise। Bad input সাথে সাথে raise হবে।
+        Background lane এ rate limit attempt এ গোনা হয় না: ingestion এ row বাদ পড়ার চেয়ে দেরি ভালো,
+        তাই shared limiter ছাড়া পর্যন্ত অপেক্ষা করে আবার চেষ্টা করবে। তবে should_stop True হলে বা
+        EMBEDDING_RATE_LIMIT_MAX_WAIT_SECONDS পার হলে EmbeddingWaitAborted raise করবে"""
+        max_attempts = max(settings.EMBEDDING_MAX_RETRIES, 1)
+        attempt = 0
+        throttled = 0
+        throttled_since = None
+        while True:
+            try:
+                return self._embed_batch(texts, stage)
+            except openai.BadRequestError:
+                raise
+            except Exception as e:
+                if self.lane == BACKGROUND and is_rate_limit_error(e):
+                    if throttled_since is None:
+                        throttled_since = time.monotonic()
+                    if should_stop is not None and should_stop():
+                        raise EmbeddingWaitAborted("Stopped while waiting for the embedding rate limit") from e
+                    waited = time.monotonic() - throttled_since
+                    if waited >= settings.EMBEDDING_RATE_LIMIT_MAX_WAIT_SECONDS:
+                        raise EmbeddingWaitAborted(
+                            f"Embedding API still rate limited after {waited:.0f}s, giving up"
+                        ) from e
+                    time.sleep(self.retry_delay(self.embedding_limiter, e, throttled))
+                    throttled += 1
+                    continue
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise
+                time.sleep(self.retry_delay(self.embedding_limiter, e, attempt - 1))
+
+    async def _aembed_with_retry(self, texts):
+        """_embed_with_retry এর async version (query embedding এর জন্য)"""
+        max_attempts = max(settings.EMBEDDING_MAX_RETRIES, 1)
+        for attempt in range(max_attempts):
+            try:
+                if self.embedding_limiter is not None:
+                    await self.embedding_limiter.aacquire(sum(estimate_tokens(text) for text in texts), self.lane)
+                with metrics.timed("embeddings", "embed"):
+                    return await self.provider.aembed(texts)
+            except openai.BadRequestError:
+                raise
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    raise
+                await asyncio.sleep(self.retry_delay(self.embedding_limiter, e, attempt))
+
+    def _embed_batch_with_retry(self, batch_texts, rejected=None, should_stop=None):
+        """Batch fail করলে retry করবে; তারপরও fail করলে শুধু fail হওয়া অংশটা ভাগ করে আবার চেষ্টা করবে।
+        একটা text এ bad request হলে সেটা rejected এ যাবে"""
+        try:
+            return self._embed_with_retry(batch_texts, should_stop=should_stop)
+        except EmbeddingWaitAborted:
+            raise
+        except Exception as e:
+            error = e
+
+        # Rate limit বা quota তে ভাগ করলে শুধু request সংখ্যা বাড়বে
+        if len(batch_texts) == 1 or is_rate_limit_error(error) or is_quota_error(error):
+            print(f"Embedding error: {error}")
+            if len(batch_texts) == 1 and isinstance(error, openai.BadRequestError) and rejected is not None:
+                rejected.add(batch_texts[0])
+            return [None] * len(batch_texts)
+
+        middle = len(batch_texts) // 2
+        return (
+            self._embed_batch_with_retry(batch_texts[:middle], rejected, should_stop)
+            + self._embed_batch_with_retry(batch_texts[middle:], rejected, should_stop)
         )
-        return response.data[0].embedding
-    
-    # Available OpenAI Models:
-    # text-embedding-ada-002     → 1536 dimensions (পুরানো)
-    # text-embedding-3-small     → 1536 dimensions (নতুন, দ্রুত)
-    # text-embedding-3-large     → 3072 dimensions (সবচেয়ে ভালো)
 
-    def get_chat_response(self, query, context):
-        messages = [
+    def build_chat_messages(self, query, context):
+        return [
             {"role": "system", "content": "You are a helpful assistant. Answer based on the provided context."},
             {"role": "user", "content": f"Context: {context}\n\nQuestion: {query}"}
         ]
-        
-        response = self.client.chat.completions.create(
+
+    def chat_tokens(self, messages):
+        """Limiter এর জন্য prompt আর আনুমানিক completion token"""
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        return prompt_tokens + settings.CHAT_RATE_LIMIT_COMPLETION_TOKENS
+
+    def _chat_create(self, **kwargs):
+        """Limiter মেনে chat completion; rate limit/connection/5xx error এ backoff দিয়ে retry"""
+        tokens = self.chat_tokens(kwargs["messages"])
+        # 0 দিলেও অন্তত একবার request যাবে
+        max_attempts = max(settings.CHAT_MAX_RETRIES, 1)
+        for attempt in range(max_attempts):
+            try:
+                if self.chat_limiter is not None:
+                    self.chat_limiter.acquire(tokens, self.lane)
+                with metrics.timed("openai", "chat_request"):
+                    return self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_CHAT_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(self.retry_delay(self.chat_limiter, e, attempt))
+
+    async def _achat_create(self, **kwargs):
+        """_chat_create এর async version"""
+        tokens = self.chat_tokens(kwargs["messages"])
+        max_attempts = max(settings.CHAT_MAX_RETRIES, 1)
+        for attempt in range(max_attempts):
+            try:
+                if self.chat_limiter is not None:
+                    await self.chat_limiter.aacquire(tokens, self.lane)
+                with metrics.timed("openai", "chat_request"):
+                    return await self.async_client.chat.completions.create(**kwargs)
+            except RETRYABLE_CHAT_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    raise
+                await asyncio.sleep(self.retry_delay(self.chat_limiter, e, attempt))
+
+    def get_chat_response(self, query, context):
+        response = self._chat_create(
+            model="gpt-3.5-turbo",
+            messages=self.build_chat_messages(query, context),
+            temperature=0.7
+        )
+        metrics.record_usage("gpt-3.5-turbo", getattr(response, "usage", None))
+
+        return response.choices[0].message.content
+
+    async def aget_chat_response(self, query, context):
+        response = await self._achat_create(
             model="gpt-3.5-turbo",
-            messages=messages,
+            messages=self.build_chat_messages(query, context),
             temperature=0.7
         )
-        
+        metrics.record_usage("gpt-3.5-turbo", getattr(response, "usage", None))
+
         return response.choices[0].message.content
-    
-    # models 
+
+    async def astream_chat_response(self, query, context):
+        """Completion এর token গুলো আসার সাথে সাথে yield করবে"""
+        started = time.perf_counter()
+        # Stream শুরু হওয়ার আগ পর্যন্তই retry; include_usage দিলে শেষ chunk এ (choices ছাড়া) token usage আসে
+        stream = await self._achat_create(
+            model="gpt-3.5-turbo",
+            messages=self.build_chat_messages(query, context),
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        first_token = True
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token:
+                    metrics.observe("openai", "chat_first_token", time.perf_counter() - started)
+                    first_token = False
+                yield chunk.choices[0].delta.content
+            metrics.record_usage("gpt-3.5-turbo", getattr(chunk, "usage", None))
+
+    # models
     # "gpt-3.5-turbo": "সস্তা, ভালো quality",
-    # "gpt-4": "সেরা quality, দামি", 
+    # "gpt-4": "সেরা quality, দামি",
     # "gpt-4-turbo": "দ্রুত + ভালো",
     # "gpt-3.5-turbo-16k": "বেশি context length"
@@ -0,0 +1,255 @@
+import math
+import re
+import sqlite3
+import threading
+from app.config import settings
+
+# Bengali block আলাদা করে রাখা, কারণ \w vowel sign (combining mark) ধরে না
+TOKEN_PATTERN = re.compile(r"[\w\u0980-\u09FF]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class KeywordIndex:
+    """text_content এর উপর BM25 keyword index, SQLite এ persist করা (in-process)।
+    সব table collection দিয়ে আলাদা, তাই COLLECTION_NAME বদলালে অন্য collection এর point আসবে না।
+    Write একটা shared connection এ (lock সহ), read প্রতি thread এর নিজস্ব connection এ; WAL এ read write কে আটকায় না।"""
+    _conn = None
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    K1 = 1.2
+    B = 0.75
+    QUERY_CHUNK_SIZE = 500
+
+    @classmethod
+    def connect(cls):
+        conn = sqlite3.connect(settings.KEYWORD_INDEX_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @classmethod
+    def get_connection(cls):
+        """Write connection; প্রথমবার schema তৈরি করবে"""
+        with cls._lock:
+            if cls._conn is None:
+                conn = cls.connect()
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS keyword_docs (
+                        collection TEXT NOT NULL,
+                        point_id TEXT NOT NULL,
+                        source TEXT,
+                        length INTEGER NOT NULL,
+                        PRIMARY KEY (collection, point_id)
+                    ) WITHOUT ROWID"""
+                )
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS keyword_postings (
+                        collection TEXT NOT NULL,
+                        term TEXT NOT NULL,
+                        point_id TEXT NOT NULL,
+                        tf INTEGER NOT NULL,
+                        PRIMARY KEY (collection, term, point_id)
+                    ) WITHOUT ROWID"""
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_keyword_postings_point ON keyword_postings(collection, point_id)"
+                )
+                # df আর doc count/length আগেই হিসাব করা থাকে, তাই query তে COUNT(*) scan লাগে না
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS keyword_terms (
+                        collection TEXT NOT NULL,
+                        term TEXT NOT NULL,
+                        df INTEGER NOT NULL,
+                        PRIMARY KEY (collection, term)
+                    ) WITHOUT ROWID"""
+                )
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS keyword_stats (
+                        collection TEXT PRIMARY KEY,
+                        doc_count INTEGER NOT NULL,
+                        total_length INTEGER NOT NULL
+                    )"""
+                )
+                conn.commit()
+                cls._conn = conn
+            return cls._conn
+
+    @classmethod
+    def get_read_connection(cls):
+        if cls._conn is None:
+            # Schema তৈরি হওয়ার পরেই read connection খুলবো
+            cls.get_connection()
+        conn = getattr(cls._local, "conn", None)
+        if conn is None:
+            conn = cls._local.conn = cls.connect()
+        return conn
+
+    def __init__(self, collection_name=None):
+        self.collection = collection_name or settings.COLLECTION_NAME
+        self.conn = self.get_connection()
+
+    def _chunks(self, items):
+        items = list(items)
+        for start in range(0, len(items), self.QUERY_CHUNK_SIZE):
+            yield items[start:start + self.QUERY_CHUNK_SIZE]
+
+    def _delete(self, point_ids):
+        """Write lock ধরে call করতে হবে; df আর stats থেকেও বাদ দিবে"""
+        for chunk in self._chunks(point_ids):
+            placeholders = ",".join("?" * len(chunk))
+            params = [self.collection, *chunk]
+            count, total_length = self.conn.execute(
+                f"""SELECT COUNT(*), COALESCE(SUM(length), 0) FROM keyword_docs
+                WHERE collection = ? AND point_id IN ({placeholders})""",
+                params
+            ).fetchone()
+            if not count:
+                continue
+            terms = self.conn.execute(
+                f"""SELECT term, COUNT(*) FROM keyword_postings
+                WHERE collection = ? AND point_id IN ({placeholders}) GROUP BY term""",
+                params
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE keyword_terms SET df = df - ? WHERE collection = ? AND term = ?",
+                [(removed, self.collection, term) for term, removed in terms]
+            )
+            self.conn.executemany(
+                "DELETE FROM keyword_terms WHERE collection = ? AND term = ? AND df <= 0",
+                [(self.collection, term) for term, _ in terms]
+            )
+            self.conn.execute(
+                "UPDATE keyword_stats SET doc_count = doc_count - ?, total_length = total_length - ? WHERE collection = ?",
+                (count, total_length, self.collection)
+            )
+            self.conn.execute(
+                f"DELETE FROM keyword_postings WHERE collection = ? AND point_id IN ({placeholders})", params
+            )
+            self.conn.execute(f"DELETE FROM keyword_docs WHERE collection = ? AND point_id IN ({placeholders})", params)
+
+    def add_documents(self, documents):
+        """(point_id, text, source) গুলো index এ যোগ করবে; আগে থাকলে replace হবে"""
+        # একই batch এ একই id থাকলে শেষেরটা থাকবে
+        documents = list({
+            str(point_id): (str(point_id), text, source) for point_id, text, source in documents
+        }.values())
+        if not documents:
+            return
+
+        docs_rows = []
+        postings_rows = []
+        doc_freqs = {}
+        for point_id, text, source in documents:
+            tokens = tokenize(text)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            docs_rows.append((self.collection, point_id, source, len(tokens)))
+            postings_rows.extend((self.collection, term, point_id, tf) for term, tf in counts.items())
+            for term in counts:
+                doc_freqs[term] = doc_freqs.get(term, 0) + 1
+
+        with self._lock:
+            self._delete([doc[1] for doc in docs_rows])
+            self.conn.executemany(
+                "INSERT INTO keyword_docs (collection, point_id, source, length) VALUES (?, ?, ?, ?)", docs_rows
+            )
+            self.conn.executemany(
+                "INSERT INTO keyword_postings (collection, term, point_id, tf) VALUES (?, ?, ?, ?)", postings_rows
+            )
+            self.conn.executemany(
+                """INSERT INTO keyword_terms (collection, term, df) VALUES (?, ?, ?)
+                ON CONFLICT (collection, term) DO UPDATE SET df = df + excluded.df""",
+                [(self.collection, term, df) for term, df in doc_freqs.items()]
+            )
+            self.conn.execute(
+                """INSERT INTO keyword_stats (collection, doc_count, total_length) VALUES (?, ?, ?)
+                ON CONFLICT (collection) DO UPDATE SET doc_count = doc_count + excluded.doc_count,
+                    total_length = total_length + excluded.total_length""",
+                (self.collection, len(docs_rows), sum(row[3] for row in docs_rows))
+            )
+            self.conn.commit()
+
+    def delete_documents(self, point_ids):
+        with self._lock:
+            self._delete([str(point_id) for point_id in point_ids])
+            self.conn.commit()
+
+    def missing_documents(self, point_ids):
+        """যে ID গুলো এখনো index এ নেই সেগুলো return করবে (পুরানো collection backfill এর জন্য)"""
+        point_ids = [str(point_id) for point_id in point_ids]
+        conn = self.get_read_connection()
+        found = set()
+        for chunk in self._chunks(point_ids):
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT point_id FROM keyword_docs WHERE collection = ? AND point_id IN ({placeholders})",
+                [self.collection, *chunk]
+            )
+            found.update(row[0] for row in rows)
+        return [point_id for point_id in point_ids if point_id not in found]
+
+    def search(self, query, limit=20, source=None):
+        """BM25 score অনুযায়ী [(point_id, score, coverage)] return করবে; coverage = মিলে যাওয়া scoring term এর অনুপাত।
+        Scoring SQL এই হয়, Python এ শুধু top limit টা আসে"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        conn = self.get_read_connection()
+        stats = conn.execute(
+            "SELECT doc_count, total_length FROM keyword_stats WHERE collection = ?", (self.collection,)
+        ).fetchone()
+        if not stats or not stats[0]:
+            return []
+        total_docs, total_length = stats
+        avg_length = (total_length / total_docs) or 1.0
+
+        placeholders = ",".join("?" * len(terms))
+        doc_freqs = dict(conn.execute(
+            f"SELECT term, df FROM keyword_terms WHERE collection = ? AND term IN ({placeholders})",
+            [self.collection, *terms]
+        ))
+        # অনেক document এ থাকা term (যেমন column name) এর posting list বিশাল, আর score এ অবদানও কম।
+        # ছোট index এ KEYWORD_ALWAYS_SCORE_DF পর্যন্ত df এর term সবসময় score হবে
+        max_df = max(total_docs * settings.KEYWORD_MAX_DF_RATIO, settings.KEYWORD_ALWAYS_SCORE_DF)
+        scoring_terms = [term for term in terms if 0 < doc_freqs.get(term, 0) <= max_df]
+        if not scoring_terms:
+            return []
+
+        idfs = []
+        for term in scoring_terms:
+            df = doc_freqs[term]
+            idfs.extend((term, math.log(1 + (total_docs - df + 0.5) / (df + 0.5))))
+        values = ",".join("(?, ?)" for _ in scoring_terms)
+        sql = f"""WITH q(term, idf) AS (VALUES {values})
+            SELECT p.point_id,
+                SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * d.length / ?))) AS score,
+                COUNT(*) AS matched
+            FROM q
+            JOIN keyword_postings p ON p.collection = ? AND p.term = q.term
+            JOIN keyword_docs d ON d.collection = p.collection AND d.point_id = p.point_id"""
+        params = [*idfs, self.K1, self.K1, self.B, self.B, avg_length, self.collection]
+        if source:
+            sql += " WHERE d.source = ?"
+            params.append(source)
+        sql += " GROUP BY p.point_id ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+
+        return [
+            (point_id, score, matched / len(scoring_terms))
+            for point_id, score, matched in conn.execute(sql, params)
+        ]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """একাধিক ranked ID list কে RRF দিয়ে এক list এ মিলাবে: [(point_id, fused_score)]"""
+    scores = {}
+    for ranking in rankings:
+        for rank, point_id in enumerate(ranking):
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,53 @@
+from app.config import settings
+from app.database.metadata_store import MetadataStore
+
+
+def row_text(columns, values):
+    """Clean করা value থেকে text_content বানাবে; format_row এর text এর সাথে হুবহু মিলবে"""
+    return " | ".join(
+        f"{col}: {value}" for col, value in zip(columns, values) if value and value != "N/A"
+    )
+
+
+def build_payload(source_field, source_name, source_id, row_index, row_data, text_content, values=None):
+    """Point payload বানাবে। columns আর sql_query source registry তে থাকে, প্রতিটা point এ না।
+    PAYLOAD_COMPACT হলে শুধু values (registry এর প্রতিটা column এর জন্য একটা, duplicate column সহ) থাকবে,
+    data dict আর text_content পরে registry থেকে বানানো যাবে। values না দিলে সবসময় পুরো payload।"""
+    payload = {
+        source_field: source_name,
+        "source_id": source_id,
+        "row_index": row_index
+    }
+    if settings.PAYLOAD_COMPACT and values is not None:
+        payload["values"] = list(values)
+    else:
+        payload["data"] = row_data
+        payload["text_content"] = text_content
+    return payload
+
+
+def is_legacy_payload(payload):
+    """আগের version এর payload (প্রতিটা point এ columns/sql_query সহ)"""
+    return "columns" in payload or "sql_query" in payload or "source_id" not in payload
+
+
+def expand_payload(payload, metadata=None):
+    """Compact/legacy যেকোনো payload থেকে search এর জন্য data আর text_content সহ পুরো payload return করবে"""
+    if "data" in payload and "text_content" in payload:
+        return payload
+
+    metadata = metadata or MetadataStore()
+    source = metadata.get_source(payload.get("source_id"))
+    columns = source["columns"] if source else []
+
+    expanded = dict(payload)
+    if "data" not in expanded:
+        values = payload.get("values", [])
+        expanded["data"] = dict(zip(columns, values))
+        if "text_content" not in expanded:
+            # Join এর মত duplicate column এ data dict শেষ value রাখে, কিন্তু embed হওয়া text এ সবগুলো ছিল
+            expanded["text_content"] = row_text(columns, values)
+    if "text_content" not in expanded:
+        expanded["text_content"] = row_text(expanded["data"].keys(), expanded["data"].values())
+    expanded.pop("values", None)
+    return expanded
@@ -0,0 +1,152 @@
+"""OpenAI এর request/token per minute limit মেনে চলার process-wide token bucket।
+Chat (interactive) lane ingestion (background) এর আগে পায়: interactive কেউ অপেক্ষায় থাকলে background
+নতুন request নিবে না, আর bucket এর একটা reserve অংশ background কখনো খরচ করতে পারবে না।"""
+import asyncio
+import random
+import threading
+import time
+from app import metrics
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# একবারে সর্বোচ্চ এতক্ষণ ঘুমিয়ে আবার হিসাব করবে, যাতে নতুন interactive request এলে background থামে
+MAX_POLL_SECONDS = 0.25
+
+
+def retry_after(error):
+    """OpenAI error response এর retry-after-ms/retry-after header (second এ); না থাকলে None"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value:
+            try:
+                return max(float(value) * scale, 0.0)
+            except ValueError:
+                # HTTP-date format, exponential backoff ই ব্যবহার করবো
+                pass
+    return None
+
+
+def is_quota_error(error):
+    """Billing quota শেষ হলেও 429 আসে, কিন্তু অপেক্ষা করলে ঠিক হয় না"""
+    return getattr(error, "status_code", None) == 429 and getattr(error, "code", None) == "insufficient_quota"
+
+
+def is_rate_limit_error(error):
+    return getattr(error, "status_code", None) == 429 and not is_quota_error(error)
+
+
+def backoff_delay(attempt, error=None, base=0.5, cap=30.0):
+    """Server retry-after দিলে সেটা (একটু jitter সহ, যাতে সব thread একসাথে না ফেরে),
+    নাহলে full jitter exponential backoff"""
+    server_delay = retry_after(error) if error is not None else None
+    if server_delay is not None:
+        return min(server_delay, cap) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """capacity (per minute limit) পর্যন্ত জমে, প্রতি second এ capacity/60 করে ভরে"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, floor=0.0):
+        """amount নেয়ার পরও level floor এর উপরে থাকতে আর কত second লাগবে"""
+        missing = amount + floor - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class RateLimiter:
+    """একটা API (embeddings বা chat) এর request আর token দুই bucket; সব thread আর event loop share করে"""
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, interactive_reserve=0.2):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.interactive_reserve = interactive_reserve
+        self.paused_until = 0.0
+        self.interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens, lane):
+        """নিতে পারলে 0, নাহলে আবার চেষ্টার আগে কত second অপেক্ষা করতে হবে"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if lane == BACKGROUND and self.interactive_waiting:
+                return MAX_POLL_SECONDS
+
+            reserve = self.interactive_reserve if lane == BACKGROUND else 0.0
+            needs = []
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                bucket.refill(now)
+                floor = bucket.capacity * reserve
+                # Bucket এর চেয়ে বড় request ও যেন কখনো না কখনো যেতে পারে
+                needs.append((bucket, min(amount, bucket.capacity - floor), floor))
+
+            wait = max(bucket.wait_time(amount, floor) for bucket, amount, floor in needs)
+            if wait > 0:
+                return wait
+            for bucket, amount, _ in needs:
+                bucket.level -= amount
+            return 0.0
+
+    def _set_waiting(self, lane, delta):
+        if lane == INTERACTIVE:
+            with self._lock:
+                self.interactive_waiting += delta
+
+    def acquire(self, tokens=0, lane=INTERACTIVE):
+        """Thread থেকে blocking acquire; অপেক্ষার সময় throttled counter এ যাবে"""
+        wait = self._try_acquire(tokens, lane)
+        if not wait:
+            return
+        started = time.monotonic()
+        self._set_waiting(lane, 1)
+        try:
+            while wait:
+                time.sleep(min(wait, MAX_POLL_SECONDS))
+                wait = self._try_acquire(tokens, lane)
+        finally:
+            self._set_waiting(lane, -1)
+            metrics.record_throttle(self.name, lane, "limiter", time.monotonic() - started)
+
+    async def aacquire(self, tokens=0, lane=INTERACTIVE):
+        """acquire এর async version; event loop block করবে না"""
+        wait = self._try_acquire(tokens, lane)
+        if not wait:
+            return
+        started = time.monotonic()
+        self._set_waiting(lane, 1)
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+                wait = self._try_acquire(tokens, lane)
+        finally:
+            self._set_waiting(lane, -1)
+            metrics.record_throttle(self.name, lane, "limiter", time.monotonic() - started)
+
+    def pause(self, seconds):
+        """Server 429 দিলে process এর সব caller কে এতক্ষণ থামাবে"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def retry_delay(self, error, attempt, lane=INTERACTIVE):
+        """Retry এর আগে কত second ঘুমাতে হবে; 429 হলে পুরো limiter ও ততক্ষণ থামবে"""
+        delay = backoff_delay(attempt, error)
+        if is_rate_limit_error(error):
+            self.pause(delay)
+        metrics.record_throttle(self.name, lane, "backoff", delay)
+        return delay
@@ -0,0 +1,132 @@
+"""DB row কে (row_data, text_content, fingerprint) এ নেয়ার formatter।
+শুধু standard library import করে, যাতে process pool এর worker হালকা থাকে।"""
+import datetime
+import decimal
+import hashlib
+import json
+from json.encoder import encode_basestring as encode_json_string
+
+NUMERIC_TYPE_NAMES = ('int', 'decimal', 'numeric', 'float', 'real', 'money')
+DATE_TYPE_NAMES = ('date', 'time', 'datetime')
+
+# এই type গুলোর str() এ শুরু/শেষে বা পরপর দুইটা whitespace থাকে না, তাই split/join করলে কিছু বদলায় না
+PLAIN_TYPES = frozenset({int, float, bool, decimal.Decimal, datetime.datetime, datetime.date, datetime.time})
+
+
+def default_value(column_type):
+    """Data type অনুসারে null এর default value"""
+    column_type = str(column_type).lower()
+
+    # Numeric types
+    if any(t in column_type for t in NUMERIC_TYPE_NAMES):
+        return "0"
+
+    # Date/Time types
+    if any(t in column_type for t in DATE_TYPE_NAMES):
+        return "1900-01-01"
+
+    # Boolean types
+    if 'bit' in column_type:
+        return "0"
+
+    # String types (varchar, nvarchar, text, char, etc.)
+    return "N/A"
+
+
+def clean_value(value, default):
+    """Null/blank হলে default, নাহলে trim করে একাধিক whitespace কে একটা space"""
+    if value is None:
+        return default
+    return " ".join(str(value).split()) or default
+
+
+def make_converter(column_type):
+    """Column এর type দেখে একবারই converter বাছবে। Converter পুরো column এর value list নিয়ে কাজ করে,
+    তাই cell প্রতি function call হয় না; value এর type না মিললে সাধারণ clean_value"""
+    default = default_value(column_type)
+
+    if column_type in PLAIN_TYPES:
+        return lambda values: [
+            str(value) if value.__class__ is column_type
+            else default if value is None
+            else clean_value(value, default)
+            for value in values
+        ]
+
+    if column_type is str:
+        return lambda values: [
+            (" ".join(value.split()) or default) if value.__class__ is str
+            else default if value is None
+            else clean_value(value, default)
+            for value in values
+        ]
+
+    return lambda values: [
+        default if value is None else (" ".join(str(value).split()) or default) for value in values
+    ]
+
+
+def fingerprint(row_data):
+    return hashlib.sha256(
+        json.dumps(row_data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+class RowFormatter:
+    """একটা result set এর জন্য একবার বানানো হয়: column প্রতি converter, "col: " prefix আর
+    fingerprint JSON এর sorted key অংশ আগেই তৈরি থাকে। Row গুলো column ধরে (transpose করে) format হয়।"""
+
+    def __init__(self, columns, column_types):
+        self.columns = list(columns)
+        self.converters = [make_converter(column_type) for column_type in column_types]
+        self.prefixes = [f"{col}: " for col in self.columns]
+
+        # json.dumps(row_data, sort_keys=True) হাতে বানানো: duplicate column এ dict শেষ value টা রাখে
+        last_index = {col: i for i, col in enumerate(self.columns)}
+        keys = sorted(last_index)
+        self.json_keys = [json.dumps(key, ensure_ascii=False) + ": " for key in keys]
+        self.json_order = [last_index[key] for key in keys]
+
+    def format_values(self, rows):
+        """(value_rows, texts, fingerprints); row_data dict ছাড়া, process pool থেকে কম data ফেরত পাঠাতে"""
+        if not rows:
+            return [], [], []
+        if not self.columns:
+            return [()] * len(rows), [""] * len(rows), [fingerprint({})] * len(rows)
+
+        values = [convert(column) for convert, column in zip(self.converters, zip(*rows))]
+        # text এ শুধু meaningful ("N/A" না) value থাকে
+        pieces = [
+            [prefix + value if value != "N/A" else None for value in column]
+            for prefix, column in zip(self.prefixes, values)
+        ]
+        texts = [" | ".join(filter(None, row_pieces)) for row_pieces in zip(*pieces)]
+
+        json_pieces = [
+            [key + encode_json_string(value) for value in values[i]]
+            for key, i in zip(self.json_keys, self.json_order)
+        ]
+        fingerprints = [
+            hashlib.sha256(("{" + ", ".join(row_pieces) + "}").encode("utf-8")).hexdigest()
+            for row_pieces in zip(*json_pieces)
+        ]
+
+        return list(zip(*values)), texts, fingerprints
+
+    def format(self, row):
+        """(row_data, text_content)"""
+        value_rows, texts, _ = self.format_values([row])
+        return dict(zip(self.columns, value_rows[0])), texts[0]
+
+    def format_many(self, rows):
+        """[(row_data, text_content, fingerprint)]"""
+        value_rows, texts, fingerprints = self.format_values(rows)
+        return [
+            (dict(zip(self.columns, value_row)), text, row_fingerprint)
+            for value_row, text, row_fingerprint in zip(value_rows, texts, fingerprints)
+        ]
+
+
+def format_chunk(columns, column_types, rows):
+    """Process pool worker: converter গুলো pickle হয় না, তাই worker এ formatter বানাবে"""
+    return RowFormatter(columns, column_types).format_values(rows)
@@ -1,45 +1,382 @@
+import asyncio
 from app.database.qdrant_client import QdrantService
 from app.services.embeddings_service import EmbeddingsService
+from app.services.answer_cache import AnswerCache
+from app.services.keyword_index import KeywordIndex, reciprocal_rank_fusion, tokenize
+from app.services.context_builder import ContextBuilder
+from app.config import settings
+from app import metrics
 
 class SearchService:
     def __init__(self):
         self.qdrant = QdrantService()
         self.embeddings = EmbeddingsService()
+        self.keyword_index = KeywordIndex()
+        self.answer_cache = AnswerCache.get_instance()
+        self.context_builder = ContextBuilder()
     
-    def search_and_respond(self, query):
-        query_embedding = self.embeddings.get_embedding(query)
+    def is_confident_keyword_match(self, query, keyword_hits):
+        """ছোট lookup query (invoice no, SKU, নাম) এর সব term একটা row এ স্পষ্টভাবে মিললে True"""
+        terms = set(tokenize(query))
+        if not keyword_hits or not terms or len(terms) > settings.KEYWORD_ONLY_MAX_TERMS:
+            return False
         
+        _, top_score, top_coverage = keyword_hits[0]
+        if top_coverage < 1.0:
+            return False
+        
+        if len(keyword_hits) > 1 and top_score < keyword_hits[1][1] * settings.KEYWORD_CONFIDENT_RATIO:
+            return False
+        return True
+    
+    def keyword_results(self, keyword_hits, limit):
+        """Keyword hit গুলোর payload Qdrant থেকে এনে [(payload, score)] বানাবে"""
+        top_hits = keyword_hits[:limit]
+        records = self.qdrant.retrieve([point_id for point_id, _, _ in top_hits])
+        scores = {point_id: score for point_id, score, _ in top_hits}
+        return [(record.payload, scores[str(record.id)]) for record in records]
+    
+    def fuse_results(self, dense_results, keyword_hits, limit):
+        """Vector আর keyword ranking RRF দিয়ে মিলিয়ে [(payload, score)] return করবে"""
+        return self.fuse_many([dense_results], [keyword_hits], limit)[0]
+    
+    def fuse_many(self, dense_lists, keyword_lists, limit):
+        """fuse_results এর batch version; keyword-only point গুলোর payload সব query মিলিয়ে এক retrieve এ আনবে"""
+        fused_lists = []
+        payloads = {}
+        for dense_results, keyword_hits in zip(dense_lists, keyword_lists):
+            fused_lists.append(reciprocal_rank_fusion([
+                [str(result.id) for result in dense_results],
+                [point_id for point_id, _, _ in keyword_hits]
+            ])[:limit])
+            for result in dense_results:
+                payloads[str(result.id)] = result.payload
+        
+        keyword_only_ids = list(dict.fromkeys(
+            point_id for fused in fused_lists for point_id, _ in fused if point_id not in payloads
+        ))
+        if keyword_only_ids:
+            for record in self.qdrant.retrieve(keyword_only_ids):
+                payloads[str(record.id)] = record.payload
+        
+        return [
+            [(payloads[point_id], score) for point_id, score in fused if point_id in payloads]
+            for fused in fused_lists
+        ]
+    
+    def retrieve(self, query, limit=None, source=None):
+        """Answer cache দেখবে, না পেলে keyword + vector hybrid search করবে।
+        source দিলে শুধু সেই table/source এর মধ্যে খুঁজবে।
+        (cached_answer, search_results, query_embedding) return করবে"""
+        limit = limit or settings.SEARCH_LIMIT
+        if self.answer_cache is not None:
+            with metrics.timed("search", "answer_cache"):
+                cached = self.answer_cache.get(query, scope=source)
+            if cached is not None:
+                metrics.record_path("answer_cache")
+                return cached, None, None
+        
+        with metrics.timed("search", "keyword"):
+            keyword_hits = self.keyword_index.search(query, limit=settings.HYBRID_CANDIDATES, source=source)
+        
+        # Confident keyword match হলে embedding call লাগবে না
+        if self.is_confident_keyword_match(query, keyword_hits):
+            with metrics.timed("search", "keyword_fetch"):
+                results = self.keyword_results(keyword_hits, limit)
+            if results:
+                metrics.record_path("keyword")
+                return None, results, None
+        
+        with metrics.timed("search", "query_embedding"):
+            query_embedding = self.embeddings.get_embedding(query)
+        if self.answer_cache is not None:
+            with metrics.timed("search", "semantic_cache"):
+                cached = self.answer_cache.get_similar(query_embedding, scope=source, query=query)
+            if cached is not None:
+                metrics.record_path("semantic_cache")
+                return cached, None, query_embedding
+        
+        self.qdrant.check_embedding(self.embeddings.model, self.embeddings.dimension)
+        with metrics.timed("search", "vector"):
+            dense_results = self.qdrant.search(query_embedding, limit=settings.HYBRID_CANDIDATES, source=source)
+        with metrics.timed("search", "fuse"):
+            results = self.fuse_results(dense_results, keyword_hits, limit)
+        metrics.record_path("hybrid")
+        return None, results, query_embedding
+    
+    async def aretrieve(self, query, limit=None, source=None):
+        """retrieve এর async version; blocking অংশগুলো thread এ চলবে"""
+        limit = limit or settings.SEARCH_LIMIT
+        if self.answer_cache is not None:
+            with metrics.timed("search", "answer_cache"):
+                cached = self.answer_cache.get(query, scope=source)
+            if cached is not None:
+                metrics.record_path("answer_cache")
+                return cached, None, None
+        
+        with metrics.timed("search", "keyword"):
+            keyword_hits = await asyncio.to_thread(self.keyword_index.search, query, settings.HYBRID_CANDIDATES, source)
+        
+        if self.is_confident_keyword_match(query, keyword_hits):
+            with metrics.timed("search", "keyword_fetch"):
+                results = await asyncio.to_thread(self.keyword_results, keyword_hits, limit)
+            if results:
+                metrics.record_path("keyword")
+                return None, results, None
+        
+        with metrics.timed("search", "query_embedding"):
+            query_embedding = await self.embeddings.aget_embedding(query)
+        if self.answer_cache is not None:
+            with metrics.timed("search", "semantic_cache"):
+                cached = self.answer_cache.get_similar(query_embedding, scope=source, query=query)
+            if cached is not None:
+                metrics.record_path("semantic_cache")
+                return cached, None, query_embedding
+        
+        await asyncio.to_thread(self.qdrant.check_embedding, self.embeddings.model, self.embeddings.dimension)
+        with metrics.timed("search", "vector"):
+            dense_results = await asyncio.to_thread(
+                self.qdrant.search, query_embedding, settings.HYBRID_CANDIDATES, source
+            )
+        with metrics.timed("search", "fuse"):
+            results = await asyncio.to_thread(self.fuse_results, dense_results, keyword_hits, limit)
+        metrics.record_path("hybrid")
+        return None, results, query_embedding
+    
+    def retrieve_batch(self, questions, limit=None):
+        """retrieve এর batch version: [(query, source)] এর জন্য একই order এ (cached, search_results, query_embedding)।
+        Embedding গুলো এক batch এ, vector search এক multi-search এ হবে। কোনো প্রশ্নের retrieval fail করলে
+        সেই জায়গায় Exception থাকবে, বাকি প্রশ্ন চলবে; শুধু EmbeddingMismatchError পুরো batch এর জন্য raise হবে"""
+        limit = limit or settings.SEARCH_LIMIT
+        retrieved = [None] * len(questions)
+        keyword_hits = {}
+        
+        for i, (query, source) in enumerate(questions):
+            try:
+                if self.answer_cache is not None:
+                    cached = self.answer_cache.get(query, scope=source)
+                    if cached is not None:
+                        metrics.record_path("answer_cache")
+                        retrieved[i] = (cached, None, None)
+                        continue
+                
+                with metrics.timed("search", "keyword"):
+                    hits = self.keyword_index.search(query, limit=settings.HYBRID_CANDIDATES, source=source)
+                if self.is_confident_keyword_match(query, hits):
+                    with metrics.timed("search", "keyword_fetch"):
+                        results = self.keyword_results(hits, limit)
+                    if results:
+                        metrics.record_path("keyword")
+                        retrieved[i] = (None, results, None)
+                        continue
+                keyword_hits[i] = hits
+            except Exception as e:
+                print(f"Batch retrieve error: {e}")
+                retrieved[i] = e
+        
+        if not keyword_hits:
+            return retrieved
+        
+        pending = list(keyword_hits)
+        try:
+            with metrics.timed("search", "batch_embedding"):
+                embeddings = self.embeddings.get_embeddings([questions[i][0] for i in pending])
+        except Exception as e:
+            # Embedding না পেলে keyword result দিয়েই উত্তর দিবো
+            print(f"Batch embedding error: {e}")
+            embeddings = [None] * len(pending)
+        
+        dense_pending = []
+        for i, query_embedding in zip(pending, embeddings):
+            try:
+                if query_embedding is None:
+                    # Embedding fail করলে keyword result দিয়েই উত্তর দিবো
+                    retrieved[i] = (None, self.fuse_results([], keyword_hits[i], limit), None)
+                    continue
+                if self.answer_cache is not None:
+                    cached = self.answer_cache.get_similar(
+                        query_embedding, scope=questions[i][1], query=questions[i][0]
+                    )
+                    if cached is not None:
+                        metrics.record_path("semantic_cache")
+                        retrieved[i] = (cached, None, query_embedding)
+                        continue
+                dense_pending.append((i, query_embedding))
+            except Exception as e:
+                print(f"Batch retrieve error: {e}")
+                retrieved[i] = e
+        
+        if not dense_pending:
+            return retrieved
+        
+        self.qdrant.check_embedding(self.embeddings.model, self.embeddings.dimension)
         try:
-            search_results = self.qdrant.search(query_embedding)
+            with metrics.timed("search", "batch_vector"):
+                dense_lists = self.qdrant.search_batch(
+                    [query_embedding for _, query_embedding in dense_pending],
+                    limit=settings.HYBRID_CANDIDATES,
+                    sources=[questions[i][1] for i, _ in dense_pending]
+                )
+        except ValueError:
+            # কোন query টা fail করলো জানা নেই, তাই একটা একটা করে search করবো
+            dense_lists = []
+            for i, query_embedding in dense_pending:
+                try:
+                    dense_lists.append(
+                        self.qdrant.search(query_embedding, limit=settings.HYBRID_CANDIDATES, source=questions[i][1])
+                    )
+                except ValueError as e:
+                    dense_lists.append(e)
+        
+        searched = []
+        for (i, query_embedding), dense in zip(dense_pending, dense_lists):
+            if isinstance(dense, Exception):
+                retrieved[i] = dense
+            else:
+                searched.append((i, query_embedding, dense))
+        with metrics.timed("search", "fuse"):
+            fused = self.fuse_many(
+                [dense for _, _, dense in searched], [keyword_hits[i] for i, _, _ in searched], limit
+            )
+        for (i, query_embedding, _), results in zip(searched, fused):
+            metrics.record_path("hybrid")
+            retrieved[i] = (None, results, query_embedding)
+        
+        return retrieved
+    
+    def cache_answer(self, query, query_embedding, response, sources, source=None):
+        if self.answer_cache is not None:
+            self.answer_cache.put(query, query_embedding, response, sources, scope=source)
+    
+    def build_context(self, search_results, query=""):
+        """Search result থেকে token budget এর মধ্যে (context, sources) বানাবে"""
+        return self.context_builder.build(query, search_results)
+    
+    def search_and_respond(self, query, source=None):
+        try:
+            cached, search_results, query_embedding = self.retrieve(
+                query, limit=settings.CONTEXT_CANDIDATES, source=source
+            )
         except ValueError:
             # Collection not found, return default message
             return "দুঃখিত, কোনো ডেটা ট্রেইন করা হয়নি। প্রথমে ডেটা ট্রেইন করুন।", []
         
-        context_parts = []
-        sources = []
-        
-        for result in search_results:
-            payload = result.payload
-            context_parts.append(payload["text_content"])
-            
-            source_info = {
-                "data": payload.get("data", {}),
-                "score": result.score
-            }
-            
-            if "table_name" in payload:
-                source_info["source"] = payload["table_name"]
-            
-            if "source_name" in payload:
-                source_info["source"] = payload["source_name"]
-            
-            sources.append(source_info)
+        if cached is not None:
+            return cached
         
-        context = "\n\n".join(context_parts)
+        with metrics.timed("search", "context"):
+            context, sources = self.build_context(search_results, query)
         
         if not context.strip():
             return "দুঃখিত, আপনার প্রশ্নের উত্তর খুঁজে পাইনি।", []
         
         response = self.embeddings.get_chat_response(query, context)
+        self.cache_answer(query, query_embedding, response, sources, source)
+        
+        return response, sources
+    
+    async def asearch_and_respond(self, query, source=None):
+        """search_and_respond এর async version, যাতে একাধিক chat একসাথে চলতে পারে"""
+        try:
+            cached, search_results, query_embedding = await self.aretrieve(
+                query, limit=settings.CONTEXT_CANDIDATES, source=source
+            )
+        except ValueError:
+            # Collection not found, return default message
+            return "দুঃখিত, কোনো ডেটা ট্রেইন করা হয়নি। প্রথমে ডেটা ট্রেইন করুন।", []
+        
+        if cached is not None:
+            return cached
+        
+        # Candidate বেশি থাকায় CPU কাজ; event loop block না করে thread এ
+        with metrics.timed("search", "context"):
+            context, sources = await asyncio.to_thread(self.build_context, search_results, query)
+        
+        if not context.strip():
+            return "দুঃখিত, আপনার প্রশ্নের উত্তর খুঁজে পাইনি।", []
+        
+        response = await self.embeddings.aget_chat_response(query, context)
+        self.cache_answer(query, query_embedding, response, sources, source)
+        
+        return response, sources
+    
+    async def astream_search_and_respond(self, query, source=None):
+        """আগে sources event, তারপর token event গুলো, শেষে done event yield করবে"""
+        try:
+            cached, search_results, query_embedding = await self.aretrieve(
+                query, limit=settings.CONTEXT_CANDIDATES, source=source
+            )
+        except ValueError:
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "content": "দুঃখিত, কোনো ডেটা ট্রেইন করা হয়নি। প্রথমে ডেটা ট্রেইন করুন।"}
+            yield {"type": "done"}
+            return
+        
+        if cached is not None:
+            response, sources = cached
+            yield {"type": "sources", "sources": sources}
+            yield {"type": "token", "content": response}
+            yield {"type": "done"}
+            return
+        
+        # Candidate বেশি থাকায় CPU কাজ; event loop block না করে thread এ
+        with metrics.timed("search", "context"):
+            context, sources = await asyncio.to_thread(self.build_context, search_results, query)
+        
+        if not context.strip():
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "content": "দুঃখিত, আপনার প্রশ্নের উত্তর খুঁজে পাইনি।"}
+            yield {"type": "done"}
+            return
+        
+        yield {"type": "sources", "sources": sources}
+        
+        tokens = []
+        async for token in self.embeddings.astream_chat_response(query, context):
+            tokens.append(token)
+            yield {"type": "token", "content": token}
+        self.cache_answer(query, query_embedding, "".join(tokens), sources, source)
+        
+        # Header আগেই চলে গেছে, তাই trace চাইলে stage breakdown done event এ যাবে
+        trace = metrics.current_trace()
+        if trace is not None:
+            yield {"type": "done", "trace": trace.to_dict()}
+        else:
+            yield {"type": "done"}
+    
+    async def abatch_search_and_respond(self, questions):
+        """অনেক প্রশ্ন [(query, source)] একসাথে: retrieval এক batch এ, তারপর chat completion গুলো
+        CHAT_BATCH_CONCURRENCY পর্যন্ত একসাথে। প্রশ্নের order এ (response, sources) অথবা Exception এর list দিবে;
+        একই প্রশ্ন একাধিকবার থাকলে একবারই উত্তর বানাবে"""
+        unique = list(dict.fromkeys(questions))
+        retrieved = await asyncio.to_thread(self.retrieve_batch, unique, settings.CONTEXT_CANDIDATES)
+        
+        semaphore = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+        
+        async def respond(query, source, item):
+            if isinstance(item, ValueError):
+                # Collection not found, return default message
+                return "দুঃখিত, কোনো ডেটা ট্রেইন করা হয়নি। প্রথমে ডেটা ট্রেইন করুন।", []
+            if isinstance(item, Exception):
+                # এই প্রশ্নের retrieval fail করেছে; gather এ অন্য প্রশ্নের মত error হিসেবে যাবে
+                raise item
+            cached, search_results, query_embedding = item
+            if cached is not None:
+                return cached
+            
+            with metrics.timed("search", "context"):
+                context, sources = await asyncio.to_thread(self.build_context, search_results, query)
+            if not context.strip():
+                return "দুঃখিত, আপনার প্রশ্নের উত্তর খুঁজে পাইনি।", []
+            
+            async with semaphore:
+                response = await self.embeddings.aget_chat_response(query, context)
+            self.cache_answer(query, query_embedding, response, sources, source)
+            return response, sources
         
-        return response, sources
\ No newline at end of file
+        answers = await asyncio.gather(
+            *(respond(query, source, item) for (query, source), item in zip(unique, retrieved)),
+            return_exceptions=True
+        )
+        by_question = dict(zip(unique, answers))
+        return [by_question[question] for question in questions]
\ No newline at end of file
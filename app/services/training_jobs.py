@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.dependencies import get_data_processor
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+class TrainingJob:
+    """একটা background training job এর status, progress counter আর cancel flag"""
+
+    COUNTERS = ("rows_read", "rows_embedded", "rows_upserted", "rows_unchanged", "rows_skipped", "rows_deleted")
+
+    def __init__(self, kind, source_name, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.source_name = source_name
+        self.params = params
+        self.status = "queued"
+        self.message = None
+        self.error = None
+        self.total_rows = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.counts = {name: 0 for name in self.COUNTERS}
+
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TrainingCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self):
+        with self._lock:
+            counts = dict(self.counts)
+
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rows_per_second = counts["rows_read"] / elapsed if elapsed > 0 else 0.0
+
+        eta_seconds = None
+        if self.status == "running" and self.total_rows and rows_per_second > 0:
+            eta_seconds = max(self.total_rows - counts["rows_read"], 0) / rows_per_second
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "source_name": self.source_name,
+            "status": self.status,
+            "message": self.message,
+            "error": self.error,
+            **counts,
+            "total_rows": self.total_rows,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(rows_per_second, 2),
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class TrainingJobManager:
+    """Training job গুলো background thread pool এ চালাবে; একসাথে কয়টা চলবে তা global cap দিয়ে ঠিক হবে।
+    DataProcessor job চলার সময় service registry থেকে আসে (route গুলোর সাথে একই instance);
+    সেটা বানাতে fail করলে job failed হবে"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = TrainingJobManager(settings.TRAINING_MAX_CONCURRENT_JOBS)
+        return cls._instance
+
+    def __init__(self, max_concurrent_jobs):
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="training-job")
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit_table(self, table_name, full_refresh=False):
+        job = TrainingJob("table", table_name, {"table_name": table_name, "full_refresh": full_refresh})
+        return self._submit(job, lambda: get_data_processor().process_table_data(table_name, full_refresh, job=job))
+
+    def submit_sql(self, sql_query, source_name, full_refresh=False):
+        job = TrainingJob("sql", source_name, {"source_name": source_name, "full_refresh": full_refresh})
+        return self._submit(
+            job,
+            lambda: get_data_processor().process_sql_query_data(sql_query, source_name, full_refresh, job=job)
+        )
+
+    def _submit(self, job, work):
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job, work):
+        if job._cancel_event.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            processed_rows = work()
+            job.status = "completed"
+            if processed_rows == 0:
+                job.message = f"Warning: No valid data found in {job.source_name}"
+            else:
+                job.message = f"Successfully trained {processed_rows} rows from {job.source_name}"
+        except TrainingCancelled:
+            job.status = "cancelled"
+            job.message = f"Cancelled after {job.counts['rows_upserted']} rows were written"
+        except Exception as e:
+            print(f"Training job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        """শেষ হওয়া পুরানো job গুলো বাদ দিবে যাতে memory না বাড়ে"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None]
+        while len(self.jobs) > settings.TRAINING_JOB_HISTORY and finished:
+            del self.jobs[finished.pop(0)]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status in ("queued", "running"):
+            job.cancel()
+            if job.status == "queued":
+                job.message = "Cancel requested"
+        return job
@@ -0,0 +1,180 @@
+"""Existing collection এর sample নিয়ে vector storage mode গুলোর recall আর latency মাপবে।
+
+প্রতিটা mode এর জন্য একটা temporary collection বানিয়ে sample point গুলো copy করবে, আলাদা রাখা
+query vector দিয়ে search করবে আর numpy exact search এর সাথে মিলিয়ে recall@k বের করবে।
+
+ব্যবহার:
+    python -m app.tools.compare_storage --sample-size 20000 --queries 200 --top-k 5
+    python -m app.tools.compare_storage --apply scalar   # মাপার পর live collection এ mode বসাতে
+"""
+import argparse
+import json
+import time
+import warnings
+import numpy as np
+from qdrant_client.models import PointStruct, SearchParams, QuantizationSearchParams
+from app.config import settings
+from app.database.qdrant_client import QdrantService
+
+
+def load_sample(qdrant, limit):
+    ids, vectors = [], []
+    offset = None
+    while len(ids) < limit:
+        records, offset = qdrant.scroll(
+            limit=min(1000, limit - len(ids)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        for record in records:
+            ids.append(record.id)
+            vectors.append(record.vector)
+        if offset is None:
+            break
+    return ids, np.asarray(vectors, dtype=np.float32)
+
+
+def exact_top_k(corpus, queries, top_k):
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :top_k]
+
+
+def wait_until_indexed(bench, timeout=600):
+    """Server এ quantization/HNSW background এ তৈরি হয়, শেষ না হওয়া পর্যন্ত অপেক্ষা করবে"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = bench.client.get_collection(bench.collection_name)
+        if str(getattr(info.status, "value", info.status)).lower() == "green":
+            return
+        time.sleep(1)
+    print(f"Warning: {bench.collection_name} is still optimizing, results may be pessimistic")
+
+
+def estimate_vector_ram(mode, count, dim):
+    if mode == "full":
+        return count * dim * 4
+    if mode == "scalar":
+        return count * dim
+    return 0
+
+
+def measure(bench, search_params, index_of, queries, truth, top_k):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = bench.client.query_points(
+            collection_name=bench.collection_name,
+            query=query.tolist(),
+            limit=top_k,
+            search_params=search_params,
+            with_payload=False
+        ).points
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = {index_of.get(str(result.id)) for result in results}
+        hits += len(found & set(expected.tolist()))
+
+    return {
+        "recall_at_k": round(hits / (len(queries) * top_k), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 2)
+    }
+
+
+def run_mode(mode, variants, corpus_ids, corpus, queries, truth, top_k, keep):
+    """Mode এর collection একবার বানিয়ে প্রতিটা (label, search_params) variant মাপবে"""
+    bench = QdrantService()
+    bench.collection_name = f"{settings.COLLECTION_NAME}__bench_{mode}"
+    if bench.collection_exists():
+        bench.delete_collection()
+    bench.create_collection(vector_size=corpus.shape[1], mode=mode)
+
+    for start in range(0, len(corpus_ids), 500):
+        bench.upsert_points([
+            PointStruct(id=point_id, vector=vector.tolist(), payload={})
+            for point_id, vector in zip(corpus_ids[start:start + 500], corpus[start:start + 500])
+        ])
+    wait_until_indexed(bench)
+
+    index_of = {str(point_id): i for i, point_id in enumerate(corpus_ids)}
+    vector_ram_mb = round(estimate_vector_ram(mode, len(corpus_ids), corpus.shape[1]) / 1024 / 1024, 1)
+    try:
+        return [
+            {"mode": label, **measure(bench, search_params, index_of, queries, truth, top_k), "vector_ram_mb": vector_ram_mb}
+            for label, search_params in variants
+        ]
+    finally:
+        if not keep:
+            bench.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vector storage modes on a sample of the collection")
+    parser.add_argument("--sample-size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--modes", default="full,scalar,on_disk")
+    parser.add_argument("--keep", action="store_true", help="Benchmark collection গুলো delete করবে না")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--apply", metavar="MODE", help="Compare না করে live collection এ এই storage mode বসাবে")
+    args = parser.parse_args()
+
+    qdrant = QdrantService()
+    if qdrant.backend != "qdrant":
+        raise SystemExit("Storage modes only apply to VECTOR_BACKEND=qdrant")
+    if not qdrant.collection_exists():
+        raise SystemExit(f"Collection {qdrant.collection_name} not found")
+    if args.apply:
+        qdrant.apply_storage_mode(args.apply)
+        print(f"{qdrant.collection_name} now uses {qdrant.storage_mode(args.apply)} storage; also set VECTOR_STORAGE_MODE")
+        return
+    if not settings.QDRANT_URL:
+        print("Warning: local mode ignores quantization and on_disk, set QDRANT_URL to compare real trade-offs")
+
+    ids, vectors = load_sample(qdrant, args.sample_size + args.queries)
+    if len(ids) <= args.queries:
+        raise SystemExit("Not enough points in the collection for the requested number of queries")
+
+    # প্রথম কয়েকটা point query হিসেবে থাকবে, corpus এ যাবে না
+    queries, corpus_ids, corpus = vectors[:args.queries], ids[args.queries:], vectors[args.queries:]
+    truth = exact_top_k(corpus, queries, args.top_k)
+
+    runs = []
+    for mode in args.modes.split(","):
+        mode = qdrant.storage_mode(mode.strip())
+        variants = [(mode, qdrant.search_params(mode))]
+        if mode == "scalar":
+            variants.append((
+                "scalar (no rescore)",
+                SearchParams(quantization=QuantizationSearchParams(rescore=False))
+            ))
+        with warnings.catch_warnings():
+            # Local mode এ quantization/on_disk এর warning আসে
+            warnings.simplefilter("ignore")
+            runs.extend(run_mode(mode, variants, corpus_ids, corpus, queries, truth, args.top_k, args.keep))
+
+    report = {
+        "collection": qdrant.collection_name,
+        "points": len(corpus_ids),
+        "queries": len(queries),
+        "top_k": args.top_k,
+        "runs": runs
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['points']} points, {report['queries']} queries, top {args.top_k}")
+    print(f"{'mode':<22}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}{'vector RAM MB':>16}")
+    for run in runs:
+        print(
+            f"{run['mode']:<22}{run['recall_at_k']:>10}{run['latency_ms_p50']:>10}"
+            f"{run['latency_ms_p95']:>10}{run['vector_ram_mb']:>16}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""এক vector backend এর collection আরেক backend এ copy করবে (re-embed ছাড়া)।
+
+ব্যবহার:
+    python -m app.tools.copy_vectors --source qdrant --target mmap
+তারপর VECTOR_BACKEND=mmap দিয়ে একাধিক worker এ চালানো যাবে:
+    uvicorn app.main:app --workers 4
+"""
+import argparse
+from qdrant_client.models import PointStruct
+from app.database.qdrant_client import QdrantService
+
+
+def open_backend(backend):
+    service = QdrantService()
+    service.backend = backend
+    service.client = QdrantService.get_client() if backend == "qdrant" else None
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy vectors and payloads between vector backends")
+    parser.add_argument("--source", choices=["qdrant", "mmap"], default="qdrant")
+    parser.add_argument("--target", choices=["qdrant", "mmap"], default="mmap")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    if args.source == args.target:
+        raise SystemExit("Source and target backends must differ")
+
+    source = open_backend(args.source)
+    target = open_backend(args.target)
+    if not source.collection_exists():
+        raise SystemExit(f"Collection {source.collection_name} not found in {args.source}")
+    target.create_collection(vector_size=source.collection_info()["vector_size"])
+
+    copied = 0
+    offset = None
+    while True:
+        records, offset = source.scroll(limit=args.batch_size, offset=offset, with_vectors=True)
+        points = [PointStruct(id=record.id, vector=record.vector, payload=record.payload) for record in records]
+        if points and not target.upsert_points(points):
+            raise SystemExit(f"Copy failed after {copied} points")
+        copied += len(points)
+        print(f"Copied {copied} points")
+        if offset is None:
+            break
+
+
+if __name__ == "__main__":
+    main()
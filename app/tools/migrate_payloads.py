@@ -0,0 +1,20 @@
+"""পুরানো collection এর point payload গুলো source registry ভিত্তিক compact format এ convert করবে।
+
+ব্যবহার:
+    python -m app.tools.migrate_payloads
+"""
+import argparse
+from app.services.data_processor import DataProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate Qdrant point payloads to the source registry format")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    stats = DataProcessor().migrate_payloads(batch_size=args.batch_size)
+    print(f"Done: {stats['migrated']} of {stats['scanned']} points rewritten")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""দুইটা benchmark JSON মিলিয়ে প্রতি stage এর পরিবর্তন দেখাবে; threshold এর বেশি খারাপ হলে exit code 1।
+
+ব্যবহার:
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# metric suffix -> বড় হলে ভালো কিনা
+METRICS = {
+    "_per_second": True,
+    "latency_ms_p50": False,
+    "latency_ms_p95": False,
+    "latency_ms_p99": False,
+    "peak_rss_mb": False,
+    "embedding_requests": False,
+    "embedding_items": False,
+    "chat_prompt_tokens": False
+}
+
+
+def is_higher_better(metric):
+    for suffix, higher_is_better in METRICS.items():
+        if metric.endswith(suffix):
+            return higher_is_better
+    return None
+
+
+def compare(before, after, threshold):
+    regressions = []
+    rows = []
+    for stage, after_metrics in after["stages"].items():
+        before_metrics = before["stages"].get(stage)
+        if before_metrics is None:
+            continue
+        for metric, new in after_metrics.items():
+            higher_is_better = is_higher_better(metric)
+            old = before_metrics.get(metric)
+            if higher_is_better is None or old is None or new is None:
+                continue
+            if old == 0:
+                change = 0.0 if new == 0 else float("inf")
+            else:
+                change = (new - old) / old * 100
+            worse = change < -threshold if higher_is_better else change > threshold
+            rows.append((stage, metric, old, new, change, worse))
+            if worse:
+                regressions.append((stage, metric))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="কত শতাংশ খারাপ হলে regression ধরা হবে")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    changed = {
+        key: (before.get("config", {}).get(key), value)
+        for key, value in after.get("config", {}).items()
+        if before.get("config", {}).get(key) != value
+    }
+    if changed:
+        # আলাদা config এর result তুলনা করলে পার্থক্য code এর না-ও হতে পারে
+        print(f"Warning: benchmark config differs: {changed}")
+
+    rows, regressions = compare(before, after, args.threshold)
+    print(f"{before.get('git_commit', '?')[:10]} -> {after.get('git_commit', '?')[:10]}")
+    print(f"{'stage':<24}{'metric':<22}{'before':>12}{'after':>12}{'change':>10}")
+    for stage, metric, old, new, change, worse in rows:
+        marker = "  REGRESSION" if worse else ""
+        print(f"{stage:<24}{metric:<22}{old:>12}{new:>12}{change:>9.1f}%{marker}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark এর local stand-in: SQLite দিয়ে MSSQLConnection আর latency simulate করা fake OpenAI client"""
+import asyncio
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from app.database.mssql_connection import MSSQLConnection
+from app.services.embedding_providers import HashingEmbeddingProvider
+from app.services.embeddings_service import estimate_tokens
+
+
+class SQLiteMSSQLConnection(MSSQLConnection):
+    """MSSQLConnection এর SQL Server নির্ভর metadata query গুলো SQLite দিয়ে; বাকি সব (pool, streaming) আসলটাই"""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__(connection_factory=lambda: sqlite3.connect(path, check_same_thread=False))
+
+    def _query(self, sql, params=()):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def _load_tables(self):
+        return [row[0] for row in self._query("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    def _load_columns(self, table_name):
+        return [(row[1], row[2]) for row in self._query(f"PRAGMA table_info([{table_name}])")]
+
+    def _load_primary_key_columns(self, table_name):
+        rows = self._query(f"PRAGMA table_info([{table_name}])")
+        return [row[1] for row in sorted(rows, key=lambda row: row[5]) if row[5]]
+
+    def table_exists(self, table_name):
+        return bool(self._query(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND lower(name) = lower(?)", (table_name,)
+        ))
+
+    def estimate_row_count(self, table_name):
+        return self._query(f"SELECT COUNT(*) FROM [{table_name}]")[0][0]
+
+
+class _Usage:
+    """কয়টা request আর কয়টা item গেছে; stage গুলোর মধ্যে তুলনার জন্য"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.embedding_requests = 0
+        self.embedding_items = 0
+        self.chat_requests = 0
+        self.chat_prompt_tokens = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "embedding_requests": self.embedding_requests,
+                "embedding_items": self.embedding_items,
+                "chat_requests": self.chat_requests,
+                "chat_prompt_tokens": self.chat_prompt_tokens
+            }
+
+
+class FakeOpenAI:
+    """OpenAI client এর মতো embeddings.create আর chat.completions.create; network এর বদলে sleep করে।
+    Vector গুলো hashing provider দিয়ে বানানো, তাই search result গুলোর মানে থাকে।"""
+
+    def __init__(self, dimension=1536, embedding_latency=0.05, per_item_latency=0.0002, chat_latency=0.3,
+                 stream_tokens=20, usage=None):
+        self.dimension = dimension
+        self.embedding_latency = embedding_latency
+        self.per_item_latency = per_item_latency
+        self.chat_latency = chat_latency
+        self.stream_tokens = stream_tokens
+        self.usage = usage or _Usage()
+        self.hashing = HashingEmbeddingProvider(dimension)
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat))
+
+    def _embedding_response(self, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        with self.usage.lock:
+            self.usage.embedding_requests += 1
+            self.usage.embedding_items += len(texts)
+        vectors = self.hashing.embed(texts)
+        return (
+            self.embedding_latency + self.per_item_latency * len(texts),
+            SimpleNamespace(data=[SimpleNamespace(embedding=vector, index=i) for i, vector in enumerate(vectors)])
+        )
+
+    def _chat_response(self, messages):
+        # Prompt যত বড় তত দাম আর latency, তাই context builder এর পরিবর্তন এখানে দেখা যাবে
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        with self.usage.lock:
+            self.usage.chat_requests += 1
+            self.usage.chat_prompt_tokens += prompt_tokens
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(
+                content=f"Benchmark answer for: {messages[-1]['content'][-80:]}"
+            ))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=20)
+        )
+
+    def _create_embeddings(self, model, input, **kwargs):
+        latency, response = self._embedding_response(input)
+        time.sleep(latency)
+        return response
+
+    def _create_chat(self, model, messages, stream=False, **kwargs):
+        time.sleep(self.chat_latency)
+        return self._chat_response(messages)
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """AsyncOpenAI এর মতো; sleep গুলো asyncio.sleep, streaming এ token ভাগ করে পাঠায়"""
+
+    async def _create_embeddings(self, model, input, **kwargs):
+        latency, response = self._embedding_response(input)
+        await asyncio.sleep(latency)
+        return response
+
+    async def _create_chat(self, model, messages, stream=False, **kwargs):
+        if not stream:
+            await asyncio.sleep(self.chat_latency)
+            return self._chat_response(messages)
+        return self._stream(messages)
+
+    async def _stream(self, messages):
+        content = self._chat_response(messages).choices[0].message.content
+        for i in range(self.stream_tokens):
+            await asyncio.sleep(self.chat_latency / self.stream_tokens)
+            token = content if i == 0 else ""
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+def install_fake_openai(embeddings_service, client, async_client):
+    """EmbeddingsService আর এর OpenAI provider এ fake client বসাবে"""
+    embeddings_service.client = client
+    embeddings_service.async_client = async_client
+    provider = embeddings_service.provider
+    if hasattr(provider, "client"):
+        provider.client = client
+        provider.async_client = async_client
@@ -0,0 +1,345 @@
+"""Ingestion আর chat এর end-to-end benchmark; MSSQL এর বদলে SQLite, OpenAI এর বদলে latency simulate করা fake।
+
+ব্যবহার (repo root থেকে):
+    python -m benchmarks.run --rows 20000 --columns 12 --queries 200 --output before.json
+    python -m benchmarks.compare before.json after.json
+
+প্রতি stage এর rows/sec বা queries/sec, peak RSS, p50/p95/p99 latency আর fake OpenAI call count JSON এ আসবে।
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = [
+    "rice", "tea", "jute", "fish", "cotton", "steel", "cement", "paper", "sugar", "leather",
+    "shirt", "saree", "mango", "lentil", "oil", "spice", "battery", "cable", "phone", "laptop"
+]
+CITIES = ["Dhaka", "Chittagong", "Sylhet", "Khulna", "Rajshahi", "Barisal", "Rangpur", "Comilla"]
+STATUSES = ["pending", "shipped", "delivered", "cancelled", "returned"]
+
+
+class RssSampler:
+    """Background thread এ RSS দেখে প্রতি stage এর peak বের করবে (Linux এ /proc, অন্যথায় ru_maxrss)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def current(self):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            try:
+                import resource
+                usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                return usage if sys.platform == "darwin" else usage * 1024
+            except ImportError:
+                return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_stats(latencies):
+    return {
+        f"latency_ms_{name}": round(percentile(latencies, pct) * 1000, 3) if latencies else None
+        for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))
+    }
+
+
+def column_spec(width):
+    """id আর code সবসময় থাকবে; বাকি column বিভিন্ন type ঘুরে ঘুরে"""
+    kinds = ["product", "city", "status", "amount", "quantity", "order_date", "note"]
+    columns = [("id", "INTEGER PRIMARY KEY", "id"), ("code", "TEXT", "code")]
+    for i in range(max(width - 2, 0)):
+        kind = kinds[i % len(kinds)]
+        suffix = "" if i < len(kinds) else f"_{i // len(kinds)}"
+        sql_type = {"amount": "REAL", "quantity": "INTEGER", "order_date": "DATE"}.get(kind, "TEXT")
+        columns.append((f"{kind}{suffix}", sql_type, kind))
+    return columns
+
+
+def make_value(kind, row_id, rng):
+    if kind == "id":
+        return row_id
+    if kind == "code":
+        return f"ITM-{row_id:06d}"
+    if kind == "product":
+        return " ".join(rng.sample(WORDS, 2))
+    if kind == "city":
+        return rng.choice(CITIES)
+    if kind == "status":
+        return rng.choice(STATUSES)
+    if kind == "amount":
+        return round(rng.uniform(10, 10000), 2)
+    if kind == "quantity":
+        return rng.randint(1, 500)
+    if kind == "order_date":
+        return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    # note: কিছু null রাখবো যাতে default value এর path ও চলে
+    return None if rng.random() < 0.3 else f"{rng.choice(WORDS)} order for {rng.choice(CITIES)}"
+
+
+def generate_table(path, table_name, rows, width, seed):
+    rng = random.Random(seed)
+    columns = column_spec(width)
+    conn = sqlite3.connect(path)
+    conn.execute(f"DROP TABLE IF EXISTS [{table_name}]")
+    conn.execute(
+        f"CREATE TABLE [{table_name}] (" + ", ".join(f"[{name}] {sql_type}" for name, sql_type, _ in columns) + ")"
+    )
+    placeholders = ", ".join("?" for _ in columns)
+    for start in range(1, rows + 1, 5000):
+        batch = [
+            tuple(make_value(kind, row_id, rng) for _, _, kind in columns)
+            for row_id in range(start, min(start + 5000, rows + 1))
+        ]
+        conn.executemany(f"INSERT INTO [{table_name}] VALUES ({placeholders})", batch)
+    conn.commit()
+    conn.close()
+    return columns
+
+
+def make_keyword_queries(count, rows, seed):
+    rng = random.Random(seed)
+    return [f"ITM-{rng.randint(1, rows):06d}" for _ in range(count)]
+
+
+def make_semantic_queries(count, seed):
+    rng = random.Random(seed)
+    return [
+        f"which {rng.choice(STATUSES)} orders of {rng.choice(WORDS)} came from {rng.choice(CITIES)}"
+        for _ in range(count)
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def configure_environment(args, workdir):
+    """App এর settings import এর সময় পড়া হয়, তাই app import করার আগেই env ঠিক করতে হবে"""
+    os.environ.update({
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+        "COLLECTION_NAME": "benchmark",
+        "METADATA_DB_PATH": os.path.join(workdir, "metadata.db"),
+        "KEYWORD_INDEX_PATH": os.path.join(workdir, "keyword_index.db"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.db"),
+        "MMAP_STORE_PATH": os.path.join(workdir, "vector_store"),
+        "VECTOR_BACKEND": args.backend,
+        "EMBEDDING_PROVIDER": args.provider,
+        "ANSWER_CACHE_ENABLED": "true"
+    })
+    # Qdrant local storage "./qdrant_storage" relative path এ থাকে
+    os.chdir(workdir)
+
+
+def run_stage(name, fn, usage, units):
+    """fn() কে একবার চালিয়ে সময়, peak RSS আর fake OpenAI call এর হিসাব দিবে; fn (count, latencies) return করে"""
+    before = usage.snapshot()
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            count, latencies = fn()
+        elapsed = time.perf_counter() - started
+    after = usage.snapshot()
+
+    result = {
+        units: count,
+        "seconds": round(elapsed, 3),
+        f"{units}_per_second": round(count / elapsed, 2) if elapsed > 0 else None,
+        "peak_rss_mb": round(sampler.peak / 1024 / 1024, 1),
+        **latency_stats(latencies),
+        **{key: after[key] - before[key] for key in after}
+    }
+    print(f"[{name}] {json.dumps(result)}", file=sys.stderr)
+    return result
+
+
+def timed_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - started)
+    return len(queries), latencies
+
+
+async def timed_concurrent_queries(fn, queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with semaphore:
+            started = time.perf_counter()
+            await fn(query)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(query) for query in queries))
+    return len(queries), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingestion and chat benchmark with local stand-ins")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=12, help="Synthetic table এর column সংখ্যা (id সহ)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="প্রতি embedding request এর seconds")
+    parser.add_argument("--per-item-latency", type=float, default=0.0002)
+    parser.add_argument("--chat-latency", type=float, default=0.3)
+    parser.add_argument("--backend", choices=["qdrant", "mmap"], default="qdrant")
+    parser.add_argument("--provider", choices=["openai", "hashing"], default="openai",
+                        help="openai হলে fake OpenAI client ব্যবহার হবে")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="না দিলে temporary directory")
+    parser.add_argument("--output", help="JSON file; না দিলে stdout এ")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="hybrid-chatbot-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    configure_environment(args, workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    from benchmarks.fakes import SQLiteMSSQLConnection, FakeOpenAI, FakeAsyncOpenAI, install_fake_openai
+    from app.services.data_processor import DataProcessor
+    from app.services.search_service import SearchService
+    from app.services.answer_cache import AnswerCache
+
+    table_name = "bench_items"
+    source_db = os.path.join(workdir, "source.db")
+    print(f"Generating {args.rows} rows x {args.columns} columns in {source_db}", file=sys.stderr)
+    columns = generate_table(source_db, table_name, args.rows, args.columns, args.seed)
+
+    fake_kwargs = {
+        "embedding_latency": args.embedding_latency,
+        "per_item_latency": args.per_item_latency,
+        "chat_latency": args.chat_latency
+    }
+    client = FakeOpenAI(**fake_kwargs)
+    async_client = FakeAsyncOpenAI(usage=client.usage, **fake_kwargs)
+
+    processor = DataProcessor()
+    processor.mssql = SQLiteMSSQLConnection(source_db)
+    install_fake_openai(processor.embeddings, client, async_client)
+    search = SearchService()
+    install_fake_openai(search.embeddings, client, async_client)
+    answer_cache = search.answer_cache
+    usage = client.usage
+
+    keyword_queries = make_keyword_queries(args.queries, args.rows, args.seed)
+    semantic_queries = make_semantic_queries(args.queries, args.seed)
+    # আলাদা query, যাতে আগের stage এর embedding cache hit না হয়
+    concurrent_queries = make_semantic_queries(args.queries, args.seed + 1)
+    # Table এর থেকে আলাদা text, নাহলে সব embedding cache থেকে আসবে
+    sql_columns = ", ".join(f"[{name}]" for name, _, _ in columns[:5])
+    sql_query = f"SELECT {sql_columns} FROM [{table_name}] WHERE id % 2 = 0"
+    stages = {}
+
+    stages["ingest_table_full"] = run_stage(
+        "ingest_table_full",
+        lambda: (processor.process_table_data(table_name, full_refresh=True), []),
+        usage, "rows"
+    )
+    stages["ingest_table_unchanged"] = run_stage(
+        "ingest_table_unchanged",
+        lambda: (processor.process_table_data(table_name), []),
+        usage, "rows"
+    )
+    stages["ingest_sql"] = run_stage(
+        "ingest_sql",
+        lambda: (processor.process_sql_query_data(sql_query, "bench_sql", full_refresh=True), []),
+        usage, "rows"
+    )
+
+    # Answer cache বন্ধ রেখে আসল retrieval + chat path মাপবো
+    search.answer_cache = None
+    stages["chat_keyword"] = run_stage(
+        "chat_keyword", lambda: timed_queries(search.search_and_respond, keyword_queries), usage, "queries"
+    )
+    stages["chat_semantic"] = run_stage(
+        "chat_semantic", lambda: timed_queries(search.search_and_respond, semantic_queries), usage, "queries"
+    )
+    stages["chat_async_concurrent"] = run_stage(
+        "chat_async_concurrent",
+        lambda: asyncio.run(timed_concurrent_queries(search.asearch_and_respond, concurrent_queries, args.concurrency)),
+        usage, "queries"
+    )
+
+    if answer_cache is not None:
+        search.answer_cache = answer_cache
+        timed_queries(search.search_and_respond, semantic_queries)
+        stages["chat_cached"] = run_stage(
+            "chat_cached", lambda: timed_queries(search.search_and_respond, semantic_queries), usage, "queries"
+        )
+
+    report = {
+        "benchmark": "hybrid-chatbot",
+        "timestamp": time.time(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "workdir")
+        },
+        "stages": stages
+    }
+    if AnswerCache.get_instance() is not None:
+        report["answer_cache"] = AnswerCache.get_instance().stats()
+
+    text = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Wrote {output_path}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,72 @@ function removeTypingIndicator() {
     }
 }
 
+function parseSseEvent(block) {
+    let type = 'message';
+    const dataLines = [];
+    
+    block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+    
+    if (dataLines.length === 0) return null;
+    return { type: type, data: JSON.parse(dataLines.join('\n')) };
+}
+
+async function streamMessage(message) {
+    const response = await fetch('/api/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ message: message })
+    });
+    
+    if (!response.ok || !response.body) {
+        throw new Error('Streaming not available');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let contentDiv = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // প্রতিটা SSE event একটা ফাঁকা লাইন দিয়ে শেষ হয়
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const event = parseSseEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            if (!event) continue;
+            
+            if (event.type === 'token') {
+                if (!contentDiv) {
+                    removeTypingIndicator();
+                    addMessage('');
+                    contentDiv = chatMessages.lastElementChild.querySelector('.message-content');
+                }
+                contentDiv.textContent += event.data.content;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (event.type === 'error') {
+                throw new Error(event.data.message);
+            }
+        }
+    }
+    
+    if (!contentDiv) {
+        throw new Error('Empty response');
+    }
+}
+
 async function sendMessage() {
     const message = messageInput.value.trim();
     if (!message) return;
@@ -56,17 +122,7 @@ async function sendMessage() {
     const typingIndicator = addTypingIndicator();
     
     try {
-        const response = await fetch('/api/chat', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ message: message })
-        });
-        
-        const data = await response.json();
-        removeTypingIndicator();
-        addMessage(data.response);
+        await streamMessage(message);
         
     } catch (error) {
         removeTypingIndicator();
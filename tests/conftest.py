@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+# App এর settings import এর সময় পড়া হয়, তাই test এর local file গুলো আগেই temp directory তে পাঠাবো
+_workdir = tempfile.mkdtemp(prefix="chatbot-tests-")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hashing")
+os.environ.setdefault("VECTOR_BACKEND", "mmap")
+os.environ.setdefault("METRICS_ENABLED", "false")
+for name, filename in (
+    ("METADATA_DB_PATH", "metadata.db"),
+    ("KEYWORD_INDEX_PATH", "keyword_index.db"),
+    ("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+    ("MMAP_STORE_PATH", "vector_store"),
+):
+    os.environ.setdefault(name, os.path.join(_workdir, filename))
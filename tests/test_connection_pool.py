@@ -0,0 +1,130 @@
+import sqlite3
+import time
+import pytest
+from app.database.connection_pool import ConnectionPool
+
+
+class SQLiteFactory:
+    """File এর উপর sqlite3 connection; কয়টা খোলা হলো আর কোনগুলো মনে রাখে"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.created = []
+
+    def __call__(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.created.append(conn)
+        return conn
+
+
+@pytest.fixture
+def factory(tmp_path):
+    factory = SQLiteFactory(tmp_path / "pool.db")
+    conn = sqlite3.connect(factory.path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item{i}",) for i in range(5)])
+    conn.commit()
+    conn.close()
+    return factory
+
+
+def is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+        return False
+    except sqlite3.ProgrammingError:
+        return True
+
+
+def test_reuses_released_connection(factory):
+    pool = ConnectionPool(factory, max_size=2)
+    first = pool.acquire()
+    first.close()
+    second = pool.acquire()
+
+    assert len(factory.created) == 1
+    assert second._conn is factory.created[0]
+    assert pool.stats()["in_use"] == 1
+
+
+def test_acquire_times_out_when_pool_is_exhausted(factory):
+    pool = ConnectionPool(factory, max_size=1, acquire_timeout=0.1)
+    held = pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.1
+
+    held.close()
+    pool.acquire().close()
+    assert len(factory.created) == 1
+
+
+def test_unhealthy_idle_connection_is_replaced(factory):
+    pool = ConnectionPool(factory, max_size=1, health_check_seconds=0)
+    pool.acquire().close()
+    # Idle থাকা অবস্থায় server connection কেটে দিলে যেমন হয়
+    factory.created[0].close()
+    time.sleep(0.01)
+
+    conn = pool.acquire()
+    assert len(factory.created) == 2
+    assert conn.cursor().execute("SELECT COUNT(*) FROM items").fetchone()[0] == 5
+    assert pool.stats()["open"] == 1
+
+
+def test_idle_connection_is_recycled(factory):
+    pool = ConnectionPool(factory, max_idle_seconds=0.05)
+    pool.acquire().close()
+    time.sleep(0.1)
+
+    pool.acquire().close()
+    assert len(factory.created) == 2
+    assert is_closed(factory.created[0])
+    assert pool.stats() == {"max_size": 5, "open": 1, "idle": 1, "in_use": 0}
+
+
+def test_release_rolls_back_open_transaction(factory):
+    pool = ConnectionPool(factory, max_size=1)
+    conn = pool.acquire()
+    conn.cursor().execute("INSERT INTO items (name) VALUES ('uncommitted')")
+    conn.close()
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.cursor().execute("SELECT COUNT(*) FROM items").fetchone()[0] == 5
+
+
+def test_failed_connect_frees_the_slot(tmp_path):
+    calls = []
+
+    def failing_factory():
+        calls.append(1)
+        raise sqlite3.OperationalError("cannot connect")
+
+    pool = ConnectionPool(failing_factory, max_size=1, acquire_timeout=0.1)
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            pool.acquire()
+    assert len(calls) == 2
+    assert pool.stats()["open"] == 0
+
+
+def test_iter_query_returns_connection_when_closed_early(factory):
+    pytest.importorskip("pyodbc")
+    from app.database.mssql_connection import MSSQLConnection
+
+    mssql = MSSQLConnection(connection_factory=factory)
+    chunks = mssql.iter_query("SELECT id, name FROM items ORDER BY id", fetch_size=2)
+    columns, _, rows = next(chunks)
+    assert columns == ["id", "name"]
+    assert len(rows) == 2
+    assert mssql.pool.stats()["in_use"] == 1
+
+    chunks.close()
+    assert mssql.pool.stats()["in_use"] == 0
+
+    # ফেরত যাওয়া connection আবার ব্যবহার হবে
+    assert sum(len(rows) for _, _, rows in mssql.iter_query("SELECT id FROM items", fetch_size=2)) == 5
+    assert len(factory.created) == 1
@@ -0,0 +1,18 @@
+from app.services.context_builder import ContextBuilder
+
+
+def payload(data):
+    return {"source_name": "orders", "data": data, "text_content": ""}
+
+
+def test_keeps_real_zero_values():
+    data = {"order_id": "1042", "quantity": "0", "discount": "0.00", "note": "N/A", "shipped_on": "1900-01-01"}
+    context, sources = ContextBuilder().build("order 1042", [(payload(data), 1.0)])
+    assert context == "order_id: 1042 | quantity: 0 | discount: 0.00"
+    assert sources[0]["data"] == data
+
+
+def test_keeps_placeholder_date_when_query_names_column():
+    data = {"order_id": "1042", "shipped_on": "1900-01-01"}
+    context, _ = ContextBuilder().build("when was order 1042 shipped_on", [(payload(data), 1.0)])
+    assert context == "order_id: 1042 | shipped_on: 1900-01-01"
@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+import pytest
+from app.config import settings
+from app.services.embedding_providers import HashingEmbeddingProvider
+from app.services.embeddings_service import EmbeddingWaitAborted, EmbeddingsService
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE
+
+
+class APIError(Exception):
+    """openai.APIStatusError এর মত status_code/code সহ error"""
+
+    def __init__(self, status_code, code=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = None
+
+
+class FlakyProvider(HashingEmbeddingProvider):
+    """প্রথম failures বার error দিবে, তারপর hashing embedding"""
+
+    def __init__(self, error, failures):
+        super().__init__(16)
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return super().embed(texts)
+
+
+def make_service(lane, provider, monkeypatch):
+    service = EmbeddingsService(lane=lane)
+    service.provider = provider
+    # Backoff এ সত্যি ঘুমাবো না
+    monkeypatch.setattr(service, "retry_delay", lambda limiter, error, attempt: 0)
+    return service
+
+
+@pytest.fixture(autouse=True)
+def retries(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "CHAT_MAX_RETRIES", 3)
+
+
+def test_background_keeps_waiting_on_rate_limit(monkeypatch):
+    provider = FlakyProvider(APIError(429), failures=8)
+    service = make_service(BACKGROUND, provider, monkeypatch)
+
+    embeddings = service.get_embeddings(["Customer: Rahim", "Customer: Karim"])
+    assert all(embedding is not None for embedding in embeddings)
+    assert provider.calls == 9
+
+
+def test_background_stops_waiting_when_asked(monkeypatch):
+    provider = FlakyProvider(APIError(429), failures=100)
+    service = make_service(BACKGROUND, provider, monkeypatch)
+    checks = []
+
+    def should_stop():
+        checks.append(True)
+        return len(checks) > 2
+
+    with pytest.raises(EmbeddingWaitAborted):
+        service.get_embeddings(["Customer: Rahim", "Customer: Karim"], should_stop=should_stop)
+    # Abort হলে batch ভাগ করে আবার চেষ্টা করবে না
+    assert provider.calls == 3
+
+
+def test_background_gives_up_after_max_wait(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_RATE_LIMIT_MAX_WAIT_SECONDS", 0)
+    provider = FlakyProvider(APIError(429), failures=100)
+    service = make_service(BACKGROUND, provider, monkeypatch)
+
+    with pytest.raises(EmbeddingWaitAborted, match="still rate limited"):
+        service.get_embeddings(["Customer: Rahim"])
+    assert provider.calls == 1
+
+
+def test_interactive_gives_up_on_rate_limit(monkeypatch):
+    provider = FlakyProvider(APIError(429), failures=8)
+    service = make_service(INTERACTIVE, provider, monkeypatch)
+
+    assert service.get_embeddings(["Customer: Rahim", "Customer: Karim"]) == [None, None]
+    # Rate limit এ batch ভাগ করবে না
+    assert provider.calls == 3
+
+
+@pytest.mark.parametrize("error", [APIError(500), APIError(429, code="insufficient_quota")], ids=["server", "quota"])
+def test_background_gives_up_on_other_errors(error, monkeypatch):
+    provider = FlakyProvider(error, failures=100)
+    service = make_service(BACKGROUND, provider, monkeypatch)
+
+    assert service.get_embeddings(["Customer: Rahim"]) == [None]
+    assert provider.calls == 3
+
+
+def test_zero_retries_still_makes_one_request(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "CHAT_MAX_RETRIES", 0)
+    provider = FlakyProvider(APIError(500), failures=0)
+    service = make_service(INTERACTIVE, provider, monkeypatch)
+    service.chat_limiter = None
+
+    assert len(service.get_embedding("Customer: Rahim")) == 16
+    assert provider.calls == 1
+
+    requests = []
+
+    def create(**kwargs):
+        requests.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=None)
+
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    assert service.get_chat_response("who?", "Customer: Rahim") == "ok"
+    assert len(requests) == 1
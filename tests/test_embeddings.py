@@ -0,0 +1,100 @@
+import uuid
+import numpy as np
+import openai
+import pytest
+from app.config import settings
+from app.database.qdrant_client import EmbeddingMismatchError, QdrantService
+from app.services.embedding_providers import HashingEmbeddingProvider, create_provider
+from app.services.embeddings_service import EmbeddingsService
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    # প্রতি test এ নতুন collection, যাতে metadata.db এর record আগের test থেকে না আসে
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+    service = QdrantService()
+    yield service
+    service.delete_collection()
+
+
+def test_hashing_embeddings_are_deterministic():
+    texts = ["Customer: Rahim | City: Dhaka", "গ্রাহক: রহিম | শহর: ঢাকা", ""]
+    first = HashingEmbeddingProvider(256).embed(texts)
+    second = HashingEmbeddingProvider(256).embed(list(reversed(texts)))
+
+    assert first == list(reversed(second))
+    assert all(len(vector) == 256 for vector in first)
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0, abs=1e-6)
+    assert np.linalg.norm(first[1]) == pytest.approx(1.0, abs=1e-6)
+    # খালি text এ কোনো feature নেই, zero vector
+    assert not any(first[2])
+
+
+def test_hashing_embeddings_rank_similar_text_higher():
+    provider = HashingEmbeddingProvider(512)
+    query, close, far = np.array(provider.embed(["order 1042 status", "Order: 1042 | Status: shipped", "City: Dhaka"]))
+    assert query @ close > query @ far
+
+
+def test_create_provider_uses_configured_dimension(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "HASHING_EMBEDDING_DIMENSION", 64)
+    provider = create_provider()
+    assert provider.name == "hashing-64"
+    assert provider.dimension == 64
+    assert len(provider.embed(["hello"])[0]) == 64
+
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "unknown")
+    with pytest.raises(ValueError):
+        create_provider()
+
+
+def test_check_embedding_records_and_rejects_other_provider(qdrant):
+    qdrant.create_collection(64)
+    qdrant.check_embedding("hashing-64", 64)
+    assert qdrant.metadata.get_collection_embedding(qdrant.collection_name) == {
+        "provider": "hashing-64", "dimension": 64
+    }
+    # একই provider আবার check করলে কিছু হবে না
+    qdrant.check_embedding("hashing-64", 64)
+
+    with pytest.raises(EmbeddingMismatchError):
+        qdrant.check_embedding("text-embedding-3-small", 64)
+    with pytest.raises(EmbeddingMismatchError):
+        qdrant.check_embedding("hashing-64", 128)
+
+
+def test_check_embedding_rejects_unrecorded_collection_with_other_dimension(qdrant):
+    # আগের version এর collection: record নেই, শুধু vector size দিয়ে মিলাবো
+    qdrant.create_collection(1536)
+    with pytest.raises(EmbeddingMismatchError):
+        qdrant.check_embedding("hashing-512", 512)
+    assert qdrant.metadata.get_collection_embedding(qdrant.collection_name) is None
+
+
+def test_changing_configured_dimension_is_rejected(qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "HASHING_EMBEDDING_DIMENSION", 32)
+    embeddings = EmbeddingsService()
+    assert len(embeddings.get_embedding("Order: 1042")) == embeddings.dimension == 32
+    qdrant.create_collection(embeddings.dimension)
+    qdrant.check_embedding(embeddings.model, embeddings.dimension)
+
+    monkeypatch.setattr(settings, "HASHING_EMBEDDING_DIMENSION", 48)
+    embeddings = EmbeddingsService()
+    with pytest.raises(EmbeddingMismatchError):
+        qdrant.check_embedding(embeddings.model, embeddings.dimension)
+
+
+def test_hashing_provider_needs_no_openai_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    embeddings = EmbeddingsService()
+
+    assert len(embeddings.get_embedding("Order: 1042")) == embeddings.dimension
+    assert embeddings.get_embeddings(["Order: 1042", "City: Dhaka"])[1] is not None
+    # Chat এর জন্য তখনই OpenAI client বানাবে, key না থাকলে সেখানেই error
+    with pytest.raises(openai.OpenAIError):
+        embeddings.get_chat_response("order 1042", "Order: 1042")
@@ -0,0 +1,101 @@
+import sqlite3
+import uuid
+from datetime import datetime
+import httpx
+import openai
+import pytest
+from app.config import settings
+
+# DataProcessor import এর জন্য pyodbc লাগে
+pytest.importorskip("pyodbc")
+
+from app.services.data_processor import DataProcessor
+from benchmarks.fakes import SQLiteMSSQLConnection
+
+
+class DatetimeSQLiteConnection(SQLiteMSSQLConnection):
+    """SQLite এ datetime text হিসেবে থাকে; SQL Server এর মতো MAX() datetime return করবে"""
+
+    def get_max_value(self, table_name, column):
+        value = super().get_max_value(table_name, column)
+        return datetime.fromisoformat(value) if value is not None else None
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+    monkeypatch.setattr(settings, "INGEST_FORMAT_WORKERS", 0)
+    monkeypatch.setattr(settings, "SYNC_WATERMARK_LAG_SECONDS", 300)
+    # প্রতি test এ নতুন table নাম, যাতে metadata.db এর sync state আগের test থেকে না আসে
+    table = f"items_{uuid.uuid4().hex[:8]}"
+    path = str(tmp_path / "source.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"CREATE TABLE [{table}] (id INTEGER PRIMARY KEY, name TEXT, modified_date DATETIME)")
+
+    dp = DataProcessor()
+    dp.mssql = DatetimeSQLiteConnection(path)
+    dp.table = table
+    yield dp
+    dp.qdrant.delete_collection()
+
+
+def insert(dp, *rows):
+    with sqlite3.connect(dp.mssql.path) as conn:
+        conn.executemany(f"INSERT INTO [{dp.table}] VALUES (?, ?, ?)", rows)
+
+
+def watermark(dp):
+    return dp.metadata.get_sync_state(f"table:{dp.table}")["watermark"]
+
+
+def bad_request():
+    return openai.BadRequestError(
+        "invalid input", response=httpx.Response(400, request=httpx.Request("POST", "http://test")), body=None
+    )
+
+
+def test_late_commit_inside_lag_window_is_picked_up(processor, capsys):
+    insert(processor, (1, "Rahim", "2024-01-01 10:00:00"), (2, "Karim", "2024-01-01 10:05:00"))
+    assert processor.process_table_data(processor.table) == 2
+    assert watermark(processor) == "2024-01-01T10:05:00"
+
+    # আগের run এর সময় এই row এর transaction commit হয়নি, timestamp watermark এর আগের
+    insert(processor, (3, "Salma", "2024-01-01 10:03:00"))
+    capsys.readouterr()
+    assert processor.process_table_data(processor.table) == 3
+
+    output = capsys.readouterr().out
+    assert "running a full pass" not in output
+    # Lag window এ আবার পড়া Karim এর fingerprint মিলে যায়, শুধু নতুন row embed হয়
+    assert "Total processed: 1, Unchanged: 1" in output
+    assert len(processor.qdrant.get_fingerprints("table_name", processor.table)) == 3
+
+
+def test_rejected_rows_do_not_hold_the_watermark(processor, monkeypatch):
+    insert(processor, (1, "Rahim", "2024-01-01 10:00:00"), (2, "Karim", "2024-01-01 10:05:00"))
+    embed = processor.embeddings.provider.embed
+
+    def reject_karim(texts):
+        if any("Karim" in text for text in texts):
+            raise bad_request()
+        return embed(texts)
+
+    monkeypatch.setattr(processor.embeddings.provider, "embed", reject_karim)
+    assert processor.process_table_data(processor.table) == 1
+    assert watermark(processor) == "2024-01-01T10:05:00"
+
+
+def test_transient_failure_keeps_the_previous_watermark(processor, monkeypatch):
+    insert(processor, (1, "Rahim", "2024-01-01 10:00:00"))
+    processor.process_table_data(processor.table)
+
+    insert(processor, (2, "Karim", "2024-01-01 11:00:00"))
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_RETRIES", 1)
+
+    def unavailable(texts):
+        raise RuntimeError("service unavailable")
+
+    monkeypatch.setattr(processor.embeddings.provider, "embed", unavailable)
+    processor.process_table_data(processor.table)
+    assert watermark(processor) == "2024-01-01T10:00:00"
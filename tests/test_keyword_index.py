@@ -0,0 +1,105 @@
+import uuid
+import pytest
+from app.config import settings
+from app.services.keyword_index import KeywordIndex, reciprocal_rank_fusion, tokenize
+from app.services.search_service import SearchService
+
+DOCS = [
+    ("p1", "Invoice: INV-1042 | Customer: Rahim | City: Dhaka | Amount: 1200", "invoices"),
+    ("p2", "Invoice: INV-1043 | Customer: Karim | City: Dhaka | Amount: 300", "invoices"),
+    ("p3", "Invoice: INV-2001 | Customer: Salma | City: Sylhet | Amount: 0", "invoices"),
+    ("p4", "Customer: Rahim | City: Dhaka | Phone: 01711000000", "customers"),
+    ("p5", "Customer: Rahim Rahim Uddin | City: Khulna", "customers"),
+    ("p6", "গ্রাহক: রহিম | শহর: ঢাকা", "customers"),
+]
+
+
+@pytest.fixture
+def index():
+    index = KeywordIndex(collection_name=f"test_{uuid.uuid4().hex}")
+    index.add_documents(DOCS)
+    return index
+
+
+def ids(hits):
+    return [point_id for point_id, _, _ in hits]
+
+
+def test_tokenize_keeps_identifiers_and_bengali():
+    assert tokenize("Invoice: INV-1042 | গ্রাহক: রহিম") == ["invoice", "inv", "1042", "গ্রাহক", "রহিম"]
+
+
+def test_bm25_ranks_rarer_and_more_frequent_terms_higher(index):
+    hits = index.search("Rahim Khulna")
+    assert ids(hits)[0] == "p5"
+    assert set(ids(hits)) == {"p1", "p4", "p5"}
+    assert hits[0][2] == 1.0
+    # কম document এ থাকা term এর score বেশি, তাই শুধু Rahim মেলা row গুলো পরে
+    assert all(score < hits[0][1] for _, score, _ in hits[1:])
+
+
+def test_identifier_lookup(index):
+    hits = index.search("inv 1043")
+    assert ids(hits)[0] == "p2"
+    assert hits[0][2] == 1.0
+    assert index.search("রহিম")[0][0] == "p6"
+    assert index.search("9999") == []
+
+
+def test_source_filter(index):
+    assert set(ids(index.search("Rahim", source="customers"))) == {"p4", "p5"}
+    assert ids(index.search("Rahim", source="invoices")) == ["p1"]
+
+
+def test_collections_are_separate(index):
+    other = KeywordIndex(collection_name=f"test_{uuid.uuid4().hex}")
+    assert other.search("Rahim") == []
+    other.add_documents([("p1", "Customer: Rahim", "customers")])
+    assert ids(other.search("Rahim")) == ["p1"]
+    assert len(index.search("Rahim")) == 3
+
+
+def test_delete_updates_document_frequency(index):
+    conn = index.get_read_connection()
+
+    def df(term):
+        row = conn.execute(
+            "SELECT df FROM keyword_terms WHERE collection = ? AND term = ?", (index.collection, term)
+        ).fetchone()
+        return row[0] if row else 0
+
+    assert df("rahim") == 3
+    index.delete_documents(["p1", "p5"])
+    assert df("rahim") == 1
+    assert df("khulna") == 0
+    assert index.missing_documents(["p1", "p4"]) == ["p1"]
+    assert ids(index.search("Rahim")) == ["p4"]
+    assert conn.execute(
+        "SELECT doc_count FROM keyword_stats WHERE collection = ?", (index.collection,)
+    ).fetchone()[0] == 4
+
+    # আবার যোগ করলে replace হবে, df দুইবার গোনা হবে না
+    index.add_documents([DOCS[0], DOCS[0]])
+    assert df("rahim") == 2
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [point_id for point_id, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_confident_keyword_match(index, monkeypatch):
+    monkeypatch.setattr(settings, "KEYWORD_ONLY_MAX_TERMS", 3)
+    monkeypatch.setattr(settings, "KEYWORD_CONFIDENT_RATIO", 1.5)
+    service = SearchService()
+
+    # সব term একটা row এ, আর পরেরটার চেয়ে অনেক এগিয়ে
+    assert service.is_confident_keyword_match("inv 1043", index.search("inv 1043"))
+    # সব term মেলেনি
+    assert not service.is_confident_keyword_match("Rahim Chittagong", index.search("Rahim Chittagong"))
+    # একাধিক row প্রায় সমান score এ
+    assert not service.is_confident_keyword_match("Dhaka", index.search("Dhaka"))
+    # বেশি term হলে semantic search লাগবে
+    assert not service.is_confident_keyword_match("inv 1043 karim dhaka", index.search("inv 1043 karim dhaka"))
+    assert not service.is_confident_keyword_match("inv 1043", [])
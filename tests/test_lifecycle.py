@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+
+# lifecycle service গুলো import করে, DataProcessor এর জন্য pyodbc লাগে
+pytest.importorskip("pyodbc")
+
+from app import lifecycle
+from app.config import settings
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_RETRY_SECONDS", 0)
+    monkeypatch.setattr(lifecycle, "readiness", lifecycle.Readiness())
+    return lifecycle.readiness
+
+
+def test_warm_up_retries_until_ready(readiness, monkeypatch):
+    calls = []
+
+    def warm_up():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("vector store not up yet")
+        return {"points": 5}
+
+    monkeypatch.setattr(lifecycle, "warm_up", warm_up)
+    asyncio.run(lifecycle.run_warm_up())
+
+    assert readiness.ready
+    assert readiness.to_dict()["attempts"] == 3
+    assert readiness.to_dict()["points"] == 5
+    assert "error" not in readiness.to_dict()
+
+
+def test_warm_up_gives_up_after_max_attempts(readiness, monkeypatch):
+    def warm_up():
+        raise ValueError("Unknown embedding provider: typo")
+
+    monkeypatch.setattr(settings, "WARMUP_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(lifecycle, "warm_up", warm_up)
+    asyncio.run(lifecycle.run_warm_up())
+
+    assert not readiness.ready
+    assert readiness.to_dict() == {
+        "status": "failed", "attempts": 3, "error": "Unknown embedding provider: typo"
+    }
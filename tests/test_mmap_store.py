@@ -0,0 +1,73 @@
+import numpy as np
+from qdrant_client.models import PointStruct
+from app.database import mmap_store
+from app.database.mmap_store import MmapVectorStore
+
+DIM = 8
+
+
+def point(i, version=0):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i % DIM] = 1.0
+    vector[(i + 1) % DIM] = 0.5 + i / 10000
+    return PointStruct(id=f"00000000-0000-0000-0000-{i:012d}", vector=vector.tolist(),
+                       payload={"source_name": "rows", "row_index": i, "version": version})
+
+
+def make_store(tmp_path, max_segments=16):
+    store = MmapVectorStore(str(tmp_path / "store"), max_segments=max_segments)
+    store.create(DIM)
+    return store
+
+
+def count_writes(store, monkeypatch):
+    written = []
+    write_segment = store._write_segment
+
+    def counting(count, dim, rows, deleted):
+        written.append(count)
+        return write_segment(count, dim, rows, deleted)
+
+    monkeypatch.setattr(store, "_write_segment", counting)
+    return written
+
+
+def test_compaction_rewrites_rows_a_logarithmic_number_of_times(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_store, "MERGE_FLOOR_ROWS", 10)
+    store = make_store(tmp_path)
+    written = count_writes(store, monkeypatch)
+
+    total = 0
+    for batch in range(256):
+        store.upsert([point(i) for i in range(total, total + 10)])
+        total += 10
+
+    manifest = store._read_manifest()
+    # 256 batch = 4^4: প্রতিটা row 4 বার merge হয়ে এক segment এ, একবার নিজে লেখা
+    assert sum(written) / total == 5
+    assert len(manifest["segments"]) == 1
+    assert store.count() == total
+
+
+def test_compaction_keeps_latest_version_and_deletes(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_store, "MERGE_FLOOR_ROWS", 4)
+    store = make_store(tmp_path, max_segments=3)
+
+    for start in range(0, 100, 5):
+        store.upsert([point(i) for i in range(start, start + 5)])
+    store.upsert([point(i, version=1) for i in range(0, 100, 3)])
+    store.delete([point(i).id for i in range(0, 100, 7)])
+    for start in range(100, 120, 5):
+        store.upsert([point(i) for i in range(start, start + 5)])
+
+    assert len(store._read_manifest()["segments"]) <= 3
+    expected = {i for i in range(120) if i >= 100 or i % 7}
+    records = store.retrieve([point(i).id for i in range(120)])
+    assert {record.payload["row_index"] for record in records} == expected
+    for record in records:
+        i = record.payload["row_index"]
+        assert record.payload["version"] == (1 if i < 100 and i % 3 == 0 else 0)
+    assert store.count() == len(expected)
+
+    top = store.search(point(50).vector, limit=1)[0]
+    assert top.payload["row_index"] == 50
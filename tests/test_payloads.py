@@ -0,0 +1,44 @@
+import pytest
+from app.config import settings
+from app.database.metadata_store import MetadataStore
+from app.services.payloads import build_payload, expand_payload
+from app.services.row_formatter import RowFormatter
+
+# Join query তে দুই table এর "id" আর "name" একই নামে আসে
+COLUMNS = ["id", "name", "id", "name", "city"]
+ROW = (1, "Rahim", 2, None, "ঢাকা")
+
+
+@pytest.fixture
+def metadata():
+    return MetadataStore()
+
+
+@pytest.fixture(params=[True, False], ids=["compact", "full"])
+def compact(request, monkeypatch):
+    monkeypatch.setattr(settings, "PAYLOAD_COMPACT", request.param)
+    return request.param
+
+
+def make_payload(metadata, columns, row):
+    source_id = metadata.register_source("sql:join", "join", columns, "SELECT ...")
+    formatter = RowFormatter(columns, [None] * len(columns))
+    value_rows, texts, _ = formatter.format_values([row])
+    payload = build_payload(
+        "source_name", "join", source_id, 0, dict(zip(columns, value_rows[0])), texts[0], value_rows[0]
+    )
+    return payload, value_rows[0], texts[0]
+
+
+def test_compact_payload_keeps_every_column_value(metadata, compact):
+    payload, values, text = make_payload(metadata, COLUMNS, ROW)
+    if compact:
+        assert payload["values"] == list(values)
+
+    expanded = expand_payload(payload, metadata)
+    assert expanded["text_content"] == text
+    assert expanded["text_content"] == "id: 1 | name: Rahim | id: 2 | city: ঢাকা"
+    # data dict এ duplicate column এর শেষ value থাকে, format করা row_data এর মতই
+    assert expanded["data"] == {"id": "2", "name": "N/A", "city": "ঢাকা"}
+    assert "values" not in expanded
+
@@ -0,0 +1,87 @@
+import datetime
+import decimal
+import hashlib
+import json
+import pytest
+from app.services.row_formatter import RowFormatter, format_chunk
+
+
+# RowFormatter এর আগে DataProcessor যেভাবে row format করতো (clean_and_format_value এর পথ), হুবহু রাখা
+def old_default_value(column_type):
+    column_type = str(column_type).lower()
+    if any(t in column_type for t in ['int', 'decimal', 'numeric', 'float', 'real', 'money']):
+        return "0"
+    if any(t in column_type for t in ['date', 'time', 'datetime']):
+        return "1900-01-01"
+    if 'bit' in column_type:
+        return "0"
+    return "N/A"
+
+
+def old_clean_and_format_value(value, column_type):
+    if value is None or str(value).strip() == '':
+        return old_default_value(column_type)
+    return ' '.join(str(value).strip().split())
+
+
+def old_format_row(columns, column_types, row):
+    row_data = {}
+    text_parts = []
+    for j, col in enumerate(columns):
+        cleaned_value = old_clean_and_format_value(row[j], column_types[j])
+        row_data[col] = cleaned_value
+        if cleaned_value and cleaned_value != "N/A":
+            text_parts.append(f"{col}: {cleaned_value}")
+    return row_data, " | ".join(text_parts)
+
+
+def old_fingerprint(row_data):
+    return hashlib.sha256(json.dumps(row_data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# pyodbc description এ Python type আসে; অন্য driver এ SQL type নাম আসতে পারে। "id" আর "name" duplicate
+COLUMNS = ["id", "name", "amount", "price", "created", "birth", "opened", "flag", "photo", "id", "name", "city", "qty"]
+COLUMN_TYPES = [
+    int, str, decimal.Decimal, float, datetime.datetime, datetime.date, datetime.time, bool, bytes, int, "nvarchar",
+    "nvarchar", "money"
+]
+ROWS = [
+    (1, "Rahim", decimal.Decimal("1250.50"), 3.5, datetime.datetime(2024, 1, 2, 3, 4, 5, 600000),
+     datetime.date(2024, 2, 29), datetime.time(9, 30), True, b"\x00\xff", 7, "রহিম  উদ্দিন", "ঢাকা", 0),
+    (None, None, None, None, None, None, None, None, None, None, None, None, None),
+    (0, "", decimal.Decimal("0E-2"), 0.0, datetime.datetime(1900, 1, 1), datetime.date(1900, 1, 1),
+     datetime.time(0, 0), False, b"", 0, "   ", " Zürich\t\n", decimal.Decimal("-0")),
+    (10 ** 20, "  padded   text  ", decimal.Decimal("1E+3"), float("nan"), datetime.datetime(2024, 1, 1),
+     datetime.date.min, datetime.time(23, 59, 59, 999999), True, bytearray(b"ab"), -1, 'quote " and \\ slash',
+     "日本　東京", 1e-7),
+    # Column type এর সাথে value এর type না মিললে (যেমন text হিসেবে আসা number)
+    ("42", 5, "12.00", "3.25", "2024-01-01", "2024-01-01", "not a time", 1, "text", 3.0, 12, None, " 5 "),
+]
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_format_matches_old_format_row(row):
+    formatter = RowFormatter(COLUMNS, COLUMN_TYPES)
+    row_data, text_content = old_format_row(COLUMNS, COLUMN_TYPES, row)
+
+    assert formatter.format(row) == (row_data, text_content)
+    [(new_data, new_text, new_fingerprint)] = formatter.format_many([row])
+    assert (new_data, new_text) == (row_data, text_content)
+    assert new_fingerprint == old_fingerprint(row_data)
+
+
+def test_format_values_matches_old_format_row_for_chunk():
+    value_rows, texts, fingerprints = format_chunk(COLUMNS, COLUMN_TYPES, ROWS)
+    for row, values, text, row_fingerprint in zip(ROWS, value_rows, texts, fingerprints):
+        row_data, text_content = old_format_row(COLUMNS, COLUMN_TYPES, row)
+        # Positional value গুলোতে duplicate column এর সব value থাকে, dict এ শুধু শেষেরটা
+        assert list(values) == [old_clean_and_format_value(value, t) for value, t in zip(row, COLUMN_TYPES)]
+        assert dict(zip(COLUMNS, values)) == row_data
+        assert text == text_content
+        assert row_fingerprint == old_fingerprint(row_data)
+
+
+def test_format_without_columns():
+    formatter = RowFormatter([], [])
+    assert formatter.format_values([(), ()]) == ([(), ()], ["", ""], [old_fingerprint({})] * 2)
+    assert formatter.format_values([]) == ([], [], [])
@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+import pytest
+from qdrant_client.models import PointStruct
+from app.config import settings
+from app.services.search_service import SearchService
+
+ROWS = [
+    "Customer: Rahim | City: Dhaka | Balance: 1200",
+    "Customer: Karim | City: Chittagong | Balance: 300",
+    "Customer: Salma | City: Sylhet | Balance: 0",
+]
+NO_DATA = "দুঃখিত, কোনো ডেটা ট্রেইন করা হয়নি। প্রথমে ডেটা ট্রেইন করুন।"
+
+
+@pytest.fixture
+def search_service(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+    monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", False)
+    service = SearchService()
+    service.answer_cache = None
+
+    async def answer(query, context):
+        return f"answer: {query}"
+
+    monkeypatch.setattr(service.embeddings, "aget_chat_response", answer)
+    yield service
+    service.qdrant.delete_collection()
+
+
+def train(service):
+    embeddings = service.embeddings.get_embeddings(ROWS)
+    service.qdrant.create_collection(service.embeddings.dimension)
+    point_ids = [str(uuid.uuid4()) for _ in ROWS]
+    service.qdrant.upsert_points([
+        PointStruct(id=point_id, vector=embedding, payload={
+            "source_name": "customers", "data": {"text": text}, "text_content": text
+        })
+        for point_id, text, embedding in zip(point_ids, ROWS, embeddings)
+    ])
+    service.keyword_index.add_documents((point_id, text, "customers") for point_id, text in zip(point_ids, ROWS))
+
+
+def test_failed_keyword_search_only_fails_that_question(search_service, monkeypatch):
+    train(search_service)
+    search = search_service.keyword_index.search
+
+    def failing_search(query, limit=20, source=None):
+        if "broken" in query:
+            raise RuntimeError("keyword index unavailable")
+        return search(query, limit, source)
+
+    monkeypatch.setattr(search_service.keyword_index, "search", failing_search)
+    questions = [("who lives in Dhaka", None), ("broken question", None), ("Karim balance", None)]
+    answers = asyncio.run(search_service.abatch_search_and_respond(questions))
+
+    assert answers[0][0] == "answer: who lives in Dhaka"
+    assert isinstance(answers[1], RuntimeError)
+    assert answers[2][0] == "answer: Karim balance"
+
+
+def test_failed_vector_search_only_fails_that_question(search_service, monkeypatch):
+    train(search_service)
+    search = search_service.qdrant.search
+
+    def failing_batch(*args, **kwargs):
+        raise ValueError("batch search failed")
+
+    def failing_search(query_vector, limit=5, source=None, search_params=None):
+        if source == "missing":
+            raise ValueError("search failed")
+        return search(query_vector, limit=limit, source=source)
+
+    monkeypatch.setattr(search_service.qdrant, "search_batch", failing_batch)
+    monkeypatch.setattr(search_service.qdrant, "search", failing_search)
+    question = "which customer lives in Sylhet"
+    retrieved = search_service.retrieve_batch([(question, None), (question, "missing")])
+
+    cached, results, query_embedding = retrieved[0]
+    assert cached is None and query_embedding is not None
+    assert ROWS[2] in [payload["text_content"] for payload, _ in results]
+    assert isinstance(retrieved[1], ValueError)
+
+
+def test_untrained_collection_returns_no_data_message(search_service):
+    answers = asyncio.run(search_service.abatch_search_and_respond([("who lives in Dhaka", None)] * 2))
+    assert answers == [(NO_DATA, [])] * 2
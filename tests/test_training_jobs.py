@@ -0,0 +1,63 @@
+import time
+import pytest
+
+# DataProcessor import এর জন্য pyodbc লাগে
+pytest.importorskip("pyodbc")
+
+from app.services import training_jobs
+from app.services.data_processor import DataProcessor
+from app.services.training_jobs import TrainingCancelled, TrainingJob, TrainingJobManager
+from tests.test_embedding_retries import APIError, FlakyProvider
+
+
+def wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class FakeProcessor:
+    def process_table_data(self, table_name, full_refresh=False, job=None):
+        job.record(rows_read=3)
+        return 3
+
+
+def test_jobs_use_shared_data_processor(monkeypatch):
+    processors = []
+
+    def get_data_processor():
+        processors.append(FakeProcessor())
+        return processors[-1]
+
+    monkeypatch.setattr(training_jobs, "get_data_processor", get_data_processor)
+    manager = TrainingJobManager(1)
+    # Manager বানানোর সময় DataProcessor বানাবে না
+    assert not processors
+
+    job = wait(manager.submit_table("customers"))
+    assert job.status == "completed"
+    assert job.counts["rows_read"] == 3
+    assert len(processors) == 1
+
+
+def test_job_fails_when_data_processor_cannot_be_created(monkeypatch):
+    def get_data_processor():
+        raise RuntimeError("SQL Server driver missing")
+
+    monkeypatch.setattr(training_jobs, "get_data_processor", get_data_processor)
+    job = wait(TrainingJobManager(1).submit_table("customers"))
+    assert job.status == "failed"
+    assert job.error == "SQL Server driver missing"
+
+
+def test_cancel_stops_waiting_on_rate_limit():
+    processor = DataProcessor()
+    processor.embeddings.provider = FlakyProvider(APIError(429), failures=100)
+    job = TrainingJob("table", "customers", {})
+    job.cancel()
+    entries = [(0, "id", ("Rahim",), "name: Rahim", "fp")]
+
+    with pytest.raises(TrainingCancelled):
+        processor.build_points(entries, lambda i, values, text_content: {}, job=job)
+    assert processor.embeddings.provider.calls == 1